@@ -1,69 +1,240 @@
+from medicao_inicio import MedicaoInicio  # Primeiro import: marca o início do script (ver --medir-inicio)
+import json
 import sys
-from app_ui import AppUI
 import threading
-from servico_balanca import ServicoBalanca
+import time
+from servico_balanca import ServicoBalanca, MODO_CONSULTA, MODO_CONTINUO, MODO_AUTOMATICO
 from servico_csv import ServicoCsv
+from gravador_csv import GravadorCsv
+from despachante_ui import DespachanteUI
+from registro_log import RegistroLog
+from sessao_colunar import SessaoColunar
+from supervisor_conexao import SupervisorConexao
+from inventario_portas import InventarioPortas
+from perfis_serial import PERFIL_PADRAO
+from drivers_balanca import DRIVERS, PROTOCOLO_PADRAO
+from estabilidade import DetectorEstabilidade, CRITERIO_BALANCA, CRITERIOS
 
 class AppPrincipal:
-    def __init__(self):
+    def __init__(self, usar_asyncio=False, criterio_estabilidade=CRITERIO_BALANCA, classe_ui=None, medicao=None,
+                 medir_inicio=False, orcamento_inicio_ms=None, porta_api=None, protocolo=PROTOCOLO_PADRAO):
         # --- ESTADO DA APLICAÇÃO ---
         self.conectado = False
+        self.reconectando = False  # Conexão caiu e o SupervisorConexao está tentando reabrir a porta
+        self._handshake = None  # Conexão pedida pelo usuário ainda em andamento (porta, Err 30, identificação)
+        self._conexao_pedida = None  # (porta, modo) dessa conexão
         self.leitura_estavel = False
         self.contadores_totais = {'A': 0, 'B': 0}
         self._capturando = False # Novo estado para evitar capturas simultâneas
+        self._lock_captura = threading.Lock()  # Tecla (thread da UI) e API (threads do servidor) disputam a captura
         self._encerrando = False
+        self._lista_portas_pedida = False  # Atualização da lista pedida pelo usuário (aplicada mesmo sem mudanças)
+        self.codigo_saida = 0
+        # Tempos da inicialização; com medir_inicio, o relatório é impresso e a aplicação fecha em seguida
+        self.medicao = medicao or MedicaoInicio()
+        self.medir_inicio = medir_inicio
+        self.orcamento_inicio_ms = orcamento_inicio_ms
+        self.ensaio_atual = None  # Ensaio da conexão atual (o nome não pode ser editado enquanto conectado)
 
-        # Estado para controle de lotes mistos (ex: ABBA)
-        self.lote_em_andamento_A = []
-        self.lote_em_andamento_B = []
+        # Estado para controle de lotes mistos (ex: ABBA): pesos e instantes das capturas, por coluna
+        self.lote_em_andamento = SessaoColunar(('Padrao (A)', 'Cliente (B)'))
 
         # --- INICIALIZAÇÃO DOS MÓDULOS ---
         # O Controller passa suas próprias funções (callbacks) para os serviços e a UI.
         # self.log é uma função do controller que a UI e os serviços podem chamar.
-        self.ui = AppUI(self)
+        # classe_ui permite rodar o controller sem janela (ex.: benchmarks/bench_captura.py)
+        # Últimas linhas do log em memória (a UI exibe só o trecho visível) e log completo em arquivo rotativo.
+        self.registro_log = RegistroLog()
+        if classe_ui is None:
+            from app_ui import AppUI  # Importa o CustomTkinter só quando a janela é de fato necessária
+            classe_ui = AppUI
+        self.ui = classe_ui(self)
+        self.medicao.marcar("janela criada")
+        # Peso, status e log chegam das threads dos serviços e são aplicados na UI a 30 Hz.
+        self.despachante = DespachanteUI(self.ui, self._aplicar_peso_ui, self._aplicar_status_ui,
+                                         lambda _mensagens: self.ui.renderizar_log())
+        self.despachante.iniciar()
         self.servico_csv = ServicoCsv(self.log)
-        self.servico_balanca = ServicoBalanca(
+        # As gravações rodam em uma thread de fundo: a UI só enfileira e recebe a confirmação depois.
+        self.gravador_csv = GravadorCsv(self.servico_csv, self.on_medidas_gravadas, self.on_falha_gravacao, self.log)
+        self.gravador_csv.iniciar()
+        # Com usar_asyncio, a balança roda no event loop compartilhado (transporte_async) via adaptador síncrono.
+        if usar_asyncio:
+            from transporte_async import AdaptadorServicoBalancaAsync
+            classe_servico_balanca = AdaptadorServicoBalancaAsync
+        else:
+            classe_servico_balanca = ServicoBalanca
+        self.servico_balanca = classe_servico_balanca(
             on_peso_update=self.on_peso_update,
             on_status_update=self.on_status_update,
             on_log=self.log,
-            on_connection_loss=self.on_connection_loss
+            on_connection_loss=self.on_connection_loss,
+            detector_estabilidade=DetectorEstabilidade(criterio_estabilidade),
+            protocolo=protocolo,
         )
-        
-        # Inicia a aplicação
-        self.ui.show_info("Atenção", "Certifique-se de que a balança está ligada, estável e pronta para a conexão.")
+        self.driver = DRIVERS[protocolo]
+        # Lista de portas em cache (enumerada em segundo plano) e memória de qual adaptador é a balança
+        self.inventario = InventarioPortas(self.on_portas_atualizadas, self.log)
+        # Quedas da porta (ex.: adaptador USB desconectado) são reconectadas automaticamente
+        self.supervisor = SupervisorConexao(self.servico_balanca, self.on_reconectado, self.on_desistencia_reconexao,
+                                            self.on_status_update, self.log, inventario=self.inventario)
+        # API HTTP local opcional (leituras ao vivo por SSE, captura, tara e estatísticas)
+        self.servidor_api = None
+        if porta_api is not None:
+            from servidor_api import ServidorApi
+            self.servidor_api = ServidorApi(self.capturar_remoto, self.tarar_remoto, self.resumo_remoto, self.log,
+                                            porta=porta_api)
+            if not self.servidor_api.iniciar()[0]:
+                self.servidor_api = None
+
+        # Inicia a aplicação: a janela aparece primeiro; as portas são listadas em segundo plano
+        # e o aviso inicial só é mostrado depois da primeira pintura.
+        self.ui.atualizar_lista_perfis(["Automático", *self.driver.perfis], self.driver.perfil_padrao or PERFIL_PADRAO)
+        self.ui.after(0, self._concluir_inicializacao)
+
+    def _concluir_inicializacao(self):
+        """Primeira volta do mainloop: desenha a janela, começa a listar as portas e mostra o aviso inicial."""
+        self.ui.update_idletasks()
+        self.medicao.marcar("primeira pintura")
         self.atualizar_lista_portas()
-        
+        self.inventario.iniciar()  # Acompanha adaptadores conectados ou removidos depois
+        if not self.medir_inicio:
+            self.ui.show_info("Atenção", "Certifique-se de que a balança está ligada, estável e pronta para a conexão.")
+
     def run(self):
         """Inicia o loop principal da interface gráfica."""
         self.ui.mainloop()
 
     # --- MÉTODOS CHAMADOS PELA UI (Ações do Usuário) ---
     def alternar_conexao(self):
-        if self.conectado:
+        if self._handshake is not None:
+            # Handshake em andamento: o botão cancela (a porta é fechada pela thread do handshake)
+            self._handshake.cancelar()
+            self._handshake = None
+            self.ui.set_estado_conectado(False)
+        elif self.conectado or self.reconectando:
+            self.supervisor.parar()
             self.servico_balanca.desconectar()
             self.conectado = False
+            self.reconectando = False
             self.ui.set_estado_conectado(False)
+            resumo_conexao = self.supervisor.resumo()
+            if resumo_conexao:
+                self.log(resumo_conexao)
+            # Ao desconectar o nome do ensaio volta a ser editável: exporta o CSV final
+            # (na thread de gravação, depois das medidas que ainda estiverem na fila).
+            self.gravador_csv.enfileirar_tarefa(
+                self.servico_csv.fechar_todos,
+                lambda erros: self._safe_schedule_ui(self._mostrar_erros_gravacao, erros))
         else:
             porta = self.ui.get_porta_selecionada()
-            # Pausar temporariamente caso já esteja em um estado inconsistente
-            self.servico_balanca.pausar_monitoramento()
-            try:
-                sucesso, mensagem = self.servico_balanca.conectar(porta)
-                if sucesso:
-                    self.conectado = True
-                    self.ui.set_estado_conectado(True)
-                else:
-                    self.ui.show_error("Erro de Conexão", mensagem)
-                    self.conectado = False
-                    self.ui.set_estado_conectado(False)
-            finally:
-                # Retoma o monitoramento se a conexão foi bem-sucedida
-                if self.conectado:
-                    self.servico_balanca.retomar_monitoramento()
+            modo = {"Contínuo": MODO_CONTINUO, "Automático": MODO_AUTOMATICO}.get(self.ui.get_modo_aquisicao(),
+                                                                                 MODO_CONSULTA)
+            perfil = self.ui.get_perfil_selecionado()
+            sondar = perfil == "Automático"
+            # O handshake (abertura, teste de Err 30, identificação) roda em segundo plano: a janela
+            # continua respondendo, o progresso aparece no status e o botão passa a cancelar a conexão.
+            self.ui.set_estado_conectando()
+            self._conexao_pedida = (porta, modo)
+            self._handshake = self.servico_balanca.conectar_em_segundo_plano(
+                porta, self.on_conexao_concluida, modo, perfil=None if sondar else perfil, sondar=sondar)
+
+    def on_conexao_concluida(self, handshake, sucesso, mensagem):
+        """Callback: Chamado pelo ServicoBalanca (thread do handshake) quando a conexão pedida termina."""
+        if self._encerrando:
+            if sucesso:
+                self.servico_balanca.desconectar()
+            return
+        self._safe_schedule_ui(self._aplicar_conexao, handshake, sucesso, mensagem)
+
+    def _aplicar_conexao(self, handshake, sucesso, mensagem):
+        if handshake is not self._handshake:  # Cancelada pelo usuário enquanto terminava
+            if sucesso:
+                self.servico_balanca.desconectar()
+            return
+        self._handshake = None
+        porta, modo = self._conexao_pedida
+        if sucesso:
+            self.conectado = True
+            self.ui.set_estado_conectado(True)
+            self.supervisor.vigiar(porta, modo, self.servico_balanca.perfil.nome)
+            self.inventario.lembrar(self.supervisor.identidade)
+            self._retomar_ensaio()
+        else:
+            # Sem janela modal: o motivo fica no status e as instruções completas no log
+            self.conectado = False
+            self.ui.set_estado_conectado(False)
+            self.log(mensagem)
+
+    def _retomar_ensaio(self):
+        """Carrega os totais de um ensaio que já existe (sem reler o CSV), para os contadores começarem certos."""
+        nome_ensaio = self.ensaio_atual = self.ui.get_nome_ensaio()
+        self.gravador_csv.enfileirar_tarefa(
+            lambda: self.servico_csv.get_resumo(nome_ensaio),
+            lambda resumo: self._safe_schedule_ui(self._aplicar_resumo_ensaio, resumo))
+
+    def _aplicar_resumo_ensaio(self, resumo):
+        """Aplica os totais lidos por _retomar_ensaio (thread da UI)."""
+        if isinstance(resumo, Exception):
+            return
+        count_A, count_B, estatisticas = resumo
+        self.contadores_totais['A'] = count_A
+        self.contadores_totais['B'] = count_B
+        self.ui.atualizar_contadores(count_A, count_B)
+        if estatisticas and any(estatistica.quantidade for estatistica in estatisticas.values()):
+            self.log(f"Ensaio existente retomado: A={count_A}, B={count_B}, "
+                     f"Genérico={estatisticas['Generico'].quantidade}.")
 
     def tarar_balanca(self):
-        if self.conectado:
-            self.servico_balanca.enviar_comando_tara()
+        if not self.conectado:
+            return
+        # A tara passa à frente das leituras e a confirmação chega pelo Future (nos dois serviços).
+        futuro = self.servico_balanca.tarar()
+        if futuro is not None:
+            futuro.add_done_callback(self._tara_concluida)
+
+    def _tara_concluida(self, futuro):
+        """Chamado na thread do escalonador (ou do event loop) quando a balança confirma (ou não) a tara."""
+        if futuro.cancelled() or not self.conectado:  # Desconectado antes da resposta
+            return
+        erro = futuro.exception()
+        if erro is not None:
+            self.log(f"Erro ao enviar comando de tara: {erro}")
+        else:
+            self.servico_balanca.registrar_tara(futuro.result())
+
+    # --- MÉTODOS CHAMADOS PELA API HTTP (threads do servidor) ---
+    def capturar_remoto(self, coluna_letra):
+        """Captura pedida pela API: mesmo fluxo da tecla (A/B entram no lote, G é salvo na hora). Retorna (peso, erro)."""
+        if not self.conectado:
+            return None, "Balança desconectada."
+        if not self._reservar_captura():
+            return None, "Captura anterior em andamento."
+        instante = time.monotonic()
+        self._safe_schedule_ui(self.ui.set_estado_capturando, True)
+        try:
+            peso, estavel = self.servico_balanca.get_leitura_instantanea(instante)
+        finally:
+            self._capturando = False
+            self._safe_schedule_ui(self.ui.set_estado_capturando, False)
+        if not estavel or peso is None:
+            self.log("⚠️ Captura pela API cancelada: leitura instável.")
+            return None, "A leitura da balança não está estável."
+        self._safe_schedule_ui(self._processar_captura_bem_sucedida, coluna_letra, peso)
+        return peso, None
+
+    def tarar_remoto(self):
+        return self.conectado and self.servico_balanca.enviar_comando_tara()
+
+    def resumo_remoto(self):
+        from servidor_api import resumo_ensaio
+        if self.ensaio_atual is None:
+            return {'ensaio': None, 'contagem_A': 0, 'contagem_B': 0, 'estatisticas': {}}
+        return resumo_ensaio(self.ensaio_atual, self.servico_csv.get_resumo(self.ensaio_atual))
+
+    def _publicar_api(self, evento, /, **dados):
+        if self.servidor_api is not None:
+            self.servidor_api.publicar_evento(evento, **dados)
 
     def capturar_coluna(self, coluna_letra):
         """Inicia o processo de captura de uma nova medida."""
@@ -71,25 +242,49 @@ class AppPrincipal:
             self.log("Conecte à balança para capturar.")
             return
         
-        if self._capturando:
+        if not self._reservar_captura():
             self.log("Aguarde, captura anterior em andamento...")
             return
 
+        # Momento da tecla: a captura usa a leitura estável recebida a partir daqui (ou logo antes)
+        instante = time.monotonic()
+
+        if hasattr(self.servico_balanca, "agendar_leitura_instantanea"):
+            # Serviço assíncrono: a captura é uma corrotina no event loop, sem thread extra.
+            self.ui.set_estado_capturando(True)
+            self.servico_balanca.agendar_leitura_instantanea(
+                lambda resultado: self._finalizar_captura(coluna_letra, *resultado), instante)
+            return
+
         # Inicia o processo de captura em uma nova thread para não travar a UI
-        threading.Thread(target=self._thread_captura, args=(coluna_letra,), daemon=True).start()
+        threading.Thread(target=self._thread_captura, args=(coluna_letra, instante), daemon=True).start()
 
-    def _thread_captura(self, coluna_letra):
+    def _reservar_captura(self):
+        """Marca o início de uma captura. Retorna False se outra (da tecla ou da API) já está em andamento."""
+        with self._lock_captura:
+            if self._capturando:
+                return False
+            self._capturando = True
+            return True
+
+    def _thread_captura(self, coluna_letra, instante=None):
         """
         Executa em uma thread separada para obter a leitura da balança
         sem congelar a interface do usuário.
+        A captura já foi reservada por capturar_coluna.
         """
-        self._capturando = True
         self._safe_schedule_ui(self.ui.set_estado_capturando, True)
 
+        # Obtém a leitura estável correspondente ao momento da captura
+        peso_capturado, estavel = None, False
         try:
-            # Solicita uma leitura instantânea no momento da captura
-            peso_capturado, estavel = self.servico_balanca.get_leitura_instantanea()
+            peso_capturado, estavel = self.servico_balanca.get_leitura_instantanea(instante)
+        finally:
+            self._finalizar_captura(coluna_letra, peso_capturado, estavel)
 
+    def _finalizar_captura(self, coluna_letra, peso_capturado, estavel):
+        """Trata o resultado da captura (chamado fora da thread da UI)."""
+        try:
             if not estavel or peso_capturado is None:
                 # Pausa o monitoramento antes de mostrar o alerta modal
                 self.servico_balanca.pausar_monitoramento()
@@ -115,23 +310,26 @@ class AppPrincipal:
 
     def _processar_captura_bem_sucedida(self, coluna_letra, peso_capturado):
         """Processa a captura após uma leitura bem-sucedida (executa na thread da UI)."""
+        lote = self.lote_em_andamento
+        self._publicar_api("captura", coluna=coluna_letra, peso=peso_capturado)
         if coluna_letra == 'A':
-            self.lote_em_andamento_A.append(peso_capturado)
-            self.log(f"Adicionado à Coluna A: {peso_capturado:.6f}g (Total A: {len(self.lote_em_andamento_A)})")
+            lote.adicionar('Padrao (A)', peso_capturado)
+            self.log(f"Adicionado à Coluna A: {peso_capturado:.6f}g (Total A: {lote.contagem('Padrao (A)')})")
         elif coluna_letra == 'B':
-            self.lote_em_andamento_B.append(peso_capturado)
-            self.log(f"Adicionado à Coluna B: {peso_capturado:.6f}g (Total B: {len(self.lote_em_andamento_B)})")
+            lote.adicionar('Cliente (B)', peso_capturado)
+            self.log(f"Adicionado à Coluna B: {peso_capturado:.6f}g (Total B: {lote.contagem('Cliente (B)')})")
         else: # Coluna Genérica (G) - salva imediatamente
             self._salvar_medida_unica(peso_capturado)
             return
-        
+
+        count_A = lote.contagem('Padrao (A)')
+        count_B = lote.contagem('Cliente (B)')
+
         # Atualiza a UI para mostrar o progresso do lote
-        self.ui.atualizar_contadores_lote(len(self.lote_em_andamento_A), len(self.lote_em_andamento_B))
+        self.ui.atualizar_contadores_lote(count_A, count_B)
         self.ui.flash_button(coluna_letra)
 
         # Nova lógica para verificar se um lote está completo
-        count_A = len(self.lote_em_andamento_A)
-        count_B = len(self.lote_em_andamento_B)
 
         # Um lote está completo se:
         # 1. Apenas um tipo foi coletado e atingiu 4 medições.
@@ -145,8 +343,8 @@ class AppPrincipal:
 
     def _confirmar_e_salvar_lote(self):
         """Mostra um popup de confirmação e salva o lote se o usuário concordar."""
-        leituras_A_str = "\n".join([f"  - {peso:.6f} g" for peso in self.lote_em_andamento_A])
-        leituras_B_str = "\n".join([f"  - {peso:.6f} g" for peso in self.lote_em_andamento_B])
+        leituras_A_str = "\n".join([f"  - {peso:.6f} g" for peso in self.lote_em_andamento.coluna('Padrao (A)').pesos])
+        leituras_B_str = "\n".join([f"  - {peso:.6f} g" for peso in self.lote_em_andamento.coluna('Cliente (B)').pesos])
         
         mensagem = "Lote de medições completo.\n\n"
         if leituras_A_str:
@@ -169,58 +367,91 @@ class AppPrincipal:
             # Garante que o monitoramento seja retomado e o estado resetado,
             # independentemente da escolha do usuário.
             self.servico_balanca.retomar_monitoramento()
-            self.lote_em_andamento_A = []
-            self.lote_em_andamento_B = []
+            self.lote_em_andamento.limpar()
             self.ui.atualizar_contadores(self.contadores_totais['A'], self.contadores_totais['B']) # Volta a exibir totais
 
     def _salvar_lote_atual(self):
         """Envia o lote para o serviço de CSV e atualiza os contadores."""
         nome_ensaio = self.ui.get_nome_ensaio()
 
-        # Salva o lote de medidas usando o serviço de CSV
-        count_A, count_B, erro = self.servico_csv.salvar_lote_medidas(
-            nome_ensaio, 
-            self.lote_em_andamento_A, 
-            self.lote_em_andamento_B
-        )
-
-        if erro:
-            self.ui.show_error("Erro ao Salvar", erro)
-            # Não há necessidade de pausar aqui, pois o erro já ocorreu e a UI não está bloqueada
-        else:
-            self.contadores_totais['A'] = count_A
-            self.contadores_totais['B'] = count_B
-            self.ui.atualizar_contadores(count_A, count_B)
+        # Enfileira o lote (com os instantes das capturas); os contadores são atualizados na confirmação.
+        if not self.gravador_csv.enfileirar(nome_ensaio, self.lote_em_andamento.medidas(), fim_lote=True):
+            self.ui.show_error("Erro ao Salvar", "A fila de gravação está cheia. O lote não foi salvo; refaça as leituras.")
 
     def _salvar_medida_unica(self, peso):
         """Salva uma única medida na coluna 'Genérico'."""
         nome_ensaio = self.ui.get_nome_ensaio()
-        # Pausa o monitoramento antes de salvar, caso ocorra um erro de permissão
-        # que exiba uma caixa de diálogo.
+        if not self.gravador_csv.enfileirar(nome_ensaio, [('Generico', peso, time.time())]):
+            self._mostrar_erros_gravacao([f"A fila de gravação está cheia. A medida {peso:.6f} g não foi salva."])
+
+    def _mostrar_erros_gravacao(self, erros):
+        """Mostra erros de gravação (thread da UI), pausando o monitoramento durante o diálogo."""
+        if isinstance(erros, Exception):
+            erros = [str(erros)]
+        if not erros:
+            return
         self.servico_balanca.pausar_monitoramento()
         try:
-            _, _, erro = self.servico_csv.salvar_medida(nome_ensaio, 'Generico', peso)
-            if erro:
+            for erro in erros:
                 self.ui.show_error("Erro ao Salvar", erro)
         finally:
             self.servico_balanca.retomar_monitoramento()
 
     def abrir_arquivo(self):
         nome_ensaio = self.ui.get_nome_ensaio()
-        # Pausa para o caso de o arquivo não existir e um warning ser exibido
-        self.servico_balanca.pausar_monitoramento()
-        try:
-            sucesso, mensagem = self.servico_csv.abrir_no_explorer(nome_ensaio)
-            if not sucesso:
+        # A exportação roda na thread de gravação, depois das medidas que ainda estão na fila.
+        if not self.gravador_csv.enfileirar_tarefa(
+                lambda: self.servico_csv.abrir_no_explorer(nome_ensaio),
+                lambda resultado: self._safe_schedule_ui(self._resultado_abrir_arquivo, resultado)):
+            self.ui.show_warning("Aviso", "A fila de gravação está cheia. Tente novamente em instantes.")
+
+    def _resultado_abrir_arquivo(self, resultado):
+        sucesso, mensagem = (False, str(resultado)) if isinstance(resultado, Exception) else resultado
+        if not sucesso:
+            # Pausa para que o aviso não seja disputado com as atualizações de leitura
+            self.servico_balanca.pausar_monitoramento()
+            try:
                 self.ui.show_warning("Aviso", mensagem)
-            self.log(mensagem)
-        finally:
-            self.servico_balanca.retomar_monitoramento()
+            finally:
+                self.servico_balanca.retomar_monitoramento()
+        self.log(mensagem)
         
     def atualizar_lista_portas(self):
-        portas = self.servico_balanca.listar_portas_disponiveis()
-        self.ui.atualizar_lista_portas(portas)
+        """Pede uma nova enumeração ao inventário (em segundo plano: pode levar segundos com adaptadores USB/Bluetooth)."""
+        self._lista_portas_pedida = True
+        self.inventario.atualizar()
+
+    def on_portas_atualizadas(self, portas, mudou):
+        """Callback: Chamado pelo InventarioPortas (thread de enumeração) a cada nova lista de portas."""
+        if self._encerrando or not (mudou or self._lista_portas_pedida):
+            return
+        self._safe_schedule_ui(self._aplicar_lista_portas, portas)
+
+    def _aplicar_lista_portas(self, portas):
+        """Aplica a lista do inventário (thread da UI), pré-selecionando a porta em que a balança estava da última vez."""
+        self._lista_portas_pedida = False
+        lembrada = self.inventario.lembrada()
+        dispositivo = self.inventario.dispositivo_lembrado()
+        self.ui.atualizar_lista_portas([porta.dispositivo for porta in portas] or ["Nenhuma"], dispositivo)
         self.log("Lista de portas atualizada.")
+        if dispositivo and dispositivo != lembrada.dispositivo:
+            self.log(f"A balança (adaptador {lembrada}) agora está em {dispositivo}.")
+        if "portas listadas" not in self.medicao.etapas:
+            self.medicao.marcar("portas listadas")
+            self.log(self.medicao.resumo())
+            if self.medir_inicio:
+                self._finalizar_medicao_inicio()
+
+    def _finalizar_medicao_inicio(self):
+        """--medir-inicio: imprime o relatório em JSON e fecha (código 1 se passou do orçamento)."""
+        relatorio = self.medicao.relatorio()
+        relatorio['orcamento_ms'] = self.orcamento_inicio_ms
+        if self.orcamento_inicio_ms is not None and relatorio['total_ms'] > self.orcamento_inicio_ms:
+            self.log(f"Inicialização acima do orçamento: {relatorio['total_ms']:.0f} ms > {self.orcamento_inicio_ms:.0f} ms.")
+            self.codigo_saida = 1
+        if sys.stdout is not None:  # Executável sem console: fica só no log
+            print(json.dumps(relatorio), flush=True)
+        self.on_closing()
 
     def on_closing(self):
         """Chamado quando a janela é fechada."""
@@ -229,12 +460,26 @@ class AppPrincipal:
 
         self._encerrando = True
         self.log("Fechando aplicação...")
+        if self._handshake is not None:
+            self._handshake.cancelar()
+        self.supervisor.parar()
+        self.inventario.parar()
+        self.despachante.parar()
+        if self.servidor_api is not None:
+            self.servidor_api.parar()
         try:
             self.servico_balanca.desconectar()
+            # Grava o que ainda está na fila; o que não couber no prazo é registrado no log (on_falha_gravacao).
+            perdidos = self.gravador_csv.parar(timeout=10.0)
+            if perdidos:
+                self.log(f"‼️ {perdidos} gravação(ões) pendente(s) não concluída(s) no encerramento.")
+            # Se a exportação falhar, a sessão é mantida e recuperada na próxima abertura.
+            self.servico_csv.fechar_todos()
         finally:
+            self.registro_log.encerrar()
             if self.ui and self.ui.winfo_exists():
                 self.ui.destroy()
-            sys.exit(0)
+            sys.exit(self.codigo_saida)
 
     # --- MÉTODOS CHAMADOS PELOS SERVIÇOS (Callbacks) ---
     def on_peso_update(self, peso, estavel):
@@ -243,10 +488,12 @@ class AppPrincipal:
             return
 
         self.leitura_estavel = estavel
-        self._safe_schedule_ui(self._handle_peso_update_ui, peso, estavel)
+        self.despachante.publicar_peso(peso, estavel)
+        if self.servidor_api is not None:
+            self.servidor_api.publicar_leitura(peso, estavel)
 
-    def _handle_peso_update_ui(self, peso, estavel):
-        """Garante que a atualização da UI do peso ocorra na thread principal."""
+    def _aplicar_peso_ui(self, _id_balanca, peso, estavel):
+        """Aplica a última leitura na UI (chamado pelo despachante, na thread principal)."""
         self.ui.atualizar_peso_display(peso, estavel)
         self.ui.atualizar_status("Leitura estável" if estavel else "Balança instável, aguarde", "white" if estavel else "orange")
         
@@ -254,7 +501,11 @@ class AppPrincipal:
         """Callback: Chamado pelo ServicoBalanca para atualizar o status."""
         if self._encerrando:
             return
-        self._safe_ui_call(lambda: self.ui.atualizar_status(texto, cor))
+        self.despachante.publicar_status(texto, cor)
+        self._publicar_api("status", mensagem=texto)
+
+    def _aplicar_status_ui(self, _id_balanca, texto, cor):
+        self.ui.atualizar_status(texto, cor)
 
     def on_connection_loss(self):
         """Callback: Chamado pelo ServicoBalanca quando a conexão cai."""
@@ -262,7 +513,56 @@ class AppPrincipal:
             return
 
         self.conectado = False
-        self._safe_schedule_ui(self._handle_connection_loss_ui)
+        if self.supervisor.conexao_perdida():
+            self.reconectando = True
+            self._safe_schedule_ui(self.ui.set_estado_reconectando)
+        else:
+            self._safe_schedule_ui(self._handle_connection_loss_ui)
+
+    def on_reconectado(self, porta, segundos_fora):
+        """Callback: Chamado pelo SupervisorConexao quando a porta foi reaberta (o ensaio continua de onde parou)."""
+        if self._encerrando:
+            return
+        self._safe_schedule_ui(self._aplicar_reconexao_ui, porta)
+        self._publicar_api("reconectado", porta=porta, segundos_fora=round(segundos_fora, 3))
+
+    def _aplicar_reconexao_ui(self, porta):
+        if not self.reconectando:  # O usuário cancelou enquanto a porta reabria
+            return
+        if porta != self.inventario.lembrada().dispositivo:  # Voltou com outro nome: atualiza a memória
+            self.inventario.lembrar(self.inventario.identificar(porta))
+        self.reconectando = False
+        self.conectado = True
+        self.ui.set_estado_conectado(True)
+
+    def on_desistencia_reconexao(self, mensagem):
+        """Callback: o SupervisorConexao esgotou o tempo máximo sem reconectar."""
+        self.log(mensagem)
+        self.reconectando = False
+        if not self._encerrando:
+            self._safe_schedule_ui(self._handle_connection_loss_ui)
+
+    def on_medidas_gravadas(self, nome_ensaio, count_A, count_B, quantidade):
+        """Callback: Chamado pelo GravadorCsv (thread de gravação) quando medidas foram gravadas."""
+        if self._encerrando:
+            return
+        self._safe_schedule_ui(self._aplicar_contadores, count_A, count_B)
+        self._publicar_api("gravado", ensaio=nome_ensaio, quantidade=quantidade, contagem_A=count_A, contagem_B=count_B)
+
+    def _aplicar_contadores(self, count_A, count_B):
+        self.contadores_totais['A'] = count_A
+        self.contadores_totais['B'] = count_B
+        if not self.lote_em_andamento.total():  # Com um lote em andamento, a UI mostra o progresso dele
+            self.ui.atualizar_contadores(count_A, count_B)
+
+    def on_falha_gravacao(self, nome_ensaio, medidas, mensagem):
+        """Callback: Chamado pelo GravadorCsv quando medidas não puderam ser gravadas."""
+        # As medidas vão para o log (e o arquivo de log), para que possam ser recuperadas manualmente.
+        pesos = ", ".join(f"{tipo} {peso:.6f}" for tipo, peso, _ in medidas)
+        self.log(f"ERRO: {len(medidas)} medida(s) não gravada(s) no ensaio '{nome_ensaio}': {pesos}")
+        self._publicar_api("falha_gravacao", ensaio=nome_ensaio, pesos=[medida[1] for medida in medidas], mensagem=mensagem)
+        if not self._encerrando:
+            self._safe_schedule_ui(self._mostrar_erros_gravacao, [mensagem])
 
     def _handle_connection_loss_ui(self):
         """Garante que a atualização da UI ocorra na thread principal."""
@@ -276,13 +576,6 @@ class AppPrincipal:
             "A comunicação com a balança foi interrompida. Verifique o cabo e reconecte."
         )
 
-    def _safe_ui_call(self, func):
-        """Executa uma chamada de UI apenas se a janela ainda existir."""
-        if self._encerrando:
-            return
-        if self.ui and self.ui.winfo_exists():
-            func()
-
     def _safe_schedule_ui(self, func, *args):
         """Agenda uma atualização da UI na thread principal, se a janela ainda existir."""
         if self._encerrando:
@@ -292,13 +585,51 @@ class AppPrincipal:
 
     def log(self, mensagem):
         """Ponto central para logging. Chamado por todos os componentes."""
-        self._safe_schedule_ui(self.ui.log, mensagem)
+        self.registro_log.adicionar(mensagem)
+        if not self._encerrando:
+            self.despachante.publicar_log(mensagem)
 
 if __name__ == "__main__":
+    # --asyncio: usa o transporte assíncrono (um único event loop para a E/S da balança)
+    # --estabilidade=<critério>: critério de estabilidade (ver estabilidade.CRITERIOS)
+    # --medir-inicio: mede a inicialização (imports, primeira pintura, portas), imprime em JSON e fecha
+    # --orcamento-inicio=<ms>: com --medir-inicio, sai com código 1 se a inicialização passar de <ms>
+    # --api[=<porta>]: inicia a API HTTP local (padrão: servidor_api.PORTA_PADRAO, apenas 127.0.0.1)
+    # --protocolo=<nome>: protocolo da balança (ver drivers_balanca.DRIVERS; padrão: sbi)
+    criterio = CRITERIO_BALANCA
+    protocolo = PROTOCOLO_PADRAO
+    orcamento = None
+    porta_api = None
+    for argumento in sys.argv[1:]:
+        if argumento.startswith("--estabilidade="):
+            criterio = argumento.split("=", 1)[1]
+            if criterio not in CRITERIOS:
+                sys.exit(f"Critério de estabilidade inválido: {criterio}. Opções: {', '.join(CRITERIOS)}")
+        elif argumento.startswith("--protocolo="):
+            protocolo = argumento.split("=", 1)[1]
+            if protocolo not in DRIVERS:
+                sys.exit(f"Protocolo inválido: {protocolo}. Opções: {', '.join(DRIVERS)}")
+        elif argumento.startswith("--orcamento-inicio="):
+            try:
+                orcamento = float(argumento.split("=", 1)[1])
+            except ValueError:
+                sys.exit(f"Orçamento de inicialização inválido: {argumento}")
+        elif argumento == "--api" or argumento.startswith("--api="):
+            from servidor_api import PORTA_PADRAO
+            try:
+                porta_api = int(argumento.split("=", 1)[1]) if "=" in argumento else PORTA_PADRAO
+            except ValueError:
+                sys.exit(f"Porta da API inválida: {argumento}")
+
+    medicao = MedicaoInicio()
     # Define o modo de aparência antes de instanciar qualquer widget
     import customtkinter as ctk
+    from app_ui import AppUI
     ctk.set_appearance_mode("Dark")
     ctk.set_default_color_theme("blue")
-    
-    app = AppPrincipal()
+    medicao.marcar("imports")
+
+    app = AppPrincipal(usar_asyncio="--asyncio" in sys.argv, criterio_estabilidade=criterio, classe_ui=AppUI,
+                       medicao=medicao, medir_inicio="--medir-inicio" in sys.argv, orcamento_inicio_ms=orcamento,
+                       porta_api=porta_api, protocolo=protocolo)
     app.run()
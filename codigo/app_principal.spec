@@ -1,4 +1,7 @@
 # -*- mode: python ; coding: utf-8 -*-
+# Build em pasta (onedir): o executável abre direto da pasta dist/app_principal, sem extrair
+# todo o Python para uma pasta temporária a cada execução como no --onefile (início a frio bem mais rápido).
+# UPX desligado: DLLs comprimidas precisam ser descomprimidas a cada carga (e atrasam a verificação do antivírus).
 
 
 a = Analysis(
@@ -6,11 +9,12 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('icone_sartorius.ico', '.')],
-    hiddenimports=[],
+    hiddenimports=['simulador.protocol_sim'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Módulos da biblioteca padrão que a aplicação não usa (menos arquivos para o bootloader e o antivírus)
+    excludes=['unittest', 'pydoc', 'doctest', 'test', 'lib2to3', 'xmlrpc'],
     noarchive=False,
     optimize=0,
 )
@@ -19,16 +23,13 @@ pyz = PYZ(a.pure)
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='app_principal',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -37,3 +38,12 @@ exe = EXE(
     entitlements_file=None,
     icon=['icone_sartorius.ico'],
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='app_principal',
+)
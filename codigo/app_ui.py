@@ -12,6 +12,12 @@ class AppUI(ctk.CTk):
         """
         super().__init__()
         self.controller = controller
+        # Último texto/cor aplicado em cada label, para não reconfigurar o widget sem mudança
+        self._estado_labels = {}
+        # Log virtualizado: o textbox mostra apenas as linhas visíveis do RegistroLog do controller.
+        # _log_topo é a posição absoluta da primeira linha exibida; None = acompanha o fim do log.
+        self._log_topo = None
+        self._log_exibido = None
 
         # --- CONFIGURAÇÕES DA JANELA ---
         self.title("SISAQUI - Modo Planilha Livre v8.3") 
@@ -69,6 +75,16 @@ class AppUI(ctk.CTk):
         btn_refresh = ctk.CTkButton(frame_topo, text="⟳", width=30, command=self.controller.atualizar_lista_portas)
         btn_refresh.pack(side="left", padx=2)
 
+        # Modo de aquisição: "Consulta" pede cada leitura; "Contínuo" lê o envio automático da balança;
+        # "Automático" usa o modo mais rápido do protocolo e volta ao modo consulta se a balança não enviar sozinha
+        self.combo_modo = ctk.CTkComboBox(frame_topo, values=["Consulta", "Contínuo", "Automático"], width=110)
+        self.combo_modo.pack(side="left", padx=5)
+        self.combo_modo.set("Consulta")
+
+        # Perfil de comunicação (baud/enquadramento/handshake); "Automático" testa todos e usa o mais rápido
+        self.combo_perfil = ctk.CTkComboBox(frame_topo, values=["..."], width=150)
+        self.combo_perfil.pack(side="left", padx=5)
+
         self.btn_conexao = ctk.CTkButton(frame_topo, text="Conectar", command=self.controller.alternar_conexao, fg_color="green", width=100)
         self.btn_conexao.pack(side="left", padx=10)
         
@@ -105,9 +121,15 @@ class AppUI(ctk.CTk):
         self.lbl_count_B = ctk.CTkLabel(frame_acoes, text="Nº de Amostras B: 0", font=("Arial", 16, "bold"))
         self.lbl_count_B.grid(row=1, column=1, pady=5)
 
-        # 5. Textbox de Log
-        self.textbox_log = ctk.CTkTextbox(self, height=120)
-        self.textbox_log.pack(pady=10, padx=10, fill="x")
+        # 5. Log (renderiza só as linhas visíveis; a barra de rolagem percorre o RegistroLog)
+        frame_log = ctk.CTkFrame(self, fg_color="transparent")
+        frame_log.pack(pady=10, padx=10, fill="x")
+        self.textbox_log = ctk.CTkTextbox(frame_log, height=120, activate_scrollbars=False, wrap="none")
+        self.textbox_log.pack(side="left", fill="x", expand=True)
+        self.scrollbar_log = ctk.CTkScrollbar(frame_log, command=self._rolar_log)
+        self.scrollbar_log.pack(side="right", fill="y")
+        for evento in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.textbox_log.bind(evento, self._roda_mouse_log)
         self.log("Dica: As colunas são independentes. Pressione 'A', 'B' ou 'Espaço'.\n")
         
         # Estado inicial dos widgets
@@ -122,6 +144,8 @@ class AppUI(ctk.CTk):
         if conectado:
             self.btn_conexao.configure(text="Desconectar", fg_color="red")
             self.combo_portas.configure(state="disabled")
+            self.combo_modo.configure(state="disabled")
+            self.combo_perfil.configure(state="disabled")
             self.entry_arquivo.configure(state="disabled")
             self.btn_A.configure(state="normal")
             self.btn_B.configure(state="normal")
@@ -129,12 +153,31 @@ class AppUI(ctk.CTk):
         else:
             self.btn_conexao.configure(text="Conectar", fg_color="green")
             self.combo_portas.configure(state="normal")
+            self.combo_modo.configure(state="normal")
+            self.combo_perfil.configure(state="normal")
             self.entry_arquivo.configure(state="normal")
             self.btn_A.configure(state="disabled")
             self.btn_B.configure(state="disabled")
             self.btn_tarar.configure(state="disabled")
             self.atualizar_peso_display(None, False)
 
+    def set_estado_conectando(self):
+        """Handshake em andamento: seleções bloqueadas, capturas desabilitadas, botão de conexão cancela a conexão."""
+        self._set_estado_aguardando("Cancelar Conexão")
+
+    def set_estado_reconectando(self):
+        """Conexão caiu e está sendo reaberta: capturas desabilitadas, botão de conexão cancela a reconexão."""
+        self._set_estado_aguardando("Cancelar Reconexão")
+
+    def _set_estado_aguardando(self, texto_botao):
+        if not self.winfo_exists():
+            return
+        self.set_estado_conectado(True)
+        self.btn_conexao.configure(text=texto_botao, fg_color="orange")
+        self.btn_A.configure(state="disabled")
+        self.btn_B.configure(state="disabled")
+        self.btn_tarar.configure(state="disabled")
+
     def set_estado_capturando(self, capturando):
         """Habilita/desabilita os botões de captura durante uma leitura."""
         if not self.winfo_exists():
@@ -150,20 +193,38 @@ class AppUI(ctk.CTk):
             self.btn_B.configure(state="normal", text="Capturar para Coluna B")
             self.bind('<space>', lambda event: self.controller.capturar_coluna("G"))
 
-    def atualizar_lista_portas(self, portas):
-        """Atualiza a lista de portas no ComboBox."""
+    def atualizar_lista_portas(self, portas, selecionada=None):
+        """
+        Atualiza a lista de portas no ComboBox.
+        :param selecionada: Porta a pré-selecionar (ex.: a da última conexão); sem ela, mantém a escolha atual se ainda existir.
+        """
+        atual = self.combo_portas.get()
         self.combo_portas.configure(values=portas)
-        self.combo_portas.set(portas[0] if portas else "Nenhuma")
+        if selecionada:
+            self.combo_portas.set(selecionada)
+        elif atual not in portas:
+            self.combo_portas.set(portas[0] if portas else "Nenhuma")
+
+    def atualizar_lista_perfis(self, perfis, selecionado):
+        """Atualiza a lista de perfis de comunicação no ComboBox."""
+        self.combo_perfil.configure(values=perfis)
+        self.combo_perfil.set(selecionado)
 
     def atualizar_peso_display(self, peso_float, estavel):
         """Atualiza o label que exibe o peso."""
         cor_texto = "white" if estavel else "orange"
         texto_peso = f"{peso_float:.6f} g" if peso_float is not None else "--- g"
-        self.lbl_peso.configure(text=texto_peso, text_color=cor_texto)
+        self._configurar_label(self.lbl_peso, texto_peso, cor_texto)
 
     def atualizar_status(self, texto, cor):
         """Atualiza o label de status da conexão."""
-        self.lbl_status.configure(text=texto, text_color=cor)
+        self._configurar_label(self.lbl_status, texto, cor)
+
+    def _configurar_label(self, label, texto, cor):
+        """Aplica texto e cor ao label apenas se mudaram desde a última vez."""
+        if self._estado_labels.get(label) != (texto, cor):
+            self._estado_labels[label] = (texto, cor)
+            label.configure(text=texto, text_color=cor)
         
     def atualizar_contadores(self, count_A, count_B):
         """Atualiza os labels que mostram o número de amostras."""
@@ -176,10 +237,69 @@ class AppUI(ctk.CTk):
         self.lbl_count_B.configure(text=f"Nº de Amostras B: {progresso_B}")
 
     def log(self, msg):
-        """Adiciona uma mensagem ao textbox de log."""
-        if self.winfo_exists() and getattr(self, "textbox_log", None) and self.textbox_log.winfo_exists():
-            self.textbox_log.insert("end", msg + "\n")
-            self.textbox_log.see("end")
+        """Adiciona uma mensagem ao log (chamar na thread da UI)."""
+        self.controller.registro_log.adicionar(msg)
+        self.renderizar_log()
+
+    def renderizar_log(self):
+        """Redesenha o textbox com o trecho visível do RegistroLog."""
+        if not (self.winfo_exists() and getattr(self, "textbox_log", None) and self.textbox_log.winfo_exists()):
+            return
+        registro = self.controller.registro_log
+        visiveis = self._linhas_visiveis_log()
+        primeira, total = registro.primeira, registro.total
+        ultimo_topo = max(primeira, total - visiveis)
+        topo = ultimo_topo if self._log_topo is None else min(max(self._log_topo, primeira), ultimo_topo)
+
+        texto = "\n".join(registro.janela(topo, visiveis))
+        if texto != self._log_exibido:
+            self._log_exibido = texto
+            self.textbox_log.configure(state="normal")
+            self.textbox_log.delete("1.0", "end")
+            self.textbox_log.insert("1.0", texto)
+            self.textbox_log.configure(state="disabled")
+
+        quantidade = total - primeira
+        if quantidade > 0:
+            self.scrollbar_log.set((topo - primeira) / quantidade, min(1.0, (topo - primeira + visiveis) / quantidade))
+        else:
+            self.scrollbar_log.set(0.0, 1.0)
+
+    def _linhas_visiveis_log(self):
+        altura = self.textbox_log.winfo_height()
+        if altura <= 1:  # Janela ainda não desenhada
+            return 8
+        try:
+            altura_linha = self.textbox_log.cget("font").metrics("linespace")
+        except Exception:
+            altura_linha = 16
+        return max(1, altura // max(altura_linha, 1))
+
+    def _mover_log(self, novo_topo):
+        registro = self.controller.registro_log
+        ultimo_topo = max(registro.primeira, registro.total - self._linhas_visiveis_log())
+        novo_topo = min(max(int(novo_topo), registro.primeira), ultimo_topo)
+        # Chegando ao fim, volta a acompanhar as mensagens novas.
+        self._log_topo = None if novo_topo >= ultimo_topo else novo_topo
+        self.renderizar_log()
+
+    def _rolar_log(self, acao, valor, unidade=None):
+        """Comando da barra de rolagem ("moveto", fração) ou ("scroll", n, "units"/"pages")."""
+        registro = self.controller.registro_log
+        visiveis = self._linhas_visiveis_log()
+        topo_atual = self._log_topo if self._log_topo is not None else registro.total - visiveis
+        if acao == "moveto":
+            self._mover_log(registro.primeira + float(valor) * (registro.total - registro.primeira))
+        elif acao == "scroll":
+            passo = visiveis if unidade == "pages" else 1
+            self._mover_log(topo_atual + int(valor) * passo)
+
+    def _roda_mouse_log(self, evento):
+        if getattr(evento, "num", None) == 4 or getattr(evento, "delta", 0) > 0:
+            self._rolar_log("scroll", -3)
+        else:
+            self._rolar_log("scroll", 3)
+        return "break"
 
     def flash_button(self, coluna):
         """Animação de 'flash' para um botão de captura."""
@@ -207,6 +327,14 @@ class AppUI(ctk.CTk):
         """Retorna a porta serial selecionada no ComboBox."""
         return self.combo_portas.get()
 
+    def get_modo_aquisicao(self):
+        """Retorna o modo de aquisição selecionado ("Consulta", "Contínuo" ou "Automático")."""
+        return self.combo_modo.get()
+
+    def get_perfil_selecionado(self):
+        """Retorna o nome do perfil de comunicação selecionado (ou "Automático")."""
+        return self.combo_perfil.get()
+
     @staticmethod
     def show_info(titulo, mensagem):
         messagebox.showinfo(titulo, mensagem)
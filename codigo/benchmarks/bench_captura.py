@@ -0,0 +1,257 @@
+"""
+Benchmark ponta a ponta do pipeline de captura, sem hardware (balança simulada via sim://).
+
+Mede, com o AppPrincipal rodando sem janela (InterfaceNula):
+- latência da captura: da tecla (capturar_coluna) até a medida gravada em disco, em p50/p95/p99;
+- leituras por segundo entregues pelo ServicoBalanca em cada cenário de modo/velocidade;
+- tempo de gravação de uma medida em função do tamanho do ensaio (10 a 100 mil linhas),
+  nos modos diário e atômico do ServicoCsv, o tempo de reabrir o ensaio a partir do arquivo
+  de sessão binário e o tempo de exportação do CSV final.
+
+Os resultados vão para um JSON, para comparar versões.
+
+Uso: python benchmarks/bench_captura.py [--capturas 200] [--max-linhas 100000] [--saida resultado.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+PASTA_CODIGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, PASTA_CODIGO)
+
+from app_principal import AppPrincipal
+from servico_csv import ServicoCsv, MODO_DIARIO, MODO_ATOMICO
+from sessao_colunar import SessaoColunar
+
+# (nome, modo na interface, perfil, opções da balança simulada)
+CENARIOS = [
+    ("consulta 1200 7O1", "Consulta", "SBI 1200 7O1", "baud=1200"),
+    ("consulta 9600 7O1", "Consulta", "SBI 9600 7O1", "baud=9600"),
+    ("continuo 1200 7O1", "Contínuo", "SBI 1200 7O1", "baud=1200&auto=1"),
+    ("continuo 9600 7O1", "Contínuo", "SBI 9600 7O1", "baud=9600&auto=1"),
+]
+TAMANHOS_ENSAIO = [10, 100, 1000, 10000, 100000]
+
+
+class InterfaceNula:
+    """
+    Substitui o AppUI: executa na hora os agendamentos imediatos (after 0), ignora os periódicos
+    (atualizações do DespachanteUI) e registra o fim de cada captura.
+    """
+
+    def __init__(self, controller):
+        self.porta = "Nenhuma"
+        self.modo = "Consulta"
+        self.perfil = "SBI 1200 7O1"
+        self.nome_ensaio = "bench"
+        self.fim_captura = threading.Event()
+        self.avisos = 0
+
+    def after(self, ms, funcao, *args):
+        if ms == 0:
+            funcao(*args)
+
+    def winfo_exists(self):
+        return True
+
+    def get_porta_selecionada(self):
+        return self.porta
+
+    def get_modo_aquisicao(self):
+        return self.modo
+
+    def get_perfil_selecionado(self):
+        return self.perfil
+
+    def get_nome_ensaio(self):
+        return self.nome_ensaio
+
+    def set_estado_capturando(self, capturando):
+        if not capturando:
+            self.fim_captura.set()
+
+    def show_warning(self, *_):
+        self.avisos += 1
+
+    def show_confirmation(self, *_):
+        return True
+
+    def __getattr__(self, _nome):
+        # Demais chamadas de interface (log, atualizar_peso_display, show_info, ...) são ignoradas.
+        return lambda *args, **kwargs: None
+
+
+def percentil(valores, p):
+    """Percentil por posição mais próxima (valores já ordenados)."""
+    if not valores:
+        return None
+    indice = min(len(valores) - 1, max(0, round(p / 100 * len(valores) + 0.5) - 1))
+    return valores[indice]
+
+
+def resumo_ms(tempos):
+    tempos = sorted(tempos)
+    return {
+        "amostras": len(tempos),
+        "p50_ms": percentil(tempos, 50) * 1000 if tempos else None,
+        "p95_ms": percentil(tempos, 95) * 1000 if tempos else None,
+        "p99_ms": percentil(tempos, 99) * 1000 if tempos else None,
+        "max_ms": tempos[-1] * 1000 if tempos else None,
+    }
+
+
+def medir_cenario(indice, nome, modo, perfil, opcoes, capturas):
+    """Conecta o AppPrincipal à balança simulada e mede as capturas na coluna Genérico."""
+    app = AppPrincipal(classe_ui=InterfaceNula)
+    ui = app.ui
+    ui.porta = f"sim://bench{indice}?peso=12.345678&ruido=0.000002&{opcoes}"
+    ui.modo = modo
+    ui.perfil = perfil
+    ui.nome_ensaio = f"bench_{indice}"
+
+    app.alternar_conexao()
+    # O handshake roda em segundo plano: espera a conexão ser aplicada
+    limite = time.monotonic() + 10.0
+    while not app.conectado and time.monotonic() < limite:
+        time.sleep(0.01)
+    if not app.conectado:
+        return {"cenario": nome, "erro": "não conectou"}
+    time.sleep(1.0)  # Deixa o monitoramento entrar em regime
+
+    tempos = []
+    falhas = 0
+    for _ in range(capturas):
+        ui.fim_captura.clear()
+        avisos = ui.avisos
+        inicio = time.perf_counter()
+        app.capturar_coluna('G')
+        # A medida é gravada pelo GravadorCsv em segundo plano: espera a confirmação da gravação
+        if not ui.fim_captura.wait(5.0) or not app.gravador_csv.aguardar(5.0) or ui.avisos != avisos:
+            falhas += 1
+        else:
+            tempos.append(time.perf_counter() - inicio)
+        time.sleep(random.uniform(0.02, 0.1))  # Intervalo entre teclas
+
+    taxa = app.servico_balanca.get_taxa_leituras()
+    app.alternar_conexao()
+    app.gravador_csv.parar()
+    resultado = {"cenario": nome, "leituras_por_segundo": taxa, "falhas": falhas}
+    resultado.update(resumo_ms(tempos))
+    return resultado
+
+
+def criar_ensaio(nome, linhas):
+    """Cria um CSV de ensaio com `linhas` medidas na coluna Genérico."""
+    arquivo = ServicoCsv(lambda _: None)._get_caminho_arquivo(nome)
+    sessao = SessaoColunar()
+    instante = datetime(2025, 1, 1, 12).timestamp()
+    for i in range(linhas):
+        sessao.adicionar('Generico', round(12.345678 + (i % 100) * 1e-6, 6), instante)
+    ServicoCsv._escrever_csv(arquivo, sessao, [], [], "01/01/2025", "12:00:00", False)
+    return arquivo
+
+
+def medir_gravacao(linhas, repeticoes=10):
+    """Tempo de gravação de uma medida em um ensaio que já tem `linhas` medidas, nos dois modos."""
+    resultado = {"linhas": linhas}
+
+    nome = f"gravacao_diario_{linhas}"
+    criar_ensaio(nome, linhas)
+    servico = ServicoCsv(lambda _: None, modo=MODO_DIARIO)
+    inicio = time.perf_counter()
+    servico.salvar_medida(nome, 'Generico', 12.3)
+    resultado["diario_primeira_ms"] = (time.perf_counter() - inicio) * 1000  # inclui abrir o ensaio
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        servico.salvar_medida(nome, 'Generico', 12.3)
+        tempos.append(time.perf_counter() - inicio)
+    resultado["diario_p50_ms"] = percentil(sorted(tempos), 50) * 1000
+    # Reabertura do ensaio não fechado (ex.: após uma queda), a partir do arquivo de sessão binário
+    servico._ensaios[servico._get_caminho_arquivo(nome)].arquivo_sessao.fechar()
+    servico = ServicoCsv(lambda _: None, modo=MODO_DIARIO)
+    inicio = time.perf_counter()
+    servico.get_estatisticas(nome)
+    resultado["sessao_reabertura_ms"] = (time.perf_counter() - inicio) * 1000
+    inicio = time.perf_counter()
+    servico.fechar_ensaio(nome)
+    resultado["exportacao_ms"] = (time.perf_counter() - inicio) * 1000
+
+    nome = f"gravacao_atomico_{linhas}"
+    criar_ensaio(nome, linhas)
+    servico = ServicoCsv(lambda _: None, modo=MODO_ATOMICO)
+    tempos = []
+    for _ in range(max(1, repeticoes // 2)):
+        inicio = time.perf_counter()
+        servico.salvar_medida(nome, 'Generico', 12.3)
+        tempos.append(time.perf_counter() - inicio)
+    resultado["atomico_p50_ms"] = percentil(sorted(tempos), 50) * 1000
+    resultado["tamanho_arquivo_kb"] = os.path.getsize(servico._get_caminho_arquivo(nome)) / 1024
+    return resultado
+
+
+def versao_codigo():
+    try:
+        return subprocess.run(["git", "-C", PASTA_CODIGO, "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capturas", type=int, default=200, help="Capturas por cenário (padrão: 200)")
+    parser.add_argument("--max-linhas", type=int, default=100000, help="Maior ensaio medido (padrão: 100000)")
+    parser.add_argument("--saida", default="bench_captura.json", help="Arquivo JSON de resultados")
+    args = parser.parse_args()
+    saida = os.path.abspath(args.saida)
+
+    # Os ensaios são gravados em uma pasta temporária, não em "dados coletados" do usuário.
+    pasta_original = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix="bench_captura_"))
+    try:
+        cenarios = []
+        for indice, (nome, modo, perfil, opcoes) in enumerate(CENARIOS):
+            resultado = medir_cenario(indice, nome, modo, perfil, opcoes, args.capturas)
+            cenarios.append(resultado)
+            if "erro" in resultado:
+                print(f"{nome:<20} {resultado['erro']}")
+            else:
+                print(f"{nome:<20} {resultado['leituras_por_segundo']:6.1f} leituras/s   "
+                      f"p50 {resultado['p50_ms']:7.2f} ms   p95 {resultado['p95_ms']:7.2f} ms   "
+                      f"p99 {resultado['p99_ms']:7.2f} ms   falhas {resultado['falhas']}")
+
+        gravacao = []
+        for linhas in (n for n in TAMANHOS_ENSAIO if n <= args.max_linhas):
+            resultado = medir_gravacao(linhas)
+            gravacao.append(resultado)
+            print(f"{linhas:>7} linhas   diário {resultado['diario_p50_ms']:8.2f} ms "
+                  f"(1ª {resultado['diario_primeira_ms']:8.2f} ms)   atômico {resultado['atomico_p50_ms']:8.2f} ms   "
+                  f"reabertura {resultado['sessao_reabertura_ms']:8.2f} ms   "
+                  f"exportação {resultado['exportacao_ms']:8.2f} ms")
+    finally:
+        os.chdir(pasta_original)
+
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump({
+            "versao": versao_codigo(),
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "capturas_por_cenario": args.capturas,
+            "cenarios": cenarios,
+            "gravacao": gravacao,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"Resultados gravados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Micro-benchmark: interpretação de quadros SBI.
+Compara o caminho antigo (decode ASCII + re.search não compilado, como em
+_thread_monitoramento) com protocolo_sbi.interpretar_quadro sobre um corpus de quadros.
+
+Uso: python benchmarks/bench_protocolo_sbi.py [repeticoes]
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from protocolo_sbi import interpretar_quadro
+
+# Quadros no layout do manual (16 e 22 caracteres), incluindo instáveis, erros e status.
+CORPUS = [
+    b'+   12.345678 g  \r\n',
+    b'+    0.000012 g  \r\n',
+    b'-    0.000340 g  \r\n',
+    b'+   12.34?    \r\n',
+    b'+  105.123456 mg \r\n',
+    b'N     +   12.345678 g  \r\n',
+    b'N1    -    1.234500 g  \r\n',
+    b'Stat     Err 30  \r\n',
+    b'   Err 30     \r\n',
+    b'Stat        --      \r\n',
+    b'      H         \r\n',
+    b'\r\n',
+]
+
+
+def interpretar_legado(quadro):
+    """Reprodução do caminho antigo, para comparação."""
+    linha = quadro.decode('ascii', errors='ignore')
+    if re.search(r'(?i)(err(or)?\s*[:\-\s]*\s*30)', linha):
+        return None
+    match = re.search(r"([-+ ]\s*(\d+\.\d+))", linha)
+    if match:
+        return float(match.group(2)), '?' not in linha
+    return None
+
+
+def medir(funcao, repeticoes):
+    def rodada():
+        for quadro in CORPUS:
+            funcao(quadro)
+    total = min(timeit.repeat(rodada, number=repeticoes, repeat=5))
+    return total / (repeticoes * len(CORPUS)) * 1e9  # ns por quadro
+
+
+if __name__ == "__main__":
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    ns_legado = medir(interpretar_legado, repeticoes)
+    ns_novo = medir(interpretar_quadro, repeticoes)
+    print(f"Corpus: {len(CORPUS)} quadros x {repeticoes} repetições")
+    print(f"regex legado:         {ns_legado:8.1f} ns/quadro")
+    print(f"interpretar_quadro:   {ns_novo:8.1f} ns/quadro")
+    print(f"ganho:                {ns_legado / ns_novo:8.2f}x")
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import deque
+
+
+class BufferLeituras:
+    """
+    Histórico recente das leituras publicadas pelo leitor da balança, com o instante de chegada.
+    As capturas são atendidas a partir daqui, sem enviar novos pedidos à balança.
+    """
+
+    def __init__(self, capacidade=256):
+        self._leituras = deque(maxlen=capacidade)  # (instante, peso, estavel)
+        self._condicao = threading.Condition()
+
+    def registrar(self, peso, estavel, instante=None):
+        """Registra uma leitura publicada (peso None para um quadro sem peso)."""
+        if instante is None:
+            instante = time.monotonic()
+        with self._condicao:
+            self._leituras.append((instante, peso, estavel and peso is not None))
+            self._condicao.notify_all()
+
+    def limpar(self):
+        with self._condicao:
+            self._leituras.clear()
+
+    def buscar_estavel(self, instante_tecla, idade_max):
+        """
+        Procura, sem esperar, a leitura que atende uma captura feita em `instante_tecla`:
+        1. a primeira leitura estável que chegou no instante da tecla ou depois;
+        2. senão, a última leitura antes da tecla, se for estável e tiver no máximo `idade_max` s.
+        Retorna (instante, peso) ou None.
+        """
+        with self._condicao:
+            return self._buscar(instante_tecla, idade_max)
+
+    def aguardar_estavel(self, instante_tecla, idade_max, timeout):
+        """Como buscar_estavel, mas aguarda até `timeout` s pela chegada de uma leitura estável."""
+        fim = time.monotonic() + timeout
+        with self._condicao:
+            while True:
+                encontrada = self._buscar(instante_tecla, idade_max)
+                if encontrada is not None:
+                    return encontrada
+                restante = fim - time.monotonic()
+                if restante <= 0:
+                    return None
+                self._condicao.wait(restante)
+
+    def _buscar(self, instante_tecla, idade_max):
+        anterior = None
+        for instante, peso, estavel in self._leituras:
+            if instante < instante_tecla:
+                anterior = (instante, peso, estavel)
+            elif estavel:
+                return instante, peso
+        if anterior is not None and anterior[2] and instante_tecla - anterior[0] <= idade_max:
+            return anterior[0], anterior[1]
+        return None
@@ -0,0 +1,596 @@
+"""
+Aquisição sem interface gráfica, para PCs de laboratório e máquinas Linux sem monitor. Uso (a partir da pasta codigo):
+
+    python daemon_aquisicao.py --porta /dev/ttyUSB0 --ensaio ensaio_01 [--intervalo 5 --tipo A] [--fifo /tmp/balanca]
+    python daemon_aquisicao.py --config daemon.json [--porta COM3]
+    python daemon_aquisicao.py --ensaio ensaio_02     (sem --porta: usa o adaptador da última conexão, mesmo com outro nome)
+    python daemon_aquisicao.py --porta COM5 --protocolo mt-sics --modo automatico
+    python daemon_aquisicao.py --balanca b1=/dev/ttyUSB0 --balanca b2=/dev/ttyUSB1,ensaio=lote_b2,protocolo=mt-sics
+
+O arquivo de configuração é um JSON com as mesmas opções da linha de comando (ex.: {"porta": "COM3",
+"intervalo": 10, "tipo": "B"}); as opções passadas na linha de comando têm prioridade.
+Com --balanca (repetível, no lugar de --porta), várias balanças são lidas ao mesmo tempo (ver gerenciador_balancas):
+cada uma tem um id e, opcionalmente, ensaio, protocolo, modo e perfil próprios (os demais vêm das opções gerais);
+sem porta ("--balanca b1"), usa o adaptador em que essa balança estava da última vez.
+Comandos, um por linha, pela entrada padrão e/ou pelo FIFO:
+    a / b / g   captura uma medida Padrão (A), Cliente (B) ou Genérica
+    t           tara a balança
+    q           encerra
+Com --balanca, "a" e "t" valem para todas as balanças; seguidos de um id (ex.: "a b1", "t b2"), só para ela.
+Cada evento é escrito como uma linha JSON na saída padrão (ou em --log-arquivo).
+Com --api-porta, os eventos e as leituras também ficam disponíveis pela API HTTP local (ver servidor_api).
+SIGINT/SIGTERM encerram gravando as medidas pendentes e fechando o ensaio (CSV com estatísticas).
+Se a porta cair (ex.: adaptador USB desconectado), a balança é reconectada automaticamente (ver supervisor_conexao).
+Código de saída: 0 (encerrado normalmente), 1 (falha na conexão ou conexão perdida sem reconexão), 2 (opções inválidas).
+"""
+import argparse
+import json
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+from servico_balanca import ServicoBalanca, MODO_CONSULTA, MODO_CONTINUO, MODO_AUTOMATICO
+from servico_csv import ServicoCsv, MODO_DIARIO, MODO_ATOMICO
+from gravador_csv import GravadorCsv
+from perfis_serial import PERFIS
+from drivers_balanca import DRIVERS, PROTOCOLO_PADRAO
+from estabilidade import DetectorEstabilidade, CRITERIO_BALANCA, CRITERIOS
+from supervisor_conexao import SupervisorConexao
+from inventario_portas import InventarioPortas
+from gerenciador_balancas import GerenciadorBalancas
+
+# Comando -> tipo de amostra capturado
+TIPOS_COMANDO = {'a': 'Padrao (A)', 'b': 'Cliente (B)', 'g': 'Generico'}
+COMANDO_TARA = 't'
+COMANDO_SAIR = 'q'
+
+_PARAR = object()
+
+
+class SaidaEstruturada:
+    """Escreve cada evento como uma linha JSON (instante ISO 8601 + nome do evento + campos). Segura entre threads."""
+
+    def __init__(self, fluxo):
+        self.fluxo = fluxo
+        self._lock = threading.Lock()
+
+    def evento(self, nome, **campos):
+        registro = {'instante': datetime.now().astimezone().isoformat(timespec='milliseconds'), 'evento': nome}
+        registro.update(campos)
+        linha = json.dumps(registro, ensure_ascii=False)
+        with self._lock:
+            try:
+                self.fluxo.write(linha + "\n")
+                self.fluxo.flush()
+            except (OSError, ValueError):
+                pass  # Saída fechada (ex.: pipe do leitor encerrado): o daemon continua gravando o CSV
+
+
+class DaemonAquisicao:
+    """
+    Conecta uma balança (ServicoBalanca) e grava as capturas em um ensaio (ServicoCsv, via GravadorCsv),
+    sem Tk. As capturas chegam como comandos de texto (entrada padrão, FIFO ou temporizador) e são
+    executadas em ordem por uma única thread; a thread principal apenas espera o sinal de encerramento.
+    """
+
+    def __init__(self, saida, porta, ensaio, modo=MODO_CONSULTA, perfil=None, sondar=False,
+                 criterio_estabilidade=CRITERIO_BALANCA, modo_gravacao=MODO_DIARIO, timeout_captura=3.0,
+                 mostrar_leituras=False, reconectar=True, tempo_maximo_reconexao=None, protocolo=PROTOCOLO_PADRAO):
+        """
+        :param saida: SaidaEstruturada que recebe os eventos.
+        :param porta: Porta serial (ex.: "COM3", "/dev/ttyUSB0" ou "sim://..." para a balança simulada).
+                      None usa o adaptador em que a balança estava na última conexão (ver inventario_portas).
+        :param ensaio: Nome do ensaio (CSV em "dados coletados").
+        :param modo: MODO_CONSULTA, MODO_CONTINUO ou MODO_AUTOMATICO (o mais rápido que o protocolo permitir).
+        :param perfil: Nome do perfil de link (ver perfis_serial.PERFIS); None usa o padrão do protocolo.
+        :param sondar: Se True, testa todos os perfis e usa o mais rápido que responder.
+        :param criterio_estabilidade: Um de estabilidade.CRITERIOS.
+        :param modo_gravacao: MODO_DIARIO ou MODO_ATOMICO do ServicoCsv.
+        :param timeout_captura: Tempo máximo (s) de espera por uma leitura estável em cada captura.
+        :param mostrar_leituras: Se True, emite um evento "leitura" para cada quadro recebido.
+        :param reconectar: Se True, reconecta automaticamente quando a porta cai; senão, encerra com código 1.
+        :param tempo_maximo_reconexao: Desiste (e encerra) após este tempo (s) sem reconectar. None tenta sempre.
+        :param protocolo: Protocolo da balança (ver drivers_balanca.DRIVERS).
+        """
+        self._preparar(saida, ensaio, modo_gravacao, timeout_captura, mostrar_leituras, reconectar)
+        self.porta = porta
+        self.modo = modo
+        self.perfil = perfil
+        self.sondar = sondar
+        self.servico_balanca = ServicoBalanca(
+            on_peso_update=self.on_peso_update,
+            on_status_update=self.on_status_update,
+            on_log=self.on_log,
+            on_connection_loss=self.on_connection_loss,
+            detector_estabilidade=DetectorEstabilidade(criterio_estabilidade),
+            protocolo=protocolo,
+        )
+        self.supervisor = SupervisorConexao(self.servico_balanca, self.on_reconectado, self.on_desistencia_reconexao,
+                                            self.on_status_update, self.on_log, inventario=self.inventario,
+                                            tempo_maximo=tempo_maximo_reconexao)
+
+    def _preparar(self, saida, ensaio, modo_gravacao, timeout_captura, mostrar_leituras, reconectar):
+        """Estado comum a uma ou várias balanças: saída, fila de comandos, gravação e inventário de portas."""
+        self.saida = saida
+        self.ensaio = ensaio
+        self.timeout_captura = timeout_captura
+        self.mostrar_leituras = mostrar_leituras
+        self.reconectar = reconectar
+        self.codigo_saida = 0
+        self.servidor_api = None
+
+        self.parar = threading.Event()
+        self._comandos = queue.Queue()
+        self._thread_comandos = None
+        self._fifo_criado = None
+
+        self.servico_csv = ServicoCsv(self.on_log, modo=modo_gravacao)
+        self.gravador_csv = GravadorCsv(self.servico_csv, self.on_medidas_gravadas, self.on_falha_gravacao, self.on_log)
+        self.inventario = InventarioPortas(on_log=self.on_log)
+
+    def emitir(self, nome, /, **campos):
+        """Escreve o evento na saída estruturada e o repassa aos clientes da API (se ativa)."""
+        self.saida.evento(nome, **campos)
+        if self.servidor_api is not None:
+            self.servidor_api.publicar_evento(nome, **campos)
+
+    def iniciar_api(self, host, porta):
+        """Inicia a API HTTP local (leituras por SSE, captura, tara e estatísticas). Retorna (sucesso, mensagem)."""
+        from servidor_api import ServidorApi  # Só quando pedido: não pesa na inicialização
+        servidor = ServidorApi(self.capturar_remoto, self.servico_balanca.enviar_comando_tara, self.resumo_remoto,
+                               self.on_log, host=host, porta=porta)
+        sucesso, mensagem = servidor.iniciar()
+        if sucesso:
+            self.servidor_api = servidor
+        return sucesso, mensagem
+
+    # --- CICLO DE VIDA ---
+    def iniciar(self):
+        """Conecta a balança e inicia a gravação e a execução de comandos. Retorna (sucesso, mensagem)."""
+        self.gravador_csv.iniciar()
+        if self.porta is None:
+            self.inventario.obter()
+            self.porta = self.inventario.dispositivo_lembrado()
+            if self.porta is None:
+                lembrada = self.inventario.lembrada()
+                mensagem = (f"O adaptador da última conexão ({lembrada}) não está presente." if lembrada
+                            else "Nenhuma porta informada e nenhuma conexão anterior registrada.")
+                self.emitir("falha_conexao", porta=None, mensagem=mensagem)
+                self.codigo_saida = 1
+                return False, mensagem
+        sucesso, mensagem = self.servico_balanca.conectar(self.porta, self.modo, self.perfil, sondar=self.sondar)
+        if not sucesso:
+            self.emitir("falha_conexao", porta=self.porta, mensagem=mensagem)
+            self.codigo_saida = 1
+            return False, mensagem
+        if "://" not in self.porta:
+            self.inventario.obter()  # Identidade USB atual do adaptador (VID/PID, número de série)
+        self.inventario.lembrar(self.inventario.identificar(self.porta))
+        if self.reconectar:
+            self.supervisor.vigiar(self.porta, self.modo, self.servico_balanca.perfil.nome)
+        contagem_A, contagem_B, _ = self.servico_csv.get_resumo(self.ensaio)
+        self.emitir("conectado", porta=self.porta, modo=self.modo, perfil=self.servico_balanca.perfil.nome,
+                    ensaio=self.ensaio, contagem_A=contagem_A, contagem_B=contagem_B)
+        self._thread_comandos = threading.Thread(target=self._executar_comandos, daemon=True)
+        self._thread_comandos.start()
+        return True, mensagem
+
+    def aguardar(self):
+        """Bloqueia até um pedido de encerramento (comando q, sinal ou conexão perdida)."""
+        # Espera em fatias para que os sinais sejam atendidos prontamente também no Windows
+        while not self.parar.wait(0.5):
+            pass
+
+    def encerrar(self, timeout_gravacao=10.0):
+        """Executa os comandos já recebidos, desconecta a balança, grava o que estiver pendente e fecha o ensaio."""
+        self.parar.set()
+        if self.servidor_api is not None:
+            self.servidor_api.parar()
+            self.servidor_api = None
+        if self._thread_comandos is not None:
+            self._comandos.put(_PARAR)
+            self._thread_comandos.join(self.timeout_captura + 1.0)
+            self._thread_comandos = None
+        metricas_conexao = self._desconectar()
+        perdidos = self.gravador_csv.parar(timeout_gravacao)
+        for erro in self.servico_csv.fechar_todos():
+            self.emitir("erro", mensagem=erro)
+        if self._fifo_criado is not None:
+            try:
+                os.remove(self._fifo_criado)
+            except OSError:
+                pass
+        self.emitir("encerrado", pedidos_perdidos=perdidos, codigo_saida=self.codigo_saida,
+                    conexao=metricas_conexao)
+        return self.codigo_saida
+
+    def _desconectar(self):
+        """Desconecta a balança (cancelando uma reconexão em andamento) e retorna as métricas de conexão."""
+        self.supervisor.parar()
+        if self.servico_balanca.is_connected():
+            self.servico_balanca.desconectar()
+        return self.supervisor.get_metricas()
+
+    def solicitar_encerramento(self, motivo):
+        if not self.parar.is_set():
+            self.emitir("encerrando", motivo=motivo)
+        self.parar.set()
+
+    # --- FONTES DE COMANDOS ---
+    def enviar_comando(self, comando):
+        """Enfileira um comando de texto (ex.: "a", "t", "a b1"). O instante da captura é o da chegada do comando."""
+        letra, _, id_balanca = comando.strip().partition(" ")
+        comando = f"{letra.lower()} {id_balanca.strip()}".strip()  # O id da balança mantém maiúsculas e minúsculas
+        if comando:
+            self._comandos.put((comando, time.monotonic()))
+
+    def ler_comandos(self, fluxo, origem):
+        """Lê comandos, um por linha, de `fluxo` até o fim (rodar em uma thread)."""
+        for linha in fluxo:
+            if self.parar.is_set():
+                break
+            self.enviar_comando(linha)
+        self.emitir("fim_comandos", origem=origem)
+
+    def iniciar_stdin(self):
+        threading.Thread(target=self.ler_comandos, args=(sys.stdin, "stdin"), daemon=True).start()
+
+    def iniciar_fifo(self, caminho):
+        """Lê comandos de um FIFO (criado se não existir). Ex.: echo a > /tmp/balanca"""
+        if not os.path.exists(caminho):
+            os.mkfifo(caminho)
+            self._fifo_criado = caminho
+        # O_RDWR: a abertura não bloqueia esperando um escritor, e o fim de cada escritor não gera EOF
+        fluxo = os.fdopen(os.open(caminho, os.O_RDWR), 'r', encoding='utf-8', errors='replace')
+        threading.Thread(target=self.ler_comandos, args=(fluxo, f"fifo {caminho}"), daemon=True).start()
+
+    def iniciar_temporizador(self, intervalo, comando):
+        """Envia `comando` a cada `intervalo` segundos (sem acumular atraso)."""
+        def temporizar():
+            proximo = time.monotonic() + intervalo
+            while not self.parar.wait(max(0.0, proximo - time.monotonic())):
+                self.enviar_comando(comando)
+                proximo += intervalo
+        threading.Thread(target=temporizar, daemon=True).start()
+
+    # --- EXECUÇÃO DOS COMANDOS ---
+    def _executar_comandos(self):
+        while True:
+            item = self._comandos.get()
+            if item is _PARAR:
+                break
+            comando, instante = item
+            try:
+                self.executar(comando, instante)
+            except Exception as e:
+                self.emitir("erro", comando=comando, mensagem=f"Erro inesperado: {e}")
+
+    def executar(self, comando, instante):
+        if comando in TIPOS_COMANDO:
+            self.capturar(TIPOS_COMANDO[comando], instante)
+        elif comando == COMANDO_TARA:
+            if not self.servico_balanca.enviar_comando_tara():
+                self.emitir("erro", comando=comando, mensagem="Não foi possível enviar o comando de tara.")
+        elif comando == COMANDO_SAIR:
+            self.solicitar_encerramento("comando")
+        else:
+            self.emitir("erro", comando=comando, mensagem="Comando não reconhecido.")
+
+    def capturar(self, tipo, instante):
+        """Obtém uma leitura estável a partir de `instante` (monotonic) e a enfileira para gravação. Retorna (peso, erro)."""
+        peso, estavel = self.servico_balanca.get_leitura_instantanea(instante, self.timeout_captura)
+        if not estavel or peso is None:
+            erro = "A leitura da balança não está estável."
+            self.emitir("captura_falhou", tipo=tipo, mensagem=erro)
+            return None, erro
+        if not self.gravador_csv.enfileirar(self.ensaio, [(tipo, peso, time.time())]):
+            erro = "Fila de gravação cheia; a medida não foi salva."
+            self.emitir("captura_falhou", tipo=tipo, peso=peso, mensagem=erro)
+            return None, erro
+        self.emitir("captura", tipo=tipo, peso=peso, atraso_ms=round((time.monotonic() - instante) * 1000, 1))
+        return peso, None
+
+    # --- API HTTP (threads do servidor) ---
+    def capturar_remoto(self, coluna):
+        return self.capturar(TIPOS_COMANDO[coluna.lower()], time.monotonic())
+
+    def resumo_remoto(self):
+        from servidor_api import resumo_ensaio
+        return resumo_ensaio(self.ensaio, self.servico_csv.get_resumo(self.ensaio))
+
+    # --- CALLBACKS DOS SERVIÇOS ---
+    def on_log(self, mensagem):
+        self.emitir("log", mensagem=mensagem.strip())
+
+    def on_status_update(self, mensagem, _cor):
+        self.emitir("status", mensagem=mensagem)
+
+    def on_peso_update(self, peso, estavel):
+        if self.servidor_api is not None:
+            self.servidor_api.publicar_leitura(peso, estavel)
+        if self.mostrar_leituras:
+            self.emitir("leitura", peso=peso, estavel=estavel)
+
+    def on_connection_loss(self):
+        if self.reconectar and not self.parar.is_set() and self.supervisor.conexao_perdida():
+            self.emitir("conexao_perdida", porta=self.porta, reconectando=True)
+            return
+        self.codigo_saida = 1
+        self.solicitar_encerramento("conexao_perdida")
+
+    def on_reconectado(self, porta, segundos_fora):
+        if porta != self.porta:  # Voltou com outro nome: atualiza a memória do adaptador
+            self.porta = porta
+            self.inventario.lembrar(self.inventario.identificar(porta))
+        self.emitir("reconectado", porta=porta, segundos_fora=round(segundos_fora, 3),
+                    quedas=self.supervisor.quedas, tempo_fora_total=round(self.supervisor.tempo_fora_total, 3))
+
+    def on_desistencia_reconexao(self, mensagem):
+        self.emitir("erro", mensagem=mensagem)
+        self.codigo_saida = 1
+        self.solicitar_encerramento("reconexao_esgotada")
+
+    def on_medidas_gravadas(self, nome_ensaio, contagem_A, contagem_B, quantidade):
+        self.emitir("gravado", ensaio=nome_ensaio, quantidade=quantidade,
+                    contagem_A=contagem_A, contagem_B=contagem_B)
+
+    def on_falha_gravacao(self, nome_ensaio, medidas, mensagem):
+        self.emitir("falha_gravacao", ensaio=nome_ensaio, pesos=[medida[1] for medida in medidas],
+                    mensagem=mensagem)
+
+
+class DaemonVariasBalancas(DaemonAquisicao):
+    """
+    Como o DaemonAquisicao, mas para várias balanças lidas ao mesmo tempo por um GerenciadorBalancas
+    (uma única thread de E/S). Cada balança grava no próprio ensaio ou no compartilhado, pelo mesmo GravadorCsv,
+    e é reconectada sozinha se a porta cair. As capturas de um comando sem id são feitas em paralelo,
+    todas a partir do instante de chegada do comando.
+    """
+
+    def __init__(self, saida, balancas, ensaio, criterio_estabilidade=CRITERIO_BALANCA, modo_gravacao=MODO_DIARIO,
+                 timeout_captura=3.0, mostrar_leituras=False, reconectar=True, tempo_maximo_reconexao=None):
+        """
+        :param balancas: Lista de dicionários (ver ler_balanca) com id, porta, ensaio, protocolo, modo, perfil e sondar.
+        :param ensaio: Ensaio das balanças sem ensaio próprio.
+        Os demais parâmetros são os do DaemonAquisicao.
+        """
+        self._preparar(saida, ensaio, modo_gravacao, timeout_captura, mostrar_leituras, reconectar)
+        self.balancas = balancas
+        self.criterio_estabilidade = criterio_estabilidade
+        self.gerenciador = GerenciadorBalancas(
+            self.gravador_csv, self.on_peso_update, self.on_status_update, self.on_log, self.on_connection_loss,
+            inventario=self.inventario, reconectar=reconectar, tempo_maximo_reconexao=tempo_maximo_reconexao,
+            on_reconectado=self.on_reconectado,
+        )
+        self.gerenciador.ensaio_compartilhado = ensaio
+
+    # --- CICLO DE VIDA ---
+    def iniciar(self):
+        """Conecta todas as balanças e inicia a gravação e a execução de comandos. Retorna (sucesso, mensagem)."""
+        self.gravador_csv.iniciar()
+        mensagem = ""
+        for balanca in self.balancas:
+            sucesso, mensagem = self.gerenciador.adicionar(
+                balanca['id'], balanca['porta'], balanca['modo'], balanca['perfil'], balanca['ensaio'],
+                DetectorEstabilidade(self.criterio_estabilidade), balanca['protocolo'], sondar=balanca['sondar'],
+            )
+            if not sucesso:
+                self.emitir("falha_conexao", balanca=balanca['id'], porta=balanca['porta'], mensagem=mensagem)
+                self.codigo_saida = 1
+                return False, mensagem
+            ensaio = balanca['ensaio'] if balanca['ensaio'] is not None else self.ensaio
+            contagem_A, contagem_B, _ = self.servico_csv.get_resumo(ensaio)
+            self.emitir("conectado", balanca=balanca['id'],
+                        porta=balanca['porta'] or self.inventario.dispositivo_lembrado(balanca['id']),
+                        modo=balanca['modo'], perfil=self.gerenciador.get_servico(balanca['id']).perfil.nome,
+                        ensaio=ensaio, contagem_A=contagem_A, contagem_B=contagem_B)
+        self._thread_comandos = threading.Thread(target=self._executar_comandos, daemon=True)
+        self._thread_comandos.start()
+        return True, mensagem
+
+    def _desconectar(self):
+        metricas = self.gerenciador.get_metricas_conexao()
+        self.gerenciador.encerrar()
+        return metricas
+
+    # --- EXECUÇÃO DOS COMANDOS ---
+    def executar(self, comando, instante):
+        letra, _, id_balanca = comando.partition(" ")
+        ids = [id_balanca] if id_balanca else self.gerenciador.listar()
+        if letra in TIPOS_COMANDO:
+            tipo = TIPOS_COMANDO[letra]
+            threads = [threading.Thread(target=self.capturar_balanca, args=(id_, tipo, instante)) for id_ in ids[1:]]
+            for thread in threads:
+                thread.start()
+            if ids:
+                self.capturar_balanca(ids[0], tipo, instante)
+            for thread in threads:
+                thread.join()
+        elif letra == COMANDO_TARA:
+            for id_ in ids:
+                if not self.gerenciador.tarar(id_):
+                    self.emitir("erro", comando=comando, balanca=id_,
+                                mensagem="Não foi possível enviar o comando de tara.")
+        elif comando == COMANDO_SAIR:
+            self.solicitar_encerramento("comando")
+        else:
+            self.emitir("erro", comando=comando, mensagem="Comando não reconhecido.")
+
+    def capturar_balanca(self, id_balanca, tipo, instante):
+        """Captura uma medida estável de uma balança e a enfileira para gravação. Retorna (peso, erro)."""
+        peso, erro = self.gerenciador.capturar(id_balanca, tipo, instante, self.timeout_captura)
+        if erro:
+            self.emitir("captura_falhou", balanca=id_balanca, tipo=tipo, mensagem=erro)
+            return None, erro
+        self.emitir("captura", balanca=id_balanca, tipo=tipo, peso=peso,
+                    atraso_ms=round((time.monotonic() - instante) * 1000, 1))
+        return peso, None
+
+    # --- CALLBACKS DO GERENCIADOR ---
+    def on_status_update(self, id_balanca, mensagem, _cor):
+        self.emitir("status", balanca=id_balanca, mensagem=mensagem)
+
+    def on_peso_update(self, id_balanca, peso, estavel):
+        if self.mostrar_leituras:
+            self.emitir("leitura", balanca=id_balanca, peso=peso, estavel=estavel)
+
+    def on_connection_loss(self, id_balanca, reconectando):
+        if self.parar.is_set():
+            return  # Queda durante o encerramento
+        self.emitir("conexao_perdida", balanca=id_balanca, reconectando=reconectando)
+        if not reconectando:
+            self.codigo_saida = 1
+            self.solicitar_encerramento("conexao_perdida")
+
+    def on_reconectado(self, id_balanca, porta, segundos_fora):
+        metricas = self.gerenciador.get_metricas_conexao().get(id_balanca, {})
+        self.emitir("reconectado", balanca=id_balanca, porta=porta, segundos_fora=round(segundos_fora, 3),
+                    quedas=metricas.get('quedas'))
+
+
+def ler_balanca(texto, opcoes):
+    """
+    Interpreta um --balanca "id=porta[,ensaio=...][,protocolo=...][,modo=...][,perfil=...]".
+    O que não for informado vem das opções gerais (--protocolo, --modo, --perfil, --sondar).
+    Lança ValueError se o texto for inválido.
+    """
+    primeiro, *extras = texto.split(",")
+    id_balanca, _, porta = primeiro.partition("=")
+    id_balanca = id_balanca.strip()
+    if not id_balanca or " " in id_balanca:
+        raise ValueError(f"id de balança inválido em '{texto}'")
+    balanca = {'id': id_balanca, 'porta': porta.strip() or None, 'ensaio': None, 'protocolo': opcoes.protocolo,
+               'modo': opcoes.modo, 'perfil': opcoes.perfil, 'sondar': opcoes.sondar}
+    validos = {'protocolo': DRIVERS, 'modo': (MODO_CONSULTA, MODO_CONTINUO, MODO_AUTOMATICO), 'perfil': PERFIS}
+    for extra in extras:
+        chave, separador, valor = (parte.strip() for parte in extra.partition("="))
+        if not separador or chave not in ('ensaio', *validos):
+            raise ValueError(f"opção '{extra.strip()}' desconhecida em '{texto}' (use ensaio, protocolo, modo ou perfil)")
+        if chave in validos and valor not in validos[chave]:
+            raise ValueError(f"{chave} '{valor}' inválido em '{texto}'")
+        balanca[chave] = valor
+    return balanca
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="python daemon_aquisicao.py",
+                                     description="Aquisição de pesos sem interface gráfica.")
+    parser.add_argument("--config", help="Arquivo JSON com as opções (a linha de comando tem prioridade)")
+    parser.add_argument("--porta", help="Porta serial (ex.: COM3, /dev/ttyUSB0, sim://balanca?peso=1.0); "
+                                        "sem ela, usa o adaptador da última conexão")
+    parser.add_argument("--balanca", action="append", metavar="ID=PORTA[,ensaio=...]",
+                        help="Balança de uma aquisição com várias balanças (repetível, no lugar de --porta); "
+                             "aceita também protocolo=, modo= e perfil=")
+    parser.add_argument("--ensaio", default="", help="Nome do ensaio (padrão: ensaio_<data>)")
+    parser.add_argument("--protocolo", choices=list(DRIVERS), default=PROTOCOLO_PADRAO,
+                        help="Protocolo da balança (padrão: sbi)")
+    parser.add_argument("--modo", choices=(MODO_CONSULTA, MODO_CONTINUO, MODO_AUTOMATICO), default=MODO_CONSULTA,
+                        help="consulta (um pedido a cada leitura), continuo (a balança envia sozinha) ou "
+                             "automatico (o mais rápido que o protocolo permitir)")
+    parser.add_argument("--perfil", choices=list(PERFIS), help="Perfil de link serial (padrão: o do protocolo)")
+    parser.add_argument("--sondar", action="store_true", help="Testa os perfis e usa o mais rápido que responder")
+    parser.add_argument("--estabilidade", choices=CRITERIOS, default=CRITERIO_BALANCA, help="Critério de estabilidade")
+    parser.add_argument("--gravacao", choices=(MODO_DIARIO, MODO_ATOMICO), default=MODO_DIARIO,
+                        help="Modo de gravação do CSV")
+    parser.add_argument("--timeout-captura", type=float, default=3.0,
+                        help="Espera máxima (s) por uma leitura estável em cada captura")
+    parser.add_argument("--intervalo", type=float, help="Captura automática a cada N segundos")
+    parser.add_argument("--tipo", choices=sorted(TIPOS_COMANDO), default="g",
+                        help="Coluna das capturas automáticas: a, b ou g (padrão: g)")
+    parser.add_argument("--fifo", help="Caminho de um FIFO de onde ler comandos (criado se não existir)")
+    parser.add_argument("--sem-stdin", action="store_true", help="Não lê comandos da entrada padrão")
+    parser.add_argument("--mostrar-leituras", action="store_true", help="Emite um evento para cada leitura recebida")
+    parser.add_argument("--sem-reconexao", action="store_true",
+                        help="Encerra (código 1) se a porta cair, em vez de reconectar automaticamente")
+    parser.add_argument("--tempo-maximo-reconexao", type=float,
+                        help="Desiste da reconexão automática após N segundos (padrão: tenta sempre)")
+    parser.add_argument("--api-porta", type=int, help="Inicia a API HTTP local nesta porta (ex.: 8765)")
+    parser.add_argument("--api-host", default="127.0.0.1",
+                        help="Endereço da API (padrão: 127.0.0.1; 0.0.0.0 expõe na rede, sem autenticação)")
+    parser.add_argument("--log-arquivo", help="Anexa os eventos JSON a este arquivo em vez da saída padrão")
+    return parser
+
+
+def ler_opcoes(argv=None):
+    """Lê as opções da linha de comando, usando o arquivo --config (se houver) como valores padrão."""
+    parser = criar_parser()
+    previas, _ = parser.parse_known_args(argv)
+    if previas.config:
+        try:
+            with open(previas.config, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"não foi possível ler {previas.config}: {e}")
+        if not isinstance(config, dict):
+            parser.error(f"{previas.config} deve conter um objeto JSON")
+        destinos = {acao.dest for acao in parser._actions}
+        desconhecidas = [chave for chave in config if chave.replace("-", "_") not in destinos]
+        if desconhecidas:
+            parser.error(f"opções desconhecidas em {previas.config}: {', '.join(desconhecidas)}")
+        parser.set_defaults(**{chave.replace("-", "_"): valor for chave, valor in config.items()})
+    opcoes = parser.parse_args(argv)
+    if opcoes.intervalo is not None and opcoes.intervalo <= 0:
+        parser.error("--intervalo deve ser maior que zero")
+    if opcoes.balanca:
+        if opcoes.porta is not None:
+            parser.error("use --porta (uma balança) ou --balanca (várias), não os dois")
+        if opcoes.api_porta is not None:
+            parser.error("--api-porta atende uma única balança; não pode ser usada com --balanca")
+        try:
+            opcoes.balanca = [ler_balanca(texto, opcoes) for texto in opcoes.balanca]
+        except ValueError as e:
+            parser.error(f"--balanca: {e}")
+        ids = [balanca['id'] for balanca in opcoes.balanca]
+        if len(set(ids)) != len(ids):
+            parser.error("--balanca: ids repetidos")
+    return opcoes
+
+
+def main(argv=None):
+    opcoes = ler_opcoes(argv)
+    fluxo = open(opcoes.log_arquivo, 'a', encoding='utf-8') if opcoes.log_arquivo else sys.stdout
+    saida = SaidaEstruturada(fluxo)
+    if opcoes.balanca:
+        daemon = DaemonVariasBalancas(
+            saida, opcoes.balanca, opcoes.ensaio, criterio_estabilidade=opcoes.estabilidade,
+            modo_gravacao=opcoes.gravacao, timeout_captura=opcoes.timeout_captura,
+            mostrar_leituras=opcoes.mostrar_leituras, reconectar=not opcoes.sem_reconexao,
+            tempo_maximo_reconexao=opcoes.tempo_maximo_reconexao,
+        )
+    else:
+        daemon = DaemonAquisicao(
+            saida, opcoes.porta, opcoes.ensaio, modo=opcoes.modo, perfil=opcoes.perfil, sondar=opcoes.sondar,
+            criterio_estabilidade=opcoes.estabilidade, modo_gravacao=opcoes.gravacao,
+            timeout_captura=opcoes.timeout_captura, mostrar_leituras=opcoes.mostrar_leituras,
+            reconectar=not opcoes.sem_reconexao, tempo_maximo_reconexao=opcoes.tempo_maximo_reconexao,
+            protocolo=opcoes.protocolo,
+        )
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sinal, lambda numero, _quadro: daemon.solicitar_encerramento(signal.Signals(numero).name))
+
+    try:
+        sucesso, _ = daemon.iniciar()
+        if sucesso and opcoes.api_porta is not None:
+            sucesso, _ = daemon.iniciar_api(opcoes.api_host, opcoes.api_porta)
+            if not sucesso:
+                daemon.codigo_saida = 1
+        if sucesso:
+            if not opcoes.sem_stdin:
+                daemon.iniciar_stdin()
+            if opcoes.fifo:
+                daemon.iniciar_fifo(opcoes.fifo)
+            if opcoes.intervalo:
+                daemon.iniciar_temporizador(opcoes.intervalo, opcoes.tipo)
+            daemon.aguardar()
+    finally:
+        codigo = daemon.encerrar()
+        if fluxo is not sys.stdout:
+            fluxo.close()
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
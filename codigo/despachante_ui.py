@@ -0,0 +1,98 @@
+import threading
+from collections import deque
+
+# Máximo de mensagens de log aguardando a próxima atualização; as excedentes são resumidas em uma linha
+_CAPACIDADE_LOG = 2000
+
+
+class DespachanteUI:
+    """
+    Agrupa as atualizações que os serviços enviam de outras threads e as aplica na thread da UI
+    em um ritmo fixo (ex.: 30 vezes por segundo), em vez de agendar um `after` por leitura.
+    - Peso e status: guarda apenas o último valor de cada balança.
+    - Log: acumula as mensagens e as entrega todas juntas.
+    Assim o custo na thread da UI não depende de quantas leituras por segundo chegam.
+    """
+
+    def __init__(self, ui, ao_aplicar_peso, ao_aplicar_status, ao_aplicar_logs, frequencia=30):
+        """
+        :param ui: Janela Tk usada para agendar as atualizações (método after).
+        :param ao_aplicar_peso: Chamado na thread da UI. Ex: fn(id_balanca, peso, estavel)
+        :param ao_aplicar_status: Chamado na thread da UI. Ex: fn(id_balanca, texto, cor)
+        :param ao_aplicar_logs: Chamado na thread da UI com a lista de mensagens acumuladas. Ex: fn(mensagens)
+        :param frequencia: Atualizações por segundo.
+        """
+        self.ui = ui
+        self.ao_aplicar_peso = ao_aplicar_peso
+        self.ao_aplicar_status = ao_aplicar_status
+        self.ao_aplicar_logs = ao_aplicar_logs
+        self.intervalo_ms = max(1, round(1000 / frequencia))
+
+        self._lock = threading.Lock()
+        self._pesos = {}    # id_balanca -> (peso, estavel)
+        self._status = {}   # id_balanca -> (texto, cor)
+        self._logs = deque(maxlen=_CAPACIDADE_LOG)
+        self._logs_descartados = 0
+        self._agendamento = None
+        self._ativo = False
+
+    def iniciar(self):
+        """Começa as atualizações periódicas (chamar na thread da UI)."""
+        self._ativo = True
+        self._agendar()
+
+    def parar(self):
+        """Interrompe as atualizações periódicas (chamar na thread da UI)."""
+        self._ativo = False
+        if self._agendamento is not None:
+            try:
+                self.ui.after_cancel(self._agendamento)
+            except Exception:
+                pass
+            self._agendamento = None
+
+    # --- PUBLICAÇÃO (qualquer thread) ---
+    def publicar_peso(self, peso, estavel, id_balanca=None):
+        with self._lock:
+            self._pesos[id_balanca] = (peso, estavel)
+
+    def publicar_status(self, texto, cor, id_balanca=None):
+        with self._lock:
+            self._status[id_balanca] = (texto, cor)
+
+    def publicar_log(self, mensagem):
+        with self._lock:
+            if len(self._logs) == self._logs.maxlen:
+                self._logs_descartados += 1
+            self._logs.append(mensagem)
+
+    # --- APLICAÇÃO (thread da UI) ---
+    def aplicar_pendentes(self):
+        """Aplica tudo o que foi publicado desde a última atualização."""
+        with self._lock:
+            pesos, self._pesos = self._pesos, {}
+            status, self._status = self._status, {}
+            logs = list(self._logs)
+            self._logs.clear()
+            descartados, self._logs_descartados = self._logs_descartados, 0
+
+        if descartados:
+            logs.insert(0, f"({descartados} mensagem(ns) de log omitida(s))")
+        if logs:
+            self.ao_aplicar_logs(logs)
+        for id_balanca, (texto, cor) in status.items():
+            self.ao_aplicar_status(id_balanca, texto, cor)
+        for id_balanca, (peso, estavel) in pesos.items():
+            self.ao_aplicar_peso(id_balanca, peso, estavel)
+
+    def _agendar(self):
+        self._agendamento = self.ui.after(self.intervalo_ms, self._tick)
+
+    def _tick(self):
+        self._agendamento = None
+        if not self._ativo or not self.ui.winfo_exists():
+            return
+        try:
+            self.aplicar_pendentes()
+        finally:
+            self._agendar()
@@ -0,0 +1,286 @@
+"""
+Drivers de protocolo: o que muda de um fabricante (ou protocolo) de balança para outro.
+
+Cada driver informa os bytes dos comandos (leitura, tara, zero, ligar/desligar o envio contínuo,
+identificação), interpreta os quadros recebidos em LeituraSbi (a mesma estrutura para todos os
+protocolos), descreve os códigos de erro e declara o modo de aquisição mais rápido que suporta.
+O restante da aplicação (handshake, escalonador de comandos, capturas) não conhece os bytes do protocolo.
+
+Para outro fabricante (ex.: Ohaus), basta uma subclasse de DriverBalanca registrada em DRIVERS
+e os perfis de link dela em perfis_serial.PERFIS.
+"""
+import re
+from protocolo_sbi import (interpretar_quadro as interpretar_quadro_sbi, LeituraSbi, SeparadorQuadros,
+                           CMD_IMPRIMIR, CMD_TARA, CMD_ZERO, CMD_MODELO, CMD_NUMERO_SERIE)
+import protocolo_xbpi as xbpi
+
+# Modos de aquisição (escolhidos a cada conexão)
+# - MODO_CONSULTA: pede cada leitura e aguarda a resposta (configuração de fábrica das balanças).
+# - MODO_CONTINUO: a balança envia os quadros sozinha (auto-print da Sartorius, SIR do MT-SICS);
+#   o serviço apenas lê o fluxo de bytes, sem pedido/resposta.
+# - MODO_AUTOMATICO: usa o modo mais rápido do driver e volta ao modo consulta se o fluxo não vier.
+MODO_CONSULTA = "consulta"
+MODO_CONTINUO = "continuo"
+MODO_AUTOMATICO = "automatico"
+
+
+class PedidoComando:
+    """Bytes de um comando e como reconhecer, entre os quadros recebidos, a resposta que o confirma."""
+    __slots__ = ('dados', 'respostas', 'e_resposta', 'publicar')
+
+    def __init__(self, dados, respostas=1, e_resposta=None, publicar=False):
+        self.dados = dados
+        self.respostas = respostas    # Quadros aceitos até a confirmação (a última é a resposta)
+        self.e_resposta = e_resposta  # fn(quadro) -> bool; None aceita qualquer quadro
+        self.publicar = publicar      # A resposta é uma leitura de peso e também vai para o monitoramento
+
+
+class DriverBalanca:
+    """Interface dos drivers. Comandos None não são suportados pelo protocolo."""
+    nome = ""
+    descricao = ""
+    perfis = ()                      # Perfis de link (perfis_serial.PERFIS), o de fábrica primeiro
+    modo_mais_rapido = MODO_CONSULTA
+    cmd_imprimir = None
+    cmd_tara = None
+    cmd_zero = None
+    cmd_modelo = None
+    cmd_numero_serie = None
+    cmd_ligar_fluxo = None           # None: o envio contínuo, se existir, é ligado no menu da balança
+    cmd_desligar_fluxo = None
+    dica_sem_resposta = ""           # Orientação ao operador quando a balança não responde
+
+    @property
+    def perfil_padrao(self):
+        return self.perfis[0] if self.perfis else None
+
+    def criar_separador(self):
+        """Separador que remonta os quadros a partir dos bytes lidos da porta."""
+        return SeparadorQuadros()
+
+    def interpretar_quadro(self, quadro):
+        """LeituraSbi com peso ou erro, ou None se o quadro não contém nenhum dos dois."""
+        raise NotImplementedError
+
+    def interface_bloqueada(self, leitura):
+        """True se o erro impede qualquer comunicação até o operador agir na balança (ex.: Err 30 do SBI)."""
+        return False
+
+    def descrever_erro(self, codigo):
+        return f"erro {codigo}"
+
+    def repetir_comando(self, leitura):
+        """True se a resposta indica que o comando chegou corrompido e deve ser enviado de novo."""
+        return False
+
+    def texto_do_quadro(self, quadro):
+        """Texto de uma resposta de identificação (modelo, número de série), ou None se for peso ou erro."""
+        raise NotImplementedError
+
+    def exibir_quadro(self, quadro):
+        """Quadro recebido, legível para o log e as mensagens ao operador."""
+        return quadro.decode('ascii', errors='replace')
+
+    def pedido_leitura(self):
+        return PedidoComando(self.cmd_imprimir, publicar=True)
+
+    def pedido_tara(self, continuo):
+        raise NotImplementedError
+
+    def pedido_zero(self, continuo):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.nome!r})"
+
+
+class DriverSbi(DriverBalanca):
+    """
+    Sartorius SBI (texto, comandos ESC). A balança não responde à tara nem ao zero: no modo consulta o
+    comando vai junto com um ESC P, e a leitura seguinte confirma que ele foi processado.
+    O envio contínuo (auto-print) é ligado no menu da balança, não por comando.
+    """
+    nome = "sbi"
+    descricao = "Sartorius SBI"
+    perfis = ("SBI 1200 7O1", "SBI 2400 7O1", "SBI 4800 7O1", "SBI 9600 7O1", "SBI 19200 7O1", "SBI 9600 8N1",
+              "SBI 1200 7O1 RTS/DTR")
+    modo_mais_rapido = MODO_CONTINUO
+    cmd_imprimir = CMD_IMPRIMIR
+    cmd_tara = CMD_TARA
+    cmd_zero = CMD_ZERO
+    cmd_modelo = CMD_MODELO
+    cmd_numero_serie = CMD_NUMERO_SERIE
+    dica_sem_resposta = ("Possível erro 30.\n\nVerifique se ela está ligada, o cabo e o perfil de comunicação.\n"
+                         "Para resolver:\n"
+                         "1. Pressione o botão 📄 PRINT (ou ESC) no painel da balança.\n"
+                         "2. Se o erro persistir, consulte o manual do aplicativo para mais instruções.")
+
+    _ERROS = {30: "interface bloqueada (Err 30)"}
+
+    def interpretar_quadro(self, quadro):
+        return interpretar_quadro_sbi(quadro)
+
+    def interface_bloqueada(self, leitura):
+        return leitura is not None and leitura.erro == 30
+
+    def descrever_erro(self, codigo):
+        return self._ERROS.get(codigo, f"Err {codigo}")
+
+    def texto_do_quadro(self, quadro):
+        if b'rr' in quadro or b'RR' in quadro:
+            return None
+        leitura = interpretar_quadro_sbi(quadro)
+        if leitura is not None and leitura.peso is not None:
+            return None  # Quadro de peso atrasado
+        if len(quadro) == 20:
+            quadro = quadro[6:]  # Formato de 22 caracteres: descarta a identificação
+        return quadro.decode('ascii', errors='replace').strip() or None
+
+    def pedido_tara(self, continuo):
+        return self._pedido_sem_resposta(CMD_TARA, continuo)
+
+    def pedido_zero(self, continuo):
+        return self._pedido_sem_resposta(CMD_ZERO, continuo)
+
+    def _pedido_sem_resposta(self, comando, continuo):
+        if continuo:
+            return PedidoComando(comando, respostas=2)  # O primeiro quadro pode já estar em trânsito
+        return PedidoComando(comando + CMD_IMPRIMIR, publicar=True)
+
+
+class DriverMtSics(DriverBalanca):
+    """
+    Mettler Toledo MT-SICS (texto, comandos terminados em CR LF). Cada comando tem resposta própria,
+    iniciada pelo nome do comando (ex.: "T S    12.3456 g"), então tara e zero são confirmados por ela.
+    O envio contínuo é ligado por comando (SIR) e desligado com "@" (reset).
+    """
+    nome = "mt-sics"
+    descricao = "Mettler Toledo MT-SICS"
+    perfis = ("MT-SICS 9600 8N1", "MT-SICS 19200 8N1")
+    modo_mais_rapido = MODO_CONTINUO
+    cmd_imprimir = b'SI\r\n'       # Valor atual, estável ou não
+    cmd_tara = b'T\r\n'
+    cmd_zero = b'Z\r\n'
+    cmd_modelo = b'I2\r\n'
+    cmd_numero_serie = b'I4\r\n'
+    cmd_ligar_fluxo = b'SIR\r\n'   # Valor atual repetidamente
+    cmd_desligar_fluxo = b'@\r\n'
+    dica_sem_resposta = ("Verifique se ela está ligada, o cabo, o perfil de comunicação e se a interface "
+                         "da balança está configurada para MT-SICS.")
+
+    _RE_VALOR = re.compile(rb'^(S|SI|SIR|T|TI)\s+([SD])\s+([-+]?\d+(?:\.\d+)?)\s*(\S*)')
+    _RE_TEXTO = re.compile(rb'^I\d+\s+[AB]\s+"([^"]*)"')
+    # Respostas de erro: gerais (ES, ET, EL) e estados de um comando ("<comando> I", "+", "-")
+    _ERROS = {
+        "ES": "comando não reconhecido",
+        "ET": "erro de transmissão",
+        "EL": "erro lógico (parâmetro inválido)",
+        "I": "comando não executável no momento",
+        "+": "sobrecarga",
+        "-": "abaixo do limite",
+    }
+
+    def interpretar_quadro(self, quadro):
+        partes = quadro.split()
+        if not partes:
+            return None
+        if partes[0] in (b'ES', b'ET', b'EL'):
+            return LeituraSbi(None, '', False, partes[0].decode('ascii'))
+        match = self._RE_VALOR.match(quadro)
+        if match:
+            _, estado, valor, unidade = match.groups()
+            return LeituraSbi(float(valor), unidade.decode('ascii', errors='replace'), estado == b'S')
+        if len(partes) >= 2 and partes[1] in (b'I', b'+', b'-'):
+            return LeituraSbi(None, '', False, partes[1].decode('ascii'))
+        if len(partes) >= 2 and partes[1] == b'A':
+            return LeituraSbi(None, '', True)  # Comando executado, sem valor (ex.: "Z A")
+        return None
+
+    def descrever_erro(self, codigo):
+        return self._ERROS.get(codigo, str(codigo))
+
+    def repetir_comando(self, leitura):
+        # Restos de bytes na linha (ex.: de uma sondagem em outra velocidade) chegam à balança grudados no comando
+        return leitura is not None and leitura.erro in ("ES", "ET")
+
+    def texto_do_quadro(self, quadro):
+        match = self._RE_TEXTO.match(quadro)
+        if match is None:
+            return None
+        return match.group(1).decode('ascii', errors='replace').strip() or None
+
+    def pedido_leitura(self):
+        return PedidoComando(self.cmd_imprimir, e_resposta=self._resposta_a(b'S'), publicar=True)
+
+    def pedido_tara(self, continuo):
+        return PedidoComando(self.cmd_tara, e_resposta=self._resposta_a(b'T'))
+
+    def pedido_zero(self, continuo):
+        return PedidoComando(self.cmd_zero, e_resposta=self._resposta_a(b'Z'))
+
+    @staticmethod
+    def _resposta_a(nome):
+        """A resposta de um comando MT-SICS começa pelo nome dele (ou é um erro geral)."""
+        def e_resposta(quadro):
+            partes = quadro.split(None, 1)
+            return bool(partes) and partes[0] in (nome, b'ES', b'ET', b'EL')
+        return e_resposta
+
+
+class DriverXbpi(DriverBalanca):
+    """
+    Sartorius xBPI (binário, telegramas com prefixo de comprimento e byte de verificação; ver protocolo_xbpi).
+    Cada comando tem resposta própria, com o código do comando e um estado, então tara e zero são
+    confirmados por ela e os erros chegam como códigos numéricos. Não há envio contínuo por comando:
+    o modo mais rápido é o de consulta, na maior velocidade que a balança aceitar.
+    """
+    nome = "xbpi"
+    descricao = "Sartorius xBPI"
+    perfis = ("xBPI 9600 8O1", "xBPI 19200 8O1")
+    modo_mais_rapido = MODO_CONSULTA
+    cmd_imprimir = xbpi.telegrama(xbpi.COD_PESO)
+    cmd_tara = xbpi.telegrama(xbpi.COD_TARA)
+    cmd_zero = xbpi.telegrama(xbpi.COD_ZERO)
+    cmd_modelo = xbpi.telegrama(xbpi.COD_MODELO)
+    cmd_numero_serie = xbpi.telegrama(xbpi.COD_NUMERO_SERIE)
+    dica_sem_resposta = ("Verifique se ela está ligada, o cabo, o perfil de comunicação e se a interface "
+                         "da balança está configurada para xBPI.")
+
+    def criar_separador(self):
+        return xbpi.SeparadorTelegramas()
+
+    def interpretar_quadro(self, quadro):
+        return xbpi.interpretar_resposta(quadro)
+
+    def interface_bloqueada(self, leitura):
+        return leitura is not None and leitura.erro == xbpi.ERRO_INTERFACE_BLOQUEADA
+
+    def descrever_erro(self, codigo):
+        return xbpi.ERROS.get(codigo, f"erro {codigo}")
+
+    def repetir_comando(self, leitura):
+        return leitura is not None and leitura.erro == xbpi.ERRO_TRANSMISSAO
+
+    def texto_do_quadro(self, quadro):
+        return xbpi.texto_da_resposta(quadro)
+
+    def exibir_quadro(self, quadro):
+        return quadro.hex(' ')
+
+    def pedido_leitura(self):
+        return PedidoComando(self.cmd_imprimir, e_resposta=self._resposta_a(xbpi.COD_PESO), publicar=True)
+
+    def pedido_tara(self, continuo):
+        return PedidoComando(self.cmd_tara, e_resposta=self._resposta_a(xbpi.COD_TARA))
+
+    def pedido_zero(self, continuo):
+        return PedidoComando(self.cmd_zero, e_resposta=self._resposta_a(xbpi.COD_ZERO))
+
+    @staticmethod
+    def _resposta_a(codigo):
+        """A resposta xBPI repete o código do comando, inclusive quando informa um erro."""
+        return lambda quadro: xbpi.codigo_da_resposta(quadro) == codigo
+
+
+DRIVERS = {driver.nome: driver for driver in (DriverSbi(), DriverMtSics(), DriverXbpi())}
+PROTOCOLO_PADRAO = "sbi"
@@ -0,0 +1,310 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+import serial
+from drivers_balanca import DRIVERS, PROTOCOLO_PADRAO
+from estatisticas import EstatisticaCorrente
+
+# Prioridades (menor = primeiro). Comandos do operador passam à frente da consulta periódica.
+PRIORIDADE_TARA = 0
+PRIORIDADE_CAPTURA = 1
+PRIORIDADE_COMANDO = 2
+PRIORIDADE_CONSULTA = 3
+
+TIMEOUT_PADRAO = 2.0
+
+
+def tempo_silencio(baudrate):
+    """
+    Tempo sem receber nada (s) após o qual uma resposta atrasada não está mais a caminho:
+    o de dois quadros de 22 caracteres na velocidade da porta.
+    """
+    return max(0.05, 2 * 22 * 10 / (baudrate or 9600))
+
+
+def resumir_metricas(rtt, sem_resposta):
+    """{'rtt_ms': {nome do comando: estatísticas do RTT em ms}, 'sem_resposta': n} a partir de {nome: EstatisticaCorrente (s)}."""
+    rtt_ms = {nome: estatistica.para_dict() for nome, estatistica in rtt.items()}
+    for metrica in rtt_ms.values():
+        for chave in ('media', 'minimo', 'maximo', 'desvio_padrao'):
+            if metrica.get(chave) is not None:
+                metrica[chave] *= 1000
+    return {'rtt_ms': rtt_ms, 'sem_resposta': sem_resposta}
+
+
+class ResultadoComando:
+    """Resposta a um comando: o quadro que o confirmou, a leitura interpretada e o tempo de ida e volta (s)."""
+    __slots__ = ('nome', 'quadro', 'leitura', 'rtt', 'confirmado')
+
+    def __init__(self, nome, quadro=None, leitura=None, rtt=None, confirmado=False):
+        self.nome = nome
+        self.quadro = quadro          # bytes sem CR LF, ou None se a balança não respondeu no prazo
+        self.leitura = leitura        # LeituraSbi (ou None)
+        self.rtt = rtt                # Do início da escrita ao fim da resposta
+        self.confirmado = confirmado  # A balança respondeu sem código de erro
+
+    def __repr__(self):
+        rtt = f"{self.rtt * 1000:.1f} ms" if self.rtt is not None else None
+        return f"ResultadoComando({self.nome!r}, {self.quadro!r}, rtt={rtt}, confirmado={self.confirmado})"
+
+
+class _Comando:
+    __slots__ = ('prioridade', 'sequencia', 'nome', 'pedido', 'timeout', 'futuro')
+
+    def __init__(self, prioridade, sequencia, nome, pedido, timeout, futuro):
+        self.prioridade = prioridade
+        self.sequencia = sequencia
+        self.nome = nome
+        self.pedido = pedido  # PedidoComando: bytes, respostas esperadas e como reconhecê-las
+        self.timeout = timeout
+        self.futuro = futuro
+
+    def __lt__(self, outro):
+        return (self.prioridade, self.sequencia) < (outro.prioridade, outro.sequencia)
+
+
+class EscalonadorComandos:
+    """
+    Única thread dona da porta serial: escreve os comandos em ordem de prioridade (tara e captura antes
+    da consulta periódica), um por vez, e associa cada resposta ao comando que a pediu.
+    Cada pedido recebe um Future com o ResultadoComando. Quadros que não respondem a nenhum comando
+    (fluxo do auto-print, respostas atrasadas) vão para on_quadro; nenhum byte é descartado.
+    """
+
+    def __init__(self, ser, on_quadro, on_falha, on_log, continuo=False, intervalo_consulta=0.2, driver=None):
+        """
+        :param ser: Porta já aberta (após o handshake). A partir daqui, só este escalonador a usa.
+        :param on_quadro: Chamado na thread do escalonador para cada leitura a publicar. Ex: fn(quadro_bytes)
+        :param on_falha: Chamado uma vez se a porta falhar. Ex: fn(excecao)
+        :param on_log: Callback para log de eventos. Ex: fn(mensagem)
+        :param continuo: True se a balança envia os quadros sozinha: a porta é lida o tempo todo, sem consultas.
+        :param intervalo_consulta: Pausa (s) entre uma resposta e a próxima consulta periódica (modo consulta).
+        :param driver: DriverBalanca com os comandos e a interpretação dos quadros (None = SBI).
+        """
+        self.ser = ser
+        self.on_quadro = on_quadro
+        self.on_falha = on_falha
+        self.on_log = on_log
+        self.continuo = continuo
+        self.intervalo_consulta = intervalo_consulta
+        self.driver = driver or DRIVERS[PROTOCOLO_PADRAO]
+        self.consultando = not continuo  # Consulta periódica ativa (desligada com o monitoramento pausado)
+
+        self._fila = []
+        self._sequencia = itertools.count()
+        self._condicao = threading.Condition()
+        self._parar = threading.Event()
+        self._thread = None
+        self._separador = self.driver.criar_separador()
+        self._proxima_consulta = 0.0
+        self._atual = None  # Comando escrito que ainda aguarda resposta
+        self._linha_suja = False  # Um comando ficou sem resposta no prazo: ela ainda pode chegar
+        # Tempo de ida e volta por tipo de comando e respostas que não chegaram no prazo
+        self.rtt = {}
+        self.sem_resposta = 0
+
+    # --- CICLO DE VIDA ---
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._laco, daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout=1.0):
+        """Encerra a thread; os comandos ainda na fila são cancelados."""
+        self._parar.set()
+        self._acordar()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._cancelar_pendentes()
+
+    @property
+    def ativo(self):
+        return self._thread is not None and self._thread.is_alive() and not self._parar.is_set()
+
+    # --- PEDIDOS ---
+    def enviar(self, pedido, prioridade=PRIORIDADE_COMANDO, nome="comando", timeout=TIMEOUT_PADRAO):
+        """
+        Enfileira um comando. Thread-safe; não bloqueia.
+        :param pedido: PedidoComando (drivers_balanca) com os bytes e as respostas esperadas
+            (respostas=0: confirmado ao terminar a escrita).
+        :return: concurrent.futures.Future com o ResultadoComando (cancelado se o escalonador parar antes).
+        """
+        futuro = Future()
+        if self._parar.is_set():
+            futuro.cancel()
+            return futuro
+        with self._condicao:
+            heapq.heappush(self._fila, _Comando(prioridade, next(self._sequencia), nome, pedido, timeout, futuro))
+        self._acordar()
+        return futuro
+
+    def imprimir(self, prioridade=PRIORIDADE_CAPTURA, publicar=True, timeout=TIMEOUT_PADRAO):
+        """Pede uma leitura. Com publicar=True, a resposta é publicada como as da consulta periódica."""
+        pedido = self.driver.pedido_leitura()
+        pedido.publicar = publicar
+        return self.enviar(pedido, prioridade, "leitura", timeout)
+
+    def tarar(self, timeout=5.0):
+        """Tara, confirmada conforme o protocolo (ver DriverBalanca.pedido_tara)."""
+        return self.enviar(self.driver.pedido_tara(self.continuo), PRIORIDADE_TARA, "tara", timeout)
+
+    def zerar(self, timeout=5.0):
+        """Zero, confirmado conforme o protocolo (ver DriverBalanca.pedido_zero)."""
+        return self.enviar(self.driver.pedido_zero(self.continuo), PRIORIDADE_TARA, "zero", timeout)
+
+    def definir_consulta(self, ativa):
+        """Liga ou desliga a consulta periódica (ESC P a cada intervalo_consulta s). Sem efeito no auto-print."""
+        self.consultando = ativa
+        self._acordar()
+
+    def get_metricas(self):
+        """{nome do comando: {'quantidade', 'media', 'minimo', 'maximo', ...} do RTT em ms} e respostas perdidas."""
+        with self._condicao:
+            return resumir_metricas(self.rtt, self.sem_resposta)
+
+    # --- THREAD DONA DA PORTA ---
+    def _laco(self):
+        while not self._parar.is_set():
+            try:
+                comando = self._proximo_comando()
+                if comando is not None:
+                    self._executar(comando)
+                elif self.continuo:
+                    self._ler()  # Fluxo do auto-print; cancel_read() interrompe a espera quando chega um comando
+                else:
+                    self._aguardar_comando()
+            except (serial.SerialException, OSError) as e:
+                if not self._parar.is_set():
+                    self._parar.set()
+                    self._cancelar_pendentes(e)
+                    self.on_falha(e)
+                return
+            except Exception as e:
+                if self._atual is not None:
+                    self._concluir(self._atual, None, e)
+                self.on_log(f"ERRO inesperado no escalonador de comandos: {e}")
+                self._parar.wait(1.0)
+
+    def _proximo_comando(self):
+        with self._condicao:
+            if self._fila:
+                return heapq.heappop(self._fila)
+            if self.consultando and not self.continuo and time.monotonic() >= self._proxima_consulta:
+                return _Comando(PRIORIDADE_CONSULTA, next(self._sequencia), "consulta", self.driver.pedido_leitura(),
+                                TIMEOUT_PADRAO, None)
+        return None
+
+    def _aguardar_comando(self):
+        with self._condicao:
+            if self._fila or self._parar.is_set():
+                return
+            espera = self._proxima_consulta - time.monotonic() if self.consultando else None
+            if espera is None or espera > 0:
+                self._condicao.wait(espera)
+
+    def _executar(self, comando):
+        if comando.futuro is not None and not comando.futuro.set_running_or_notify_cancel():
+            return
+        self._atual = comando
+        pedido = comando.pedido
+        if self._linha_suja:
+            self._aguardar_silencio()
+        else:
+            self._ler_disponivel()  # O que chegou antes da escrita não responde a este comando
+        inicio = time.perf_counter()
+        self.ser.write(pedido.dados)
+        if pedido.respostas == 0:
+            self._concluir(comando, ResultadoComando(comando.nome, rtt=time.perf_counter() - inicio, confirmado=True))
+            return
+
+        fim = time.monotonic() + comando.timeout
+        recebidos = 0
+        while not self._parar.is_set():
+            if time.monotonic() >= fim:
+                self.sem_resposta += 1
+                # Sem e_resposta, a resposta é reconhecida só pela ordem: se chegar atrasada, não pode confirmar
+                # o próximo comando.
+                self._linha_suja = pedido.e_resposta is None and not self.continuo
+                self._concluir(comando, ResultadoComando(comando.nome))
+                return
+            quadros = self._separador.alimentar(self.ser.read(self.ser.in_waiting or 1))
+            for indice, quadro in enumerate(quadros):
+                if pedido.e_resposta is not None and not pedido.e_resposta(quadro):
+                    self._entregar(quadro)  # Fluxo contínuo intercalado com a resposta
+                    continue
+                recebidos += 1
+                if recebidos < pedido.respostas:
+                    self._entregar(quadro)
+                    continue
+                rtt = time.perf_counter() - inicio
+                leitura = self.driver.interpretar_quadro(quadro)
+                # Respostas reconhecidas por e_resposta são do comando (ex.: valor da tara), não leituras do fluxo
+                if pedido.publicar or (self.continuo and pedido.e_resposta is None):
+                    self.on_quadro(quadro)
+                with self._condicao:
+                    self.rtt.setdefault(comando.nome, EstatisticaCorrente()).adicionar(rtt)
+                confirmado = leitura is not None and leitura.erro is None
+                self._concluir(comando, ResultadoComando(comando.nome, quadro, leitura, rtt, confirmado))
+                for restante in quadros[indice + 1:]:  # Chegaram no mesmo bloco, depois da resposta
+                    self._entregar(restante)
+                return
+        self._concluir(comando, None)  # Escalonador parado no meio do comando
+
+    def _concluir(self, comando, resultado, erro=None):
+        self._atual = None
+        if comando.futuro is None:  # Consulta periódica
+            self._proxima_consulta = time.monotonic() + self.intervalo_consulta
+        elif resultado is not None:
+            comando.futuro.set_result(resultado)
+        else:
+            # Já em execução, o Future não aceita cancel(): quem espera recebe CancelledError (ou o erro da porta)
+            comando.futuro.set_exception(erro or CancelledError())
+
+    def _ler(self):
+        for quadro in self._separador.alimentar(self.ser.read(self.ser.in_waiting or 1)):
+            self._entregar(quadro)
+
+    def _ler_disponivel(self):
+        if self.ser.in_waiting:
+            self._ler()
+
+    def _aguardar_silencio(self):
+        """Lê, como respostas atrasadas, tudo o que chegar até a linha ficar em silêncio (ver tempo_silencio)."""
+        self._linha_suja = False
+        silencio = tempo_silencio(self.ser.baudrate)
+        ultimo = time.monotonic()
+        limite = ultimo + TIMEOUT_PADRAO
+        while not self._parar.is_set():
+            agora = time.monotonic()
+            if agora - ultimo >= silencio or agora >= limite:
+                return
+            if self.ser.in_waiting:
+                self._ler()
+                ultimo = time.monotonic()
+            else:
+                self._parar.wait(silencio / 5)
+
+    def _entregar(self, quadro):
+        """Quadro sem comando à espera: fluxo do auto-print ou resposta que chegou depois do prazo."""
+        self.on_quadro(quadro)
+
+    def _acordar(self):
+        with self._condicao:
+            self._condicao.notify_all()
+        if self.continuo:
+            try:
+                self.ser.cancel_read()  # Interrompe a leitura bloqueante do fluxo
+            except (AttributeError, NotImplementedError, serial.SerialException, OSError):
+                pass
+
+    def _cancelar_pendentes(self, erro=None):
+        if erro is not None and self._atual is not None:
+            self._concluir(self._atual, None, erro)
+        with self._condicao:
+            pendentes, self._fila = self._fila, []
+        for comando in pendentes:
+            if erro is None:
+                comando.futuro.cancel()
+            elif comando.futuro.set_running_or_notify_cancel():
+                comando.futuro.set_exception(erro)
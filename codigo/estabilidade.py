@@ -0,0 +1,153 @@
+import math
+from array import array
+from estatisticas import EstatisticaCorrente
+
+# Critérios de estabilidade
+# - CRITERIO_BALANCA: apenas o indicador da balança (quadro sem '?'), como antes.
+# - CRITERIO_JANELA: apenas a janela de leituras recentes (amplitude, inclinação e desvio padrão).
+# - CRITERIO_JANELA_E_BALANCA: exige os dois.
+# - CRITERIO_JANELA_OU_BALANCA: basta um dos dois (útil em bancadas com corrente de ar).
+CRITERIO_BALANCA = "balanca"
+CRITERIO_JANELA = "janela"
+CRITERIO_JANELA_E_BALANCA = "janela_e_balanca"
+CRITERIO_JANELA_OU_BALANCA = "janela_ou_balanca"
+CRITERIOS = (CRITERIO_BALANCA, CRITERIO_JANELA, CRITERIO_JANELA_E_BALANCA, CRITERIO_JANELA_OU_BALANCA)
+
+# Após reiniciar, o tempo só passa a ser medido depois da primeira leitura estável
+_SEM_REFERENCIA = object()
+
+
+class DetectorEstabilidade:
+    """
+    Decide se a leitura está estável a partir de uma janela deslizante das últimas leituras,
+    guardada em vetores de tamanho fixo, opcionalmente combinada com o indicador da balança.
+    Também mede quanto tempo a leitura leva para estabilizar depois de começar a variar.
+    """
+
+    def __init__(self, criterio=CRITERIO_BALANCA, tamanho_janela=8, amplitude_max=0.0005,
+                 inclinacao_max=0.001, desvio_max=None):
+        """
+        :param criterio: Um dos CRITERIOS.
+        :param tamanho_janela: Número de leituras consideradas na janela.
+        :param amplitude_max: Diferença máxima (g) entre a maior e a menor leitura da janela. None desativa.
+        :param inclinacao_max: Tendência máxima (g/s, em módulo) da reta ajustada à janela. None desativa.
+        :param desvio_max: Desvio padrão máximo (g) da janela. None desativa.
+        """
+        if criterio not in CRITERIOS:
+            raise ValueError(f"Critério de estabilidade desconhecido: {criterio}")
+        if tamanho_janela < 2:
+            raise ValueError("A janela precisa de pelo menos 2 leituras.")
+        self.criterio = criterio
+        self.tamanho_janela = tamanho_janela
+        self.amplitude_max = amplitude_max
+        self.inclinacao_max = inclinacao_max
+        self.desvio_max = desvio_max
+
+        self._pesos = array('d', bytes(8 * tamanho_janela))
+        self._instantes = array('d', bytes(8 * tamanho_janela))
+        self._posicao = 0
+        self._quantidade = 0
+
+        # Tempo até estabilizar (s), pelo indicador da balança e pela janela
+        self.tempo_ate_estavel = {"balanca": EstatisticaCorrente(), "janela": EstatisticaCorrente()}
+        self._inicio_variacao = {"balanca": _SEM_REFERENCIA, "janela": _SEM_REFERENCIA}
+
+    def reiniciar(self):
+        """Esvazia a janela (ex.: ao reconectar). As métricas acumuladas são mantidas."""
+        self._posicao = 0
+        self._quantidade = 0
+        self._inicio_variacao = {"balanca": _SEM_REFERENCIA, "janela": _SEM_REFERENCIA}
+
+    def adicionar(self, peso, estavel_balanca, instante):
+        """
+        Inclui uma leitura na janela e retorna se ela é considerada estável pelo critério configurado.
+        :param peso: Peso lido, ou None para um quadro sem peso (reinicia a janela).
+        :param estavel_balanca: Indicador de estabilidade enviado pela balança.
+        :param instante: Momento da leitura, em segundos (time.monotonic()).
+        """
+        if peso is None:
+            self._posicao = 0
+            self._quantidade = 0
+            self._registrar_tempo("balanca", False, instante)
+            self._registrar_tempo("janela", False, instante)
+            return False
+
+        self._pesos[self._posicao] = peso
+        self._instantes[self._posicao] = instante
+        self._posicao = (self._posicao + 1) % self.tamanho_janela
+        if self._quantidade < self.tamanho_janela:
+            self._quantidade += 1
+
+        estavel_janela = self.janela_estavel()
+        self._registrar_tempo("balanca", estavel_balanca, instante)
+        self._registrar_tempo("janela", estavel_janela, instante)
+
+        if self.criterio == CRITERIO_BALANCA:
+            return estavel_balanca
+        if self.criterio == CRITERIO_JANELA:
+            return estavel_janela
+        if self.criterio == CRITERIO_JANELA_E_BALANCA:
+            return estavel_janela and estavel_balanca
+        return estavel_janela or estavel_balanca
+
+    def janela_estavel(self):
+        """True se a janela está cheia e dentro de todos os limites ativos."""
+        if self._quantidade < self.tamanho_janela:
+            return False
+        amplitude, inclinacao, desvio = self.medidas_janela()
+        if self.amplitude_max is not None and amplitude > self.amplitude_max:
+            return False
+        if self.inclinacao_max is not None and abs(inclinacao) > self.inclinacao_max:
+            return False
+        if self.desvio_max is not None and desvio > self.desvio_max:
+            return False
+        return True
+
+    def medidas_janela(self):
+        """Retorna (amplitude, inclinação em g/s, desvio padrão) das leituras da janela atual."""
+        n = self._quantidade
+        if n == 0:
+            return 0.0, 0.0, 0.0
+        pesos = self._pesos if n == self.tamanho_janela else self._pesos[:n]
+        instantes = self._instantes if n == self.tamanho_janela else self._instantes[:n]
+
+        media_p = math.fsum(pesos) / n
+        media_t = math.fsum(instantes) / n
+        soma_pp = soma_tt = soma_tp = 0.0
+        for p, t in zip(pesos, instantes):
+            dp = p - media_p
+            dt = t - media_t
+            soma_pp += dp * dp
+            soma_tt += dt * dt
+            soma_tp += dt * dp
+
+        amplitude = max(pesos) - min(pesos)
+        inclinacao = soma_tp / soma_tt if soma_tt > 0 else 0.0
+        desvio = math.sqrt(soma_pp / (n - 1)) if n > 1 else 0.0
+        return amplitude, inclinacao, desvio
+
+    def get_metricas(self):
+        """
+        Tempo até estabilizar (s), por fonte ("balanca" e "janela"), para ajustar os limites.
+        Ex: {"janela": {"quantidade": 12, "media": 0.8, "desvio_padrao": 0.2, "minimo": 0.5, "maximo": 1.3}, ...}
+        """
+        return {
+            fonte: {
+                "quantidade": estat.quantidade,
+                "media": estat.media if estat.quantidade else None,
+                "desvio_padrao": estat.desvio_padrao,
+                "minimo": estat.minimo,
+                "maximo": estat.maximo,
+            }
+            for fonte, estat in self.tempo_ate_estavel.items()
+        }
+
+    def _registrar_tempo(self, fonte, estavel, instante):
+        inicio = self._inicio_variacao[fonte]
+        if not estavel:
+            if inicio is None:
+                self._inicio_variacao[fonte] = instante
+        else:
+            if inicio is not None and inicio is not _SEM_REFERENCIA:
+                self.tempo_ate_estavel[fonte].adicionar(instante - inicio)
+            self._inicio_variacao[fonte] = None
@@ -0,0 +1,95 @@
+import math
+
+
+class EstatisticaCorrente:
+    """
+    Estatística incremental de uma coluna de medidas (método de Welford).
+    Cada nova medida atualiza quantidade, média, mínimo, máximo e variância em O(1),
+    sem precisar reler as medidas anteriores.
+    """
+    __slots__ = ('quantidade', 'media', 'minimo', 'maximo', '_m2')
+
+    def __init__(self):
+        self.quantidade = 0
+        self.media = 0.0
+        self.minimo = None
+        self.maximo = None
+        self._m2 = 0.0  # Soma dos quadrados das diferenças em relação à média
+
+    def adicionar(self, valor):
+        """Incorpora uma nova medida à estatística."""
+        self.quantidade += 1
+        delta = valor - self.media
+        self.media += delta / self.quantidade
+        self._m2 += delta * (valor - self.media)
+        if self.minimo is None or valor < self.minimo:
+            self.minimo = valor
+        if self.maximo is None or valor > self.maximo:
+            self.maximo = valor
+
+    def estender(self, valores):
+        """
+        Incorpora várias medidas de uma vez: calcula a estatística do bloco e a combina com a atual
+        (método de Chan), sem um laço de atualização por medida.
+        """
+        quantidade = len(valores)
+        if quantidade == 0:
+            return
+        media = math.fsum(valores) / quantidade
+        m2 = math.fsum([(valor - media) ** 2 for valor in valores])
+        total = self.quantidade + quantidade
+        delta = media - self.media
+        self._m2 += m2 + delta * delta * self.quantidade * quantidade / total
+        self.media += delta * quantidade / total
+        self.quantidade = total
+        minimo, maximo = min(valores), max(valores)
+        if self.minimo is None or minimo < self.minimo:
+            self.minimo = minimo
+        if self.maximo is None or maximo > self.maximo:
+            self.maximo = maximo
+
+    @property
+    def variancia(self):
+        """Variância amostral (n - 1). Retorna None com menos de duas medidas."""
+        if self.quantidade < 2:
+            return None
+        return self._m2 / (self.quantidade - 1)
+
+    @property
+    def desvio_padrao(self):
+        """Desvio padrão amostral. Retorna None com menos de duas medidas."""
+        variancia = self.variancia
+        return math.sqrt(variancia) if variancia is not None else None
+
+    @property
+    def rsd(self):
+        """Desvio padrão relativo (DPR) em porcentagem. Retorna None se não for definido."""
+        desvio = self.desvio_padrao
+        if desvio is None or self.media == 0:
+            return None
+        return desvio / abs(self.media) * 100.0
+
+    def para_dict(self):
+        """Serializa o estado interno (para gravar em disco e restaurar depois)."""
+        return {
+            'quantidade': self.quantidade,
+            'media': self.media,
+            'minimo': self.minimo,
+            'maximo': self.maximo,
+            'm2': self._m2,
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Restaura uma estatística serializada com para_dict()."""
+        estatistica = cls()
+        estatistica.quantidade = int(dados['quantidade'])
+        estatistica.media = float(dados['media'])
+        estatistica.minimo = dados['minimo']
+        estatistica.maximo = dados['maximo']
+        estatistica._m2 = float(dados['m2'])
+        return estatistica
+
+    def __repr__(self):
+        return (f"EstatisticaCorrente(quantidade={self.quantidade}, media={self.media!r}, "
+                f"minimo={self.minimo!r}, maximo={self.maximo!r}, desvio_padrao={self.desvio_padrao!r})")
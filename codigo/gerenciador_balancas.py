@@ -0,0 +1,391 @@
+import selectors
+import socket
+import threading
+import time
+import serial
+from servico_balanca import ServicoBalanca, MODO_CONSULTA
+from perfis_serial import descritor_selecionavel
+from drivers_balanca import PROTOCOLO_PADRAO
+from supervisor_conexao import SupervisorConexao
+
+# Passo máximo do laço quando há portas que não podem ser monitoradas pelo seletor (ex.: COM no Windows, sim://)
+_PASSO_SEM_SELETOR = 0.01
+
+
+class _CanalBalanca:
+    """Estado de E/S de uma balança dentro do laço do gerenciador."""
+    __slots__ = ('id_balanca', 'servico', 'ensaio', 'supervisor', 'separador', 'selecionavel',
+                 'proxima_consulta', 'aguardando_desde')
+
+    def __init__(self, id_balanca, servico, ensaio):
+        self.id_balanca = id_balanca
+        self.servico = servico
+        self.ensaio = ensaio
+        self.supervisor = None  # SupervisorConexao desta balança (None sem reconexão automática)
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Prepara o canal para a porta (re)aberta pelo serviço."""
+        self.separador = self.servico.driver.criar_separador()
+        self.selecionavel = descritor_selecionavel(self.servico.ser) is not None
+        self.proxima_consulta = 0.0
+        self.aguardando_desde = None  # Momento do último pedido de leitura ainda sem resposta (modo consulta)
+
+
+class _ConexaoCanal:
+    """
+    O que o SupervisorConexao de uma balança do gerenciador vê como "serviço": conectar() reabre a porta
+    e devolve a balança ao laço de E/S do gerenciador (em vez de criar um escalonador próprio).
+    """
+
+    def __init__(self, gerenciador, id_balanca):
+        self.gerenciador = gerenciador
+        self.id_balanca = id_balanca
+
+    def conectar(self, porta, modo=MODO_CONSULTA, perfil=None):
+        return self.gerenciador._reabrir(self.id_balanca, porta, modo, perfil)
+
+    def desconectar(self):
+        self.gerenciador._liberar(self.id_balanca)
+
+
+class GerenciadorBalancas:
+    def __init__(self, gravador_csv, on_peso_update, on_status_update, on_log, on_connection_loss,
+                 intervalo_consulta=0.2, inventario=None, reconectar=True, tempo_maximo_reconexao=None,
+                 on_reconectado=None):
+        """
+        Conecta e monitora várias balanças ao mesmo tempo com uma única thread de E/S.
+        Os callbacks recebem o id da balança como primeiro argumento. Ex: on_peso_update(id, peso, estavel)
+        :param gravador_csv: GravadorCsv (já iniciado) que grava as capturas em segundo plano.
+        :param on_connection_loss: Chamado quando a porta de uma balança cai, e de novo (com reconectando=False)
+            se a reconexão automática desistir. Ex: fn(id, reconectando)
+        :param intervalo_consulta: Intervalo entre pedidos de leitura de cada balança no modo consulta.
+        :param inventario: InventarioPortas opcional: lembra o adaptador de cada balança (pelo id) entre execuções.
+        :param reconectar: Se True, cada balança que cair é reconectada por um SupervisorConexao próprio.
+        :param tempo_maximo_reconexao: Desiste de reconectar uma balança após este tempo (s). None tenta sempre.
+        :param on_reconectado: Chamado após a reconexão automática. Ex: fn(id, porta, segundos_fora)
+        """
+        self.gravador_csv = gravador_csv
+        self.on_peso_update = on_peso_update
+        self.on_status_update = on_status_update
+        self.on_log = on_log
+        self.on_connection_loss = on_connection_loss
+        self.on_reconectado = on_reconectado
+        self.intervalo_consulta = intervalo_consulta
+        self.inventario = inventario
+        self.reconectar = reconectar
+        self.tempo_maximo_reconexao = tempo_maximo_reconexao
+        # Ensaio usado pelas balanças adicionadas sem ensaio próprio
+        self.ensaio_compartilhado = ""
+
+        self._canais = {}
+        self._pendentes = []  # Operações de registro/remoção aplicadas pela thread de E/S
+        self._lock = threading.Lock()
+        self._seletor = selectors.DefaultSelector()
+        self._despertar_leitura, self._despertar_escrita = socket.socketpair()
+        self._despertar_leitura.setblocking(False)
+        self._seletor.register(self._despertar_leitura, selectors.EVENT_READ, None)
+        self._parar = threading.Event()
+        self._thread = None
+
+    # --- API PÚBLICA ---
+    def adicionar(self, id_balanca, porta, modo=MODO_CONSULTA, perfil=None, ensaio=None,
+                  detector_estabilidade=None, protocolo=PROTOCOLO_PADRAO, sondar=False):
+        """
+        Conecta uma nova balança e a inclui no laço de leitura.
+        :param porta: Porta serial; None usa a porta em que esta balança estava da última vez (requer inventario).
+        :param sondar: Se True, testa os perfis do protocolo e usa o mais rápido que responder.
+        :param ensaio: Nome do ensaio desta balança; None usa o ensaio compartilhado.
+        :param detector_estabilidade: DetectorEstabilidade próprio desta balança (None = indicador da balança).
+        :param protocolo: Driver de protocolo desta balança (ver drivers_balanca.DRIVERS).
+        :return: (sucesso, mensagem)
+        """
+        with self._lock:
+            if id_balanca in self._canais:
+                return False, f"Já existe uma balança com o id '{id_balanca}'."
+        if porta is None:
+            if self.inventario is not None:
+                self.inventario.obter()
+                porta = self.inventario.dispositivo_lembrado(id_balanca)
+            if porta is None:
+                return False, f"Nenhuma porta conhecida para a balança '{id_balanca}'."
+
+        servico = ServicoBalanca(
+            on_peso_update=lambda peso, estavel: self.on_peso_update(id_balanca, peso, estavel),
+            on_status_update=lambda texto, cor: self.on_status_update(id_balanca, texto, cor),
+            on_log=lambda mensagem: self.on_log(f"[{id_balanca}] {mensagem}"),
+            on_connection_loss=lambda: self.on_connection_loss(id_balanca, False),
+            detector_estabilidade=detector_estabilidade,
+            protocolo=protocolo,
+        )
+        # O teste de erro 30 roda na thread de quem chamou; as outras balanças seguem sendo lidas.
+        sucesso, mensagem = servico.conectar(porta, modo, perfil=perfil, sondar=sondar, leitor_externo=True)
+        if not sucesso:
+            return False, mensagem
+        if self.inventario is not None:
+            self.inventario.lembrar(self.inventario.identificar(porta), id_balanca)
+
+        canal = _CanalBalanca(id_balanca, servico, ensaio)
+        if self.reconectar:
+            canal.supervisor = self._criar_supervisor(id_balanca)
+            canal.supervisor.vigiar(porta, modo, servico.perfil.nome)
+        with self._lock:
+            if id_balanca in self._canais:  # Adicionada por outra thread durante a conexão
+                servico.desconectar()
+                return False, f"Já existe uma balança com o id '{id_balanca}'."
+            self._canais[id_balanca] = canal
+            self._pendentes.append((True, canal))
+        self._iniciar_laco()
+        self._despertar()
+        return True, mensagem
+
+    def remover(self, id_balanca):
+        """Desconecta a balança e a retira do laço de leitura."""
+        with self._lock:
+            canal = self._canais.pop(id_balanca, None)
+            if canal is None:
+                return False
+            self._pendentes.append((False, canal))
+        if canal.supervisor is not None:
+            canal.supervisor.parar()  # Cancela uma reconexão em andamento
+        self._despertar()
+        return True
+
+    def encerrar(self):
+        """Desconecta todas as balanças e encerra a thread de E/S."""
+        with self._lock:
+            ids = list(self._canais)
+        for id_balanca in ids:
+            self.remover(id_balanca)
+        self._parar.set()
+        self._despertar()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        # Remoções que a thread de E/S não chegou a aplicar
+        self._aplicar_pendentes({})
+
+    def listar(self):
+        """Retorna os ids das balanças do gerenciador (inclusive as que estão reconectando)."""
+        with self._lock:
+            return list(self._canais)
+
+    def get_servico(self, id_balanca):
+        """Retorna o ServicoBalanca de uma balança (ou None)."""
+        with self._lock:
+            canal = self._canais.get(id_balanca)
+        return canal.servico if canal else None
+
+    def definir_ensaio(self, id_balanca, ensaio):
+        """Direciona as capturas da balança para um ensaio próprio (None = ensaio compartilhado)."""
+        with self._lock:
+            canal = self._canais.get(id_balanca)
+            if canal:
+                canal.ensaio = ensaio
+
+    def get_metricas_conexao(self):
+        """Quedas, reconexões e tempos fora do ar de cada balança (ver SupervisorConexao.get_metricas)."""
+        with self._lock:
+            canais = list(self._canais.values())
+        return {canal.id_balanca: canal.supervisor.get_metricas() for canal in canais if canal.supervisor}
+
+    def capturar(self, id_balanca, tipo_amostra, instante=None, timeout=3.0):
+        """
+        Obtém uma leitura estável da balança e a enfileira no GravadorCsv, no ensaio correspondente.
+        Pode ser chamado de várias threads ao mesmo tempo (uma por balança).
+        :param instante: Momento do pedido de captura (time.monotonic()); None = agora.
+        :return: (peso, erro) - peso é None se a captura falhou. A confirmação da gravação chega pelo GravadorCsv.
+        """
+        instante = time.monotonic() if instante is None else instante
+        with self._lock:
+            canal = self._canais.get(id_balanca)
+        if canal is None:
+            return None, f"Balança '{id_balanca}' não está conectada."
+        if not canal.servico.is_connected():
+            return None, f"Balança '{id_balanca}' fora do ar; aguardando a reconexão."
+
+        peso, estavel = canal.servico.get_leitura_instantanea(instante, timeout)
+        if not estavel or peso is None:
+            return None, "A leitura da balança não está estável."
+
+        ensaio = canal.ensaio if canal.ensaio is not None else self.ensaio_compartilhado
+        if not self.gravador_csv.enfileirar(ensaio, [(tipo_amostra, peso, time.time())]):
+            return None, "Fila de gravação cheia; a medida não foi salva."
+        return peso, None
+
+    def tarar(self, id_balanca):
+        servico = self.get_servico(id_balanca)
+        return servico.enviar_comando_tara() if servico else False
+
+    # --- RECONEXÃO ---
+    def _criar_supervisor(self, id_balanca):
+        return SupervisorConexao(
+            _ConexaoCanal(self, id_balanca),
+            on_reconectado=lambda porta, fora: self._ao_reconectar(id_balanca, porta, fora),
+            on_desistencia=lambda mensagem: self._ao_desistir(id_balanca, mensagem),
+            on_status_update=lambda texto, cor: self.on_status_update(id_balanca, texto, cor),
+            on_log=lambda mensagem: self.on_log(f"[{id_balanca}] {mensagem}"),
+            inventario=self.inventario,
+            tempo_maximo=self.tempo_maximo_reconexao,
+        )
+
+    def _reabrir(self, id_balanca, porta, modo, perfil):
+        """Reabre a porta de uma balança que caiu (thread do supervisor) e a devolve ao laço de E/S."""
+        with self._lock:
+            canal = self._canais.get(id_balanca)
+        if canal is None:
+            return False, "A balança foi removida."
+        sucesso, mensagem = canal.servico.conectar(porta, modo, perfil=perfil, leitor_externo=True)
+        if not sucesso:
+            return False, mensagem
+        canal.reiniciar()
+        with self._lock:
+            registrado = self._canais.get(id_balanca) is canal
+            if registrado:
+                self._pendentes.append((True, canal))
+        if not registrado:  # Removida durante a reconexão
+            canal.servico.desconectar()
+            return False, "A balança foi removida."
+        self._iniciar_laco()
+        self._despertar()
+        return True, mensagem
+
+    def _liberar(self, id_balanca):
+        """Encerra o serviço de uma balança que caiu (já fora do laço de E/S), antes da reconexão."""
+        with self._lock:
+            canal = self._canais.get(id_balanca)
+        if canal is not None:  # Se foi removida, remover() já a desconecta
+            canal.servico.desconectar()
+
+    def _ao_reconectar(self, id_balanca, porta, segundos_fora):
+        if self.inventario is not None:
+            self.inventario.lembrar(self.inventario.identificar(porta), id_balanca)
+        if self.on_reconectado:
+            self.on_reconectado(id_balanca, porta, segundos_fora)
+
+    def _ao_desistir(self, id_balanca, mensagem):
+        self.on_log(f"[{id_balanca}] {mensagem}")
+        with self._lock:
+            self._canais.pop(id_balanca, None)
+        self.on_connection_loss(id_balanca, False)
+
+    # --- LAÇO DE E/S ---
+    def _iniciar_laco(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._laco_es, daemon=True)
+            self._thread.start()
+
+    def _despertar(self):
+        try:
+            self._despertar_escrita.send(b'\0')
+        except OSError:
+            pass
+
+    def _aplicar_pendentes(self, ativos):
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, []
+        for adicionar, canal in pendentes:
+            if adicionar:
+                ativos[canal.id_balanca] = canal
+                if canal.selecionavel:
+                    self._seletor.register(canal.servico.ser.fileno(), selectors.EVENT_READ, canal)
+            else:
+                self._descartar(ativos, canal)
+                canal.servico.desconectar()
+
+    def _descartar(self, ativos, canal):
+        if ativos.pop(canal.id_balanca, None) is not None and canal.selecionavel:
+            try:
+                self._seletor.unregister(canal.servico.ser.fileno())
+            except (KeyError, ValueError, OSError, AttributeError):
+                pass
+
+    def _laco_es(self):
+        """Única thread que lê todas as balanças: espera no seletor até haver bytes ou um prazo de consulta."""
+        ativos = {}
+        while not self._parar.is_set():
+            self._aplicar_pendentes(ativos)
+            espera = self._enviar_consultas(ativos, time.monotonic())
+            if any(not canal.selecionavel for canal in ativos.values()):
+                espera = min(espera, _PASSO_SEM_SELETOR)
+
+            for chave, _ in self._seletor.select(espera):
+                if chave.data is None:
+                    try:
+                        while self._despertar_leitura.recv(512):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                elif chave.data.id_balanca in ativos:
+                    self._ler_canal(ativos, chave.data)
+
+            for canal in list(ativos.values()):
+                if not canal.selecionavel:
+                    self._ler_canal(ativos, canal)
+
+        for canal in list(ativos.values()):
+            self._descartar(ativos, canal)
+
+    def _enviar_consultas(self, ativos, agora):
+        """Pede uma leitura às balanças em modo consulta cujo prazo venceu. Retorna o tempo até o próximo prazo."""
+        espera = 1.0
+        for canal in list(ativos.values()):
+            servico = canal.servico
+            if servico.modo_aquisicao != MODO_CONSULTA or servico.monitoramento_pausado:
+                continue
+
+            if canal.aguardando_desde is not None:
+                limite = canal.aguardando_desde + servico.perfil.timeout
+                if agora < limite:
+                    espera = min(espera, limite - agora)
+                    continue
+                # Sem resposta dentro do timeout: notifica leitura instável e volta a consultar.
+                canal.aguardando_desde = None
+                canal.separador.limpar()
+                servico.processar_quadro(b'')
+
+            if agora >= canal.proxima_consulta:
+                try:
+                    servico.escrever(servico.driver.cmd_imprimir)
+                except (serial.SerialException, OSError) as e:
+                    self._perda_conexao(ativos, canal, e)
+                    continue
+                canal.aguardando_desde = agora
+                espera = min(espera, servico.perfil.timeout)
+            else:
+                espera = min(espera, canal.proxima_consulta - agora)
+        return max(espera, 0.0)
+
+    def _ler_canal(self, ativos, canal):
+        servico = canal.servico
+        try:
+            disponivel = servico.ser.in_waiting
+            if not disponivel:
+                return
+            dados = servico.ser.read(disponivel)
+        except (serial.SerialException, OSError, TypeError) as e:
+            self._perda_conexao(ativos, canal, e)
+            return
+
+        for quadro in canal.separador.alimentar(dados):
+            if canal.aguardando_desde is not None:
+                canal.aguardando_desde = None
+                canal.proxima_consulta = time.monotonic() + self.intervalo_consulta
+            servico.processar_quadro(quadro)
+
+    def _perda_conexao(self, ativos, canal, erro):
+        self._descartar(ativos, canal)
+        canal.servico.monitorando = False
+        try:
+            canal.servico.ser.close()
+        except Exception:
+            pass
+        canal.servico.on_log(f"ERRO: A porta serial foi desconectada ou falhou: {erro}")
+        # Com supervisor, a balança continua no gerenciador (fora do laço) até reconectar ou ele desistir
+        reconectando = canal.supervisor is not None and canal.supervisor.conexao_perdida()
+        if not reconectando:
+            with self._lock:
+                if self._canais.get(canal.id_balanca) is canal:
+                    del self._canais[canal.id_balanca]
+        self.on_connection_loss(canal.id_balanca, reconectando)
@@ -0,0 +1,220 @@
+import queue
+import threading
+import time
+
+_PARAR = object()
+
+
+class _Pedido:
+    """Um item da fila: medidas a gravar em um ensaio ou uma tarefa a executar na ordem da fila."""
+    __slots__ = ('nome_ensaio', 'medidas', 'fim_lote', 'tarefa', 'ao_concluir')
+
+    def __init__(self, nome_ensaio=None, medidas=None, fim_lote=False, tarefa=None, ao_concluir=None):
+        self.nome_ensaio = nome_ensaio
+        self.medidas = medidas
+        self.fim_lote = fim_lote
+        self.tarefa = tarefa
+        self.ao_concluir = ao_concluir
+
+
+class GravadorCsv:
+    """
+    Grava as medidas no ServicoCsv em uma thread de fundo (write-behind), para que a thread da UI
+    nunca espere pelo disco (disco lento, pasta de rede, arquivo aberto no Excel...).
+    - A fila é limitada: se estiver cheia, enfileirar() retorna False na hora, sem bloquear.
+    - Pedidos seguidos do mesmo ensaio são gravados juntos, em uma única escrita.
+    - Em PermissionError (arquivo bloqueado), a escrita é repetida com espera crescente até conseguir;
+      as medidas seguintes aguardam na fila, na ordem, e nenhuma captura é perdida.
+    - Outras falhas são informadas por on_falha e o pedido é descartado.
+    """
+
+    def __init__(self, servico_csv, on_gravado, on_falha, on_log, capacidade=1000, max_lote=64,
+                 espera_inicial=0.25, espera_maxima=8.0):
+        """
+        :param servico_csv: ServicoCsv usado para gravar (gravar_medidas/descrever_erro).
+        :param on_gravado: Chamado na thread de gravação após cada escrita. Ex: fn(nome_ensaio, contagem_A, contagem_B, quantidade)
+        :param on_falha: Chamado quando medidas não puderam ser gravadas. Ex: fn(nome_ensaio, medidas, mensagem)
+        :param on_log: Callback para log de eventos. Ex: fn(mensagem)
+        :param capacidade: Máximo de pedidos aguardando na fila.
+        :param max_lote: Máximo de pedidos retirados da fila para uma mesma rodada de gravação.
+        :param espera_inicial: Espera (s) antes da primeira nova tentativa; dobra a cada falha.
+        :param espera_maxima: Limite (s) da espera entre tentativas.
+        """
+        self.servico_csv = servico_csv
+        self.on_gravado = on_gravado
+        self.on_falha = on_falha
+        self.on_log = on_log
+        self.max_lote = max_lote
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+
+        self._fila = queue.Queue(maxsize=capacidade)
+        self._thread = None
+        self._desistir = threading.Event()  # Interrompe as novas tentativas (encerramento)
+        self._condicao = threading.Condition()
+        self._pendentes = 0  # Pedidos enfileirados e ainda não concluídos
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._desistir.clear()
+            self._thread = threading.Thread(target=self._executar, daemon=True)
+            self._thread.start()
+
+    def parar(self, timeout=10.0):
+        """
+        Grava o que está na fila e encerra a thread. Se após `timeout` segundos ainda houver pedidos
+        (ex.: arquivo continua bloqueado), desiste deles e os informa por on_falha.
+        :return: Quantidade de pedidos que não puderam ser gravados.
+        """
+        if self._thread is None:
+            return 0
+        limite = time.monotonic() + timeout
+        try:
+            self._fila.put(_PARAR, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(max(0.0, limite - time.monotonic()))
+        perdidos = self._pendentes  # O que não foi gravado dentro do prazo
+        if self._thread.is_alive():
+            self._desistir.set()
+            self._thread.join(5.0)
+        # Pedidos que ficaram na fila (a thread saiu antes de chegar neles)
+        while True:
+            try:
+                pedido = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if pedido is not _PARAR:
+                self._falhar(pedido, "Gravação cancelada no encerramento.")
+        with self._condicao:
+            self._pendentes = 0
+            self._condicao.notify_all()
+        self._thread = None
+        return perdidos
+
+    @property
+    def pendentes(self):
+        """Pedidos ainda não gravados (na fila ou em andamento)."""
+        return self._pendentes
+
+    def aguardar(self, timeout=None):
+        """Espera a fila esvaziar. Retorna True se todos os pedidos foram concluídos. Não chamar da thread da UI."""
+        with self._condicao:
+            return self._condicao.wait_for(lambda: self._pendentes == 0, timeout)
+
+    # --- ENFILEIRAMENTO (qualquer thread, não bloqueia) ---
+    def enfileirar(self, nome_ensaio, medidas, fim_lote=False):
+        """
+        Enfileira medidas para gravação.
+        :param medidas: Lista de (tipo, peso, instante epoch).
+        :param fim_lote: Marca o fim de um lote (linha em branco no CSV).
+        :return: False se a fila estiver cheia (nada foi enfileirado).
+        """
+        return self._colocar(_Pedido(nome_ensaio, list(medidas), fim_lote))
+
+    def enfileirar_tarefa(self, tarefa, ao_concluir=None):
+        """
+        Executa `tarefa()` na thread de gravação depois dos pedidos já enfileirados
+        (ex.: exportar ou fechar o ensaio). O resultado (ou a exceção) é passado a ao_concluir.
+        :return: False se a fila estiver cheia.
+        """
+        return self._colocar(_Pedido(tarefa=tarefa, ao_concluir=ao_concluir))
+
+    def _colocar(self, pedido):
+        with self._condicao:
+            self._pendentes += 1
+        try:
+            self._fila.put_nowait(pedido)
+            return True
+        except queue.Full:
+            self._concluir(1)
+            return False
+
+    def _concluir(self, quantidade):
+        with self._condicao:
+            self._pendentes = max(0, self._pendentes - quantidade)
+            self._condicao.notify_all()
+
+    # --- THREAD DE GRAVAÇÃO ---
+    def _executar(self):
+        parar = False
+        while not parar:
+            pedido = self._fila.get()
+            if pedido is _PARAR:
+                break
+            pedidos = [pedido]
+            # Junta o que mais já estiver na fila, sem esperar
+            while len(pedidos) < self.max_lote:
+                try:
+                    proximo = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if proximo is _PARAR:
+                    parar = True
+                    break
+                pedidos.append(proximo)
+
+            for grupo in self._agrupar(pedidos):
+                if self._desistir.is_set():
+                    for pedido in grupo:
+                        self._falhar(pedido, "Gravação cancelada no encerramento.")
+                else:
+                    self._processar(grupo)
+                self._concluir(len(grupo))
+
+    @staticmethod
+    def _agrupar(pedidos):
+        """Junta pedidos consecutivos de medidas do mesmo ensaio; um fim de lote ou uma tarefa encerra o grupo."""
+        grupos = []
+        for pedido in pedidos:
+            anterior = grupos[-1][-1] if grupos else None
+            if (anterior is not None and pedido.tarefa is None and anterior.tarefa is None
+                    and not anterior.fim_lote and anterior.nome_ensaio == pedido.nome_ensaio):
+                grupos[-1].append(pedido)
+            else:
+                grupos.append([pedido])
+        return grupos
+
+    def _processar(self, grupo):
+        if grupo[0].tarefa is not None:
+            pedido = grupo[0]
+            try:
+                resultado = pedido.tarefa()
+            except Exception as e:
+                resultado = e
+            if pedido.ao_concluir is not None:
+                pedido.ao_concluir(resultado)
+            return
+
+        nome_ensaio = grupo[0].nome_ensaio
+        medidas = [medida for pedido in grupo for medida in pedido.medidas]
+        fim_lote = grupo[-1].fim_lote
+        espera = self.espera_inicial
+        tentativas = 0
+        while True:
+            try:
+                contagem_A, contagem_B = self.servico_csv.gravar_medidas(nome_ensaio, medidas, fim_lote)
+            except PermissionError as e:
+                tentativas += 1
+                if tentativas == 1:
+                    self.on_log(f"Arquivo do ensaio bloqueado ({e}); {len(medidas)} medida(s) aguardando. "
+                                f"Tentando novamente...")
+                if self._desistir.wait(espera):
+                    self.on_falha(nome_ensaio, medidas, self.servico_csv.descrever_erro(nome_ensaio, e))
+                    return
+                espera = min(espera * 2, self.espera_maxima)
+            except Exception as e:
+                self.on_falha(nome_ensaio, medidas, self.servico_csv.descrever_erro(nome_ensaio, e))
+                return
+            else:
+                if tentativas:
+                    self.on_log(f"Gravação retomada após {tentativas} tentativa(s).")
+                self.on_gravado(nome_ensaio, contagem_A, contagem_B, len(medidas))
+                return
+
+    def _falhar(self, pedido, mensagem):
+        if pedido.tarefa is not None:
+            if pedido.ao_concluir is not None:
+                pedido.ao_concluir(RuntimeError(mensagem))
+        else:
+            self.on_falha(pedido.nome_ensaio, pedido.medidas, mensagem)
@@ -0,0 +1,317 @@
+import threading
+import time
+from perfis_serial import sondar_perfis
+from drivers_balanca import DRIVERS, PROTOCOLO_PADRAO
+
+# Etapas do handshake, na ordem em que acontecem
+ETAPA_SONDANDO = "sondando"            # Testando os perfis de comunicação (só com sondagem)
+ETAPA_ABRINDO = "abrindo"              # Abrindo a porta com o perfil escolhido
+ETAPA_VERIFICANDO = "verificando"      # Enquadramento e Err 30: aguarda o primeiro quadro da balança
+ETAPA_IDENTIFICANDO = "identificando"  # Modelo e número de série (opcional, só no modo consulta)
+# Etapas finais
+ETAPA_CONCLUIDO = "concluido"
+ETAPA_FALHOU = "falhou"
+ETAPA_CANCELADO = "cancelado"
+
+# Motivos de falha
+FALHA_PORTA = "porta"                  # Nenhuma porta selecionada ou a porta não abriu
+FALHA_SONDAGEM = "sondagem"            # Nenhum perfil obteve resposta
+FALHA_ERRO_30 = "erro_30"              # A balança respondeu Err 30 (ou outro erro que bloqueia a interface)
+FALHA_ENQUADRAMENTO = "enquadramento"  # Chegam bytes, mas nenhum quadro válido (baud/paridade/protocolo diferentes)
+FALHA_SEM_RESPOSTA = "sem_resposta"    # Nenhum byte até o fim do prazo
+
+# Quadros ilegíveis (ou bytes sem fim de quadro) tolerados antes de concluir que o enquadramento está errado
+_QUADROS_INVALIDOS_MAX = 3
+_BYTES_SEM_QUADRO_MAX = 64
+# Reenvios do comando quando o protocolo indica que ele chegou corrompido (ver DriverBalanca.repetir_comando)
+_REPETICOES_MAX = 2
+
+# No modo automático, espera por este tempo (s) o fluxo contínuo antes de passar ao modo consulta
+_TIMEOUT_FLUXO_AUTOMATICO = 1.0
+
+_INSTRUCOES_ERRO_30 = ("Para resolver:\n"
+                       "1. Pressione o botão 📄 PRINT (ou ESC) no painel da balança.\n"
+                       "2. Se o erro persistir, consulte o manual do aplicativo para mais instruções.")
+
+
+class ResultadoHandshake:
+    """Resultado de um HandshakeConexao. Com sucesso, `ser` é a porta aberta e pronta para o monitoramento."""
+    __slots__ = ('etapa', 'falha', 'mensagem', 'ser', 'perfil', 'continuo', 'leitura', 'modelo', 'numero_serie',
+                 'respostas', 'tempos')
+
+    def __init__(self, etapa, falha=None, mensagem="", ser=None, perfil=None, continuo=False, leitura=None,
+                 modelo=None, numero_serie=None, respostas=(), tempos=None):
+        self.etapa = etapa
+        self.falha = falha
+        self.mensagem = mensagem
+        self.ser = ser
+        self.perfil = perfil
+        self.continuo = continuo        # Modo em que a balança respondeu (pode diferir do pedido no automático)
+        self.leitura = leitura          # Primeiro quadro válido (LeituraSbi)
+        self.modelo = modelo
+        self.numero_serie = numero_serie
+        self.respostas = list(respostas)  # Quadros recebidos na verificação (texto)
+        self.tempos = tempos or {}      # Duração (s) de cada etapa
+
+    @property
+    def sucesso(self):
+        return self.etapa == ETAPA_CONCLUIDO
+
+    @property
+    def duracao(self):
+        return sum(self.tempos.values())
+
+
+class HandshakeConexao:
+    """
+    Abertura da conexão como uma máquina de estados: sondagem (opcional), abertura da porta,
+    verificação do enquadramento e do Err 30 e consulta opcional de modelo e número de série.
+    Cada etapa é informada a `on_progresso`, e o handshake pode ser cancelado a qualquer momento
+    (cancelar()); a verificação termina assim que chega um quadro válido ou um código de erro.
+    Roda na thread de quem chama executar() ou em uma thread própria (iniciar()).
+    """
+
+    def __init__(self, porta, perfil, continuo=False, perfis_sondagem=None, identificar=True,
+                 on_progresso=None, on_log=None, timeout_verificacao=3.0, timeout_identificacao=0.4, driver=None,
+                 automatico=False):
+        """
+        :param porta: Porta serial ou URL do pyserial (ex.: sim://).
+        :param perfil: PerfilLink usado se não houver sondagem.
+        :param continuo: True se a balança envia os quadros sozinha (não pede leituras nem consultas);
+            o fluxo é ligado por comando se o protocolo tiver um.
+        :param perfis_sondagem: Perfis a testar antes de abrir (None usa `perfil` diretamente).
+        :param identificar: Se True, consulta modelo e número de série no modo consulta.
+        :param on_progresso: Chamado a cada etapa, na thread do handshake. Ex: fn(etapa, mensagem)
+        :param on_log: Callback para log de eventos. Ex: fn(mensagem)
+        :param timeout_verificacao: Prazo (s) para a balança enviar o primeiro quadro.
+        :param timeout_identificacao: Prazo (s) de cada consulta de identificação (quem não responde é ignorado).
+        :param driver: DriverBalanca do protocolo (None = SBI).
+        :param automatico: Com continuo=True, passa ao modo consulta se o fluxo não chegar em pouco tempo.
+        """
+        self.porta = porta
+        self.perfil = perfil
+        self.continuo = continuo
+        self.perfis_sondagem = perfis_sondagem
+        self.identificar = identificar
+        self.on_progresso = on_progresso
+        self.on_log = on_log or (lambda mensagem: None)
+        self.timeout_verificacao = timeout_verificacao
+        self.timeout_identificacao = timeout_identificacao
+        self.driver = driver or DRIVERS[PROTOCOLO_PADRAO]
+        self.automatico = automatico
+
+        self.etapa = None
+        self.resultado = None
+        self._cancelar = threading.Event()
+        self._concluido = threading.Event()
+        self._tempos = {}
+        self._inicio_etapa = None
+        self._ser = None
+
+    # --- CONTROLE ---
+    def cancelar(self):
+        """Interrompe o handshake; a porta, se já aberta, é fechada pela thread do handshake."""
+        self._cancelar.set()
+
+    @property
+    def cancelado(self):
+        return self._cancelar.is_set()
+
+    def iniciar(self, on_concluido=None):
+        """Executa em uma thread própria; `on_concluido(resultado)` é chamado nela ao terminar. Retorna self."""
+        def executar():
+            resultado = self.executar()
+            if on_concluido is not None:
+                on_concluido(resultado)
+        threading.Thread(target=executar, daemon=True).start()
+        return self
+
+    def aguardar(self, timeout=None):
+        """Espera o fim do handshake e retorna o ResultadoHandshake (None se o prazo acabar antes)."""
+        self._concluido.wait(timeout)
+        return self.resultado
+
+    # --- MÁQUINA DE ESTADOS ---
+    def executar(self):
+        """Executa as etapas na thread atual e retorna o ResultadoHandshake."""
+        self._ser = None
+        try:
+            resultado = self._executar_etapas()
+        except Exception as e:
+            self.on_log(f"Falha na conexão com {self.porta}: {e}")
+            resultado = self._resultado(ETAPA_FALHOU, FALHA_PORTA, _mensagem_falha_porta(self.porta, e))
+        if resultado.sucesso and self.cancelado:  # Cancelado durante a última etapa
+            resultado = self._resultado(ETAPA_CANCELADO, mensagem="Conexão cancelada.")
+        if not resultado.sucesso and self._ser is not None:
+            try:
+                self._ser.close()
+            except Exception:
+                pass
+        self.etapa = resultado.etapa
+        self.resultado = resultado
+        self._concluido.set()
+        return resultado
+
+    def _executar_etapas(self):
+        if self.porta in ("Nenhuma", "...", "", None):
+            return self._resultado(ETAPA_FALHOU, FALHA_PORTA, "Nenhuma porta selecionada.")
+
+        def cancelado():
+            return self._resultado(ETAPA_CANCELADO, mensagem="Conexão cancelada.")
+
+        if self.perfis_sondagem:
+            self._avancar(ETAPA_SONDANDO, f"Testando perfis de comunicação em {self.porta}...")
+            melhor, _ = sondar_perfis(self.porta, self.perfis_sondagem, self.on_log, continuo=self.continuo,
+                                      cancelar=self._cancelar, driver=self.driver)
+            if self.cancelado:
+                return cancelado()
+            if melhor is None:
+                return self._resultado(ETAPA_FALHOU, FALHA_SONDAGEM, (
+                    f"Nenhum perfil de comunicação obteve resposta da balança em {self.porta}.\n\n"
+                    "Verifique o cabo e as configurações de interface da balança."))
+            self.on_log(f"Perfil selecionado: {melhor.nome}")
+            self.perfil = melhor
+
+        self._avancar(ETAPA_ABRINDO, f"Abrindo {self.porta} ({self.perfil.nome})...")
+        self._ser = self.perfil.abrir(self.porta)
+        if self.cancelado:
+            return cancelado()
+
+        self._avancar(ETAPA_VERIFICANDO, f"Aguardando a resposta da balança em {self.porta}...")
+        if self.continuo and self.automatico:
+            leitura, respostas, falha = self._verificar(_TIMEOUT_FLUXO_AUTOMATICO)
+            if falha == FALHA_SEM_RESPOSTA and not self.cancelado:
+                self.on_log("A balança não enviou leituras sozinha; usando o modo consulta.")
+                self._desligar_fluxo()
+                self.continuo = False
+                leitura, respostas, falha = self._verificar()
+        else:
+            leitura, respostas, falha = self._verificar()
+        if self.cancelado:
+            return cancelado()
+        if falha is not None:
+            if falha == FALHA_ERRO_30:
+                self.on_log(f"Conexão cancelada: {self.driver.descrever_erro(leitura.erro)} na {self.porta}.")
+            return self._resultado(ETAPA_FALHOU, falha, self._mensagem_verificacao(falha, respostas),
+                                   respostas=respostas)
+        if leitura.erro is not None:
+            self.on_log(f"A balança respondeu com {self.driver.descrever_erro(leitura.erro)}; "
+                        "a comunicação está funcionando.")
+
+        modelo = numero_serie = None
+        if self.identificar and not self.continuo and self.driver.cmd_modelo:
+            self._avancar(ETAPA_IDENTIFICANDO, "Consultando modelo e número de série da balança...")
+            modelo = self._consultar_texto(self.driver.cmd_modelo)
+            if modelo is not None and self.driver.cmd_numero_serie:
+                # Quem não informa o modelo também não costuma informar o número de série
+                numero_serie = self._consultar_texto(self.driver.cmd_numero_serie)
+            if self.cancelado:
+                return cancelado()
+        return self._resultado(ETAPA_CONCLUIDO, ser=self._ser, leitura=leitura, modelo=modelo,
+                               numero_serie=numero_serie, respostas=respostas)
+
+    def _avancar(self, etapa, mensagem):
+        self._fechar_etapa()
+        self.etapa = etapa
+        self._inicio_etapa = time.perf_counter()
+        if self.on_progresso:
+            self.on_progresso(etapa, mensagem)
+
+    def _fechar_etapa(self):
+        if self._inicio_etapa is not None:
+            self._tempos[self.etapa] = time.perf_counter() - self._inicio_etapa
+            self._inicio_etapa = None
+
+    def _resultado(self, etapa, falha=None, mensagem="", **campos):
+        self._fechar_etapa()
+        return ResultadoHandshake(etapa, falha, mensagem, perfil=self.perfil, continuo=self.continuo,
+                                  tempos=dict(self._tempos), **campos)
+
+    def _verificar(self, timeout=None):
+        """
+        Aguarda o primeiro quadro da balança (no modo consulta, pedindo a leitura; no contínuo, ligando o fluxo
+        se o protocolo tiver comando para isso).
+        Retorna (leitura, respostas, falha): falha é None se chegou um peso ou um código de erro que não
+        bloqueia a interface.
+        """
+        ser = self._ser
+        driver = self.driver
+        separador = driver.criar_separador()
+        ser.reset_input_buffer()
+        comando = driver.cmd_ligar_fluxo if self.continuo else driver.cmd_imprimir
+        if comando:
+            ser.write(comando)
+        fim = time.monotonic() + (self.timeout_verificacao if timeout is None else timeout)
+        respostas = []
+        invalidos = 0
+        repeticoes = 0
+        bytes_sem_quadro = 0
+        while not self.cancelado and time.monotonic() < fim:
+            # Retorna assim que chega um byte, ou após o timeout da porta: sem espera ativa
+            dados = ser.read(ser.in_waiting or 1)
+            if not dados:
+                if not self.continuo:
+                    ser.write(driver.cmd_imprimir)  # Sem resposta no timeout da porta: pede de novo
+                continue
+            quadros = separador.alimentar(dados)
+            bytes_sem_quadro = 0 if quadros else bytes_sem_quadro + len(dados)
+            for quadro in quadros:
+                respostas.append(driver.exibir_quadro(quadro))
+                leitura = driver.interpretar_quadro(quadro)
+                if leitura is None:
+                    invalidos += 1
+                elif comando and repeticoes < _REPETICOES_MAX and driver.repetir_comando(leitura):
+                    repeticoes += 1
+                    ser.write(comando)
+                elif driver.interface_bloqueada(leitura):
+                    return leitura, respostas, FALHA_ERRO_30
+                else:
+                    return leitura, respostas, None
+            if invalidos >= _QUADROS_INVALIDOS_MAX or bytes_sem_quadro > _BYTES_SEM_QUADRO_MAX:
+                return None, respostas, FALHA_ENQUADRAMENTO
+        falha = FALHA_ENQUADRAMENTO if respostas or bytes_sem_quadro else FALHA_SEM_RESPOSTA
+        return None, respostas, falha
+
+    def _desligar_fluxo(self):
+        if self.driver.cmd_desligar_fluxo:
+            self._ser.write(self.driver.cmd_desligar_fluxo)
+
+    def _consultar_texto(self, comando):
+        """Envia uma consulta de identificação e retorna o texto da resposta (None se não houver)."""
+        ser = self._ser
+        ser.reset_input_buffer()
+        ser.write(comando)
+        separador = self.driver.criar_separador()
+        fim = time.monotonic() + self.timeout_identificacao
+        while not self.cancelado and time.monotonic() < fim:
+            for quadro in separador.alimentar(ser.read(ser.in_waiting or 1)):
+                texto = self.driver.texto_do_quadro(quadro)
+                if texto:
+                    return texto
+        return None
+
+    def _mensagem_verificacao(self, falha, respostas):
+        detalhes = "\\n".join(respostas) if respostas else "(sem resposta da balança)"
+        if falha == FALHA_ERRO_30:
+            return ("ATENÇÃO: 'Erro 30' detectado na balança.\n\n"
+                    "Este erro impede a comunicação e a leitura de pesos.\n\n"
+                    f"{_INSTRUCOES_ERRO_30}\n\nDetalhes: Código 30 detectado: {respostas[-1]}")
+        if falha == FALHA_ENQUADRAMENTO:
+            return (f"A balança em {self.porta} enviou dados, mas nenhum quadro válido: a velocidade ou o "
+                    f"enquadramento configurados nela não correspondem ao perfil {self.perfil.nome}.\n\n"
+                    "Escolha o perfil da balança ou \"Automático\".\n\n"
+                    f"Respostas: {detalhes}")
+        return (f"A balança não respondeu em {self.porta} ({self.timeout_verificacao:.0f} s). "
+                f"{self.driver.dica_sem_resposta}")
+
+
+def _mensagem_falha_porta(porta, erro):
+    return (f"Não foi possível conectar à porta {porta}.\n\n"
+            "Possíveis causas:\n"
+            "1. A balança não está conectada ao computador.\n"
+            "2. Outro software está usando a mesma porta.\n"
+            "3. Ocorreu um 'Erro 30' interno na balança.\n\n"
+            "Solução para 'Erro 30':\n"
+            "1. Aperte o botão 📄 PRINT (ou ESC) na balança.\n"
+            "2. Consulte o manual do aplicativo para mais detalhes.\n\n"
+            f"Erro técnico: {erro}")
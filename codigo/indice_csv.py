@@ -0,0 +1,69 @@
+import json
+import os
+from estatisticas import EstatisticaCorrente
+
+# Índice gravado ao lado de cada CSV de ensaio (ex.: "ensaio.csv.idx")
+EXTENSAO_INDICE = ".idx"
+VERSAO_INDICE = 1
+
+
+class IndiceCsv:
+    """
+    Resumo de um CSV de ensaio: quantidade e estatísticas de cada coluna e data da primeira linha.
+    Vale apenas para o CSV com o mesmo tamanho e data de modificação registrados no índice;
+    se o CSV mudar (ex.: editado no Excel), o índice é considerado desatualizado.
+    """
+
+    def __init__(self, estatisticas, data_inicio=None):
+        """
+        :param estatisticas: {tipo: EstatisticaCorrente} de cada coluna.
+        :param data_inicio: Data (dd/mm/aaaa) da primeira linha de dados, se houver.
+        """
+        self.estatisticas = estatisticas
+        self.data_inicio = data_inicio
+
+    def contagem(self, tipo):
+        estatistica = self.estatisticas.get(tipo)
+        return estatistica.quantidade if estatistica is not None else 0
+
+    @staticmethod
+    def caminho(arquivo_csv):
+        return arquivo_csv + EXTENSAO_INDICE
+
+    @classmethod
+    def carregar(cls, arquivo_csv):
+        """Lê o índice do CSV. Retorna None se não existir, for inválido ou estiver desatualizado."""
+        try:
+            with open(cls.caminho(arquivo_csv), 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            situacao = os.stat(arquivo_csv)
+        except (OSError, ValueError):
+            return None
+        try:
+            if (dados['versao'] != VERSAO_INDICE or dados['tamanho'] != situacao.st_size
+                    or dados['mtime_ns'] != situacao.st_mtime_ns):
+                return None
+            estatisticas = {tipo: EstatisticaCorrente.de_dict(valores) for tipo, valores in dados['estatisticas'].items()}
+            return cls(estatisticas, dados['data_inicio'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def salvar(self, arquivo_csv):
+        """Grava o índice vinculado ao estado atual do CSV (tamanho e data de modificação)."""
+        situacao = os.stat(arquivo_csv)
+        dados = {
+            'versao': VERSAO_INDICE,
+            'tamanho': situacao.st_size,
+            'mtime_ns': situacao.st_mtime_ns,
+            'data_inicio': self.data_inicio,
+            'estatisticas': {tipo: estatistica.para_dict() for tipo, estatistica in self.estatisticas.items()},
+        }
+        caminho = self.caminho(arquivo_csv)
+        caminho_tmp = caminho + ".tmp"
+        try:
+            with open(caminho_tmp, 'w', encoding='utf-8') as f:
+                json.dump(dados, f)
+            os.replace(caminho_tmp, caminho)
+        except Exception:
+            if os.path.exists(caminho_tmp): os.remove(caminho_tmp)
+            raise
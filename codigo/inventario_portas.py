@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+import time
+
+# Memória de qual adaptador era cada balança na última conexão
+ARQUIVO_MEMORIA_PADRAO = os.path.join("config", "portas_balancas.json")
+VERSAO_MEMORIA = 1
+BALANCA_PADRAO = "principal"
+
+
+class IdentidadePorta:
+    """
+    Uma porta serial e os dados do adaptador: VID/PID USB, número de série, posição no hub e descrição.
+    Ao ser reconectado (ou após reiniciar o PC), um adaptador USB-serial pode voltar com outro nome
+    (COM4 -> COM7); a identidade o reconhece pelo hardware. Portas sem dados USB (serial nativa,
+    URLs como sim://) são identificadas apenas pelo nome.
+    """
+    __slots__ = ('dispositivo', 'vid', 'pid', 'numero_serie', 'localizacao', 'descricao')
+
+    def __init__(self, dispositivo, vid=None, pid=None, numero_serie=None, localizacao=None, descricao=None):
+        self.dispositivo = dispositivo
+        self.vid = vid
+        self.pid = pid
+        self.numero_serie = numero_serie
+        self.localizacao = localizacao
+        self.descricao = descricao
+
+    @classmethod
+    def de_info(cls, info):
+        """Cria a identidade a partir de um ListPortInfo (serial.tools.list_ports)."""
+        descricao = info.description if info.description and info.description != "n/a" else None
+        return cls(info.device, info.vid, info.pid, info.serial_number, info.location, descricao)
+
+    def corresponde(self, outra):
+        """True se a IdentidadePorta `outra` (ex.: da enumeração atual) é este mesmo adaptador."""
+        if self.vid is None:
+            return outra.dispositivo == self.dispositivo
+        if (outra.vid, outra.pid) != (self.vid, self.pid):
+            return False
+        if self.numero_serie:
+            return outra.numero_serie == self.numero_serie
+        if self.localizacao:
+            return outra.localizacao == self.localizacao  # Mesmo conector físico
+        return outra.dispositivo == self.dispositivo
+
+    def para_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(**{campo: dados.get(campo) for campo in cls.__slots__})
+
+    def __eq__(self, outra):
+        return isinstance(outra, IdentidadePorta) and self.para_dict() == outra.para_dict()
+
+    def __hash__(self):
+        return hash((self.dispositivo, self.vid, self.pid, self.numero_serie))
+
+    def __str__(self):
+        if self.vid is None:
+            return self.dispositivo
+        texto = f"{self.dispositivo} (USB {self.vid:04X}:{self.pid:04X}"
+        return texto + (f", nº de série {self.numero_serie})" if self.numero_serie else ")")
+
+
+def listar_portas_info():
+    """ListPortInfo de cada porta serial presente (a enumeração pode levar centenas de ms)."""
+    import serial.tools.list_ports  # Só aqui: a enumeração carrega módulos que a inicialização não precisa
+    return serial.tools.list_ports.comports()
+
+
+class InventarioPortas:
+    """
+    Lista de portas seriais com cache: a enumeração roda em uma thread de fundo (uma por vez) e o
+    resultado vale por `ttl` segundos. Quem só precisa exibir a lista usa o cache na hora; quem
+    precisa do estado atual (ex.: reconexão) pede uma idade máxima.
+    Também guarda em disco qual adaptador era cada balança, para reencontrá-la mesmo com outro nome de COM.
+    """
+
+    def __init__(self, on_atualizado=None, on_log=None, ttl=5.0, arquivo_memoria=ARQUIVO_MEMORIA_PADRAO):
+        """
+        :param on_atualizado: Chamado na thread de enumeração a cada nova lista. Ex: fn(portas, mudou)
+        :param on_log: Callback para log de eventos. Ex: fn(mensagem)
+        :param ttl: Validade (s) da lista em cache.
+        :param arquivo_memoria: JSON com o adaptador de cada balança (None = só em memória).
+        """
+        self.on_atualizado = on_atualizado
+        self.on_log = on_log
+        self.ttl = ttl
+        self.arquivo_memoria = arquivo_memoria
+
+        self._portas = []  # IdentidadePorta de cada porta presente
+        self._instante = None  # time.monotonic() da última enumeração concluída
+        self._geracao = 0  # Incrementada a cada enumeração concluída
+        self._enumerando = False
+        self._condicao = threading.Condition()
+        self._parar = threading.Event()
+        self._thread_periodica = None
+        self._memoria = self._carregar_memoria()
+
+    # --- CACHE ---
+    @property
+    def portas(self):
+        """Lista em cache (pode estar vazia ou desatualizada; ver idade)."""
+        with self._condicao:
+            return list(self._portas)
+
+    @property
+    def idade(self):
+        """Segundos desde a última enumeração (None se ainda não houve)."""
+        instante = self._instante
+        return None if instante is None else time.monotonic() - instante
+
+    def atualizar(self):
+        """Inicia uma enumeração em segundo plano, se não houver uma em andamento. Não bloqueia."""
+        with self._condicao:
+            if self._enumerando:
+                return
+            self._enumerando = True
+        threading.Thread(target=self._enumerar, daemon=True).start()
+
+    def obter(self, max_idade=None, timeout=10.0):
+        """
+        Retorna a lista, enumerando agora (e esperando) se o cache for mais velho que `max_idade` s.
+        Não chamar da thread da UI com max_idade pequeno.
+        :param max_idade: Idade máxima aceita (padrão: ttl; 0 força uma nova enumeração).
+        """
+        max_idade = self.ttl if max_idade is None else max_idade
+        idade = self.idade
+        if idade is not None and idade <= max_idade:
+            return self.portas
+        with self._condicao:
+            geracao = self._geracao
+        self.atualizar()
+        with self._condicao:
+            self._condicao.wait_for(lambda: self._geracao != geracao, timeout)
+            return list(self._portas)
+
+    def _enumerar(self):
+        try:
+            portas = [IdentidadePorta.de_info(info) for info in listar_portas_info()]
+        except Exception as e:
+            if self.on_log:
+                self.on_log(f"Erro ao listar as portas seriais: {e}")
+            portas = None
+        with self._condicao:
+            self._enumerando = False
+            mudou = False
+            if portas is not None:
+                portas.sort(key=lambda porta: porta.dispositivo)
+                mudou = portas != self._portas or self._instante is None
+                self._portas = portas
+                self._instante = time.monotonic()
+            self._geracao += 1
+            self._condicao.notify_all()
+            portas = list(self._portas)
+        if self.on_atualizado:
+            self.on_atualizado(portas, mudou)
+
+    def iniciar(self, intervalo=None):
+        """Reenumera periodicamente (padrão: a cada ttl s), para a lista acompanhar adaptadores conectados depois."""
+        if self._thread_periodica is not None and self._thread_periodica.is_alive():
+            return
+        intervalo = self.ttl if intervalo is None else intervalo
+        self._parar.clear()
+
+        def periodica():
+            while not self._parar.wait(intervalo):
+                if self.idade is None or self.idade >= intervalo:
+                    self.atualizar()
+        self._thread_periodica = threading.Thread(target=periodica, daemon=True)
+        self._thread_periodica.start()
+
+    def parar(self):
+        self._parar.set()
+
+    # --- IDENTIFICAÇÃO ---
+    def identificar(self, dispositivo):
+        """IdentidadePorta de `dispositivo` conforme o cache (só o nome se não estiver nele, ex.: sim://)."""
+        for porta in self.portas:
+            if porta.dispositivo == dispositivo:
+                return porta
+        return IdentidadePorta(dispositivo)
+
+    def localizar(self, identidade, max_idade=None):
+        """
+        Nome atual da porta do adaptador `identidade`, ou None se ele não está presente.
+        Portas sem dados USB não são procuradas: o nome é devolvido e a abertura dirá se a porta existe.
+        """
+        if identidade.vid is None:
+            return identidade.dispositivo
+        for porta in self.obter(max_idade):
+            if identidade.corresponde(porta):
+                return porta.dispositivo
+        return None
+
+    # --- MEMÓRIA DAS BALANÇAS ---
+    def lembrar(self, identidade, id_balanca=BALANCA_PADRAO):
+        """Registra que a balança `id_balanca` está no adaptador `identidade` (gravado em disco)."""
+        self._memoria[id_balanca] = dict(identidade.para_dict(), ultima_conexao=time.time())
+        self._salvar_memoria()
+
+    def lembrada(self, id_balanca=BALANCA_PADRAO):
+        """IdentidadePorta usada pela balança na última conexão (None se não há registro)."""
+        dados = self._memoria.get(id_balanca)
+        return IdentidadePorta.de_dict(dados) if dados else None
+
+    def dispositivo_lembrado(self, id_balanca=BALANCA_PADRAO):
+        """Nome atual (no cache) da porta em que a balança estava da última vez, ou None se o adaptador não está presente."""
+        identidade = self.lembrada(id_balanca)
+        if identidade is None:
+            return None
+        if "://" in identidade.dispositivo:
+            return identidade.dispositivo  # URL (ex.: sim://): não aparece na enumeração
+        for porta in self.portas:
+            if identidade.corresponde(porta):
+                return porta.dispositivo
+        return None
+
+    def _carregar_memoria(self):
+        if not self.arquivo_memoria:
+            return {}
+        try:
+            with open(self.arquivo_memoria, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            if dados.get('versao') == VERSAO_MEMORIA and isinstance(dados.get('balancas'), dict):
+                return dados['balancas']
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+
+    def _salvar_memoria(self):
+        if not self.arquivo_memoria:
+            return
+        caminho_tmp = self.arquivo_memoria + ".tmp"
+        try:
+            pasta = os.path.dirname(self.arquivo_memoria)
+            if pasta and not os.path.exists(pasta):
+                os.makedirs(pasta)
+            with open(caminho_tmp, 'w', encoding='utf-8') as f:
+                json.dump({'versao': VERSAO_MEMORIA, 'balancas': self._memoria}, f, indent=1)
+            os.replace(caminho_tmp, self.arquivo_memoria)
+        except OSError as e:
+            if os.path.exists(caminho_tmp): os.remove(caminho_tmp)
+            if self.on_log:
+                self.on_log(f"Não foi possível gravar {self.arquivo_memoria}: {e}")
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+# Importado antes de tudo no ponto de entrada: marca o início da execução do script
+_INICIO = time.perf_counter()
+_INICIO_EPOCH = time.time()
+
+
+def _inicio_do_processo():
+    """Instante (epoch) em que o sistema criou o processo, ou None se não for possível obter."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            criacao, saida, kernel, usuario = (wintypes.FILETIME() for _ in range(4))
+            kernel32 = ctypes.windll.kernel32
+            if not kernel32.GetProcessTimes(kernel32.GetCurrentProcess(), ctypes.byref(criacao), ctypes.byref(saida),
+                                            ctypes.byref(kernel), ctypes.byref(usuario)):
+                return None
+            # FILETIME: intervalos de 100 ns desde 01/01/1601
+            return ((criacao.dwHighDateTime << 32) + criacao.dwLowDateTime - 116444736000000000) / 1e7
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/stat", "rb") as f:
+                # O nome do processo (campo 2) pode ter espaços: os campos seguintes começam após o último ')'
+                campos = f.read().rsplit(b")", 1)[1].split()
+            ticks_desde_boot = int(campos[19])  # Campo 22 (starttime)
+            with open("/proc/stat", "rb") as f:
+                boot = next(int(linha.split()[1]) for linha in f if linha.startswith(b"btime"))
+            return boot + ticks_desde_boot / os.sysconf("SC_CLK_TCK")
+    except Exception:
+        pass
+    return None
+
+
+class MedicaoInicio:
+    """
+    Marca as etapas da inicialização (imports, janela criada, primeira pintura, portas listadas...)
+    em milissegundos desde o início do script. Com o instante de criação do processo (quando o sistema
+    informa), também mede o que veio antes do script: carga do interpretador e, no executável, do bootloader.
+    """
+
+    def __init__(self):
+        self.etapas = {}
+
+    def marcar(self, etapa):
+        """Registra `etapa` no momento atual (a primeira marcação de cada etapa prevalece)."""
+        self.etapas.setdefault(etapa, round((time.perf_counter() - _INICIO) * 1000, 1))
+
+    def total(self):
+        """Maior marcação (ms), somando o tempo anterior ao script quando disponível."""
+        return max(self.etapas.values(), default=0.0) + (self.antes_do_script() or 0.0)
+
+    @staticmethod
+    def antes_do_script():
+        """ms entre a criação do processo e o início do script (None se desconhecido)."""
+        inicio = _inicio_do_processo()
+        return None if inicio is None else round(max(0.0, _INICIO_EPOCH - inicio) * 1000, 1)
+
+    def relatorio(self):
+        """{'antes_do_script_ms': ..., 'etapas_ms': {etapa: ms}, 'total_ms': ...}"""
+        return {'antes_do_script_ms': self.antes_do_script(), 'etapas_ms': dict(self.etapas),
+                'total_ms': round(self.total(), 1)}
+
+    def resumo(self):
+        """Texto de uma linha para o log."""
+        antes = self.antes_do_script()
+        partes = [f"{etapa} {ms:.0f} ms" for etapa, ms in self.etapas.items()]
+        if antes is not None:
+            partes.insert(0, f"processo→script {antes:.0f} ms")
+        return "Inicialização: " + ", ".join(partes) + "."
@@ -0,0 +1,158 @@
+import os
+import time
+import serial
+from drivers_balanca import DRIVERS, PROTOCOLO_PADRAO
+
+# Tipos de handshake suportados
+HANDSHAKE_NENHUM = "nenhum"
+HANDSHAKE_HARDWARE = "hardware"  # RTS/CTS controlado pelo driver
+HANDSHAKE_SOFTWARE = "software"  # XON/XOFF
+HANDSHAKE_MANUAL = "manual"      # RTS e DTR ligados manualmente (como no notebook de testes)
+
+
+class PerfilLink:
+    """Parâmetros de comunicação serial de uma balança (baud, enquadramento, handshake e timeouts)."""
+    __slots__ = ('nome', 'baudrate', 'bytesize', 'parity', 'stopbits', 'handshake', 'timeout', 'write_timeout')
+
+    def __init__(self, nome, baudrate, bytesize=7, parity='O', stopbits=1,
+                 handshake=HANDSHAKE_NENHUM, timeout=0.5, write_timeout=1.0):
+        self.nome = nome
+        self.baudrate = baudrate
+        self.bytesize = bytesize
+        self.parity = parity
+        self.stopbits = stopbits
+        self.handshake = handshake
+        self.timeout = timeout
+        self.write_timeout = write_timeout
+
+    def abrir(self, porta):
+        """Abre a porta serial com os parâmetros deste perfil. Aceita nomes de porta e URLs do pyserial (ex.: sim://)."""
+        if porta.startswith("sim://"):
+            # A balança simulada só é registrada no pyserial quando uma porta sim:// é de fato aberta
+            import simulador
+        ser = serial.serial_for_url(
+            porta, self.baudrate,
+            bytesize=self.bytesize, parity=self.parity, stopbits=self.stopbits,
+            timeout=self.timeout, write_timeout=self.write_timeout,
+            rtscts=self.handshake == HANDSHAKE_HARDWARE,
+            xonxoff=self.handshake == HANDSHAKE_SOFTWARE,
+        )
+        if self.handshake == HANDSHAKE_MANUAL:
+            ser.rts = True  # "Pode mandar!"
+            ser.dtr = True  # "Estou ligado!"
+        return ser
+
+    def __repr__(self):
+        return (f"PerfilLink({self.nome!r}, {self.baudrate}, {self.bytesize}{self.parity}{self.stopbits}, "
+                f"handshake={self.handshake!r})")
+
+
+# Perfis conhecidos, do mais lento ao mais rápido dentro de cada protocolo. O primeiro é a configuração de
+# fábrica da Sartorius. O timeout cobre com folga um quadro de 22 caracteres na velocidade do perfil.
+# Cada driver (drivers_balanca.DRIVERS) lista os perfis que fazem sentido para o seu protocolo.
+PERFIS = {
+    perfil.nome: perfil for perfil in (
+        PerfilLink("SBI 1200 7O1", 1200, timeout=0.5),
+        PerfilLink("SBI 2400 7O1", 2400, timeout=0.3),
+        PerfilLink("SBI 4800 7O1", 4800, timeout=0.2),
+        PerfilLink("SBI 9600 7O1", 9600, timeout=0.15),
+        PerfilLink("SBI 19200 7O1", 19200, timeout=0.1),
+        PerfilLink("SBI 9600 8N1", 9600, bytesize=8, parity='N', timeout=0.15),
+        PerfilLink("SBI 1200 7O1 RTS/DTR", 1200, handshake=HANDSHAKE_MANUAL, timeout=0.5),
+        PerfilLink("MT-SICS 9600 8N1", 9600, bytesize=8, parity='N', timeout=0.15),
+        PerfilLink("MT-SICS 19200 8N1", 19200, bytesize=8, parity='N', timeout=0.1),
+        PerfilLink("xBPI 9600 8O1", 9600, bytesize=8, parity='O', timeout=0.15),
+        PerfilLink("xBPI 19200 8O1", 19200, bytesize=8, parity='O', timeout=0.1),
+    )
+}
+PERFIL_PADRAO = "SBI 1200 7O1"
+
+
+def descritor_selecionavel(ser):
+    """
+    Retorna o descritor de arquivo da porta, se ela puder ser monitorada por select/event loop,
+    ou None (portas COM no Windows e portas por URL, como sim://).
+    """
+    if os.name == 'nt':
+        return None
+    try:
+        return ser.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def medir_taxa(ser, duracao=1.0, continuo=False, cancelar=None, driver=None):
+    """
+    Mede quantas leituras válidas por segundo a balança entrega nesta conexão.
+    No modo consulta pede leituras em sequência, sem pausas; no modo contínuo apenas lê o fluxo
+    (ligado antes por comando, se o protocolo tiver um).
+    :param cancelar: threading.Event opcional que encerra a medição antes do fim da duração.
+    :param driver: DriverBalanca do protocolo (None = SBI).
+    """
+    driver = driver or DRIVERS[PROTOCOLO_PADRAO]
+    separador = driver.criar_separador()
+    leituras = 0
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+    ser.reset_input_buffer()
+    if continuo and driver.cmd_ligar_fluxo:
+        ser.write(driver.cmd_ligar_fluxo)
+    while time.perf_counter() < fim:
+        if cancelar is not None and cancelar.is_set():
+            break
+        if continuo:
+            quadros = separador.alimentar(ser.read(ser.in_waiting or 1))
+        else:
+            ser.write(driver.cmd_imprimir)
+            quadros = _ler_resposta(ser, separador)
+        for quadro in quadros:
+            leitura = driver.interpretar_quadro(quadro)
+            if leitura is not None and leitura.peso is not None:
+                leituras += 1
+    taxa = leituras / (time.perf_counter() - inicio)
+    if continuo and driver.cmd_desligar_fluxo:
+        ser.write(driver.cmd_desligar_fluxo)  # Deixa a balança como estava: a conexão liga o fluxo de novo
+    return taxa
+
+
+def _ler_resposta(ser, separador):
+    """Lê até completar um quadro (no formato do protocolo) ou a porta ficar sem bytes no timeout."""
+    while True:
+        dados = ser.read(ser.in_waiting or 1)
+        if not dados:
+            return []
+        quadros = separador.alimentar(dados)
+        if quadros:
+            return quadros
+
+
+def sondar_perfis(porta, perfis, on_log, duracao=1.0, continuo=False, cancelar=None, driver=None):
+    """
+    Testa os perfis na ordem dada e retorna (perfil mais rápido que respondeu, {nome: leituras/s}).
+    O perfil retornado é None se nenhum respondeu.
+    :param cancelar: threading.Event opcional; quando sinalizado, a sondagem para antes do próximo perfil.
+    :param driver: DriverBalanca do protocolo (None = SBI).
+    """
+    taxas = {}
+    melhor = None
+    for perfil in perfis:
+        if cancelar is not None and cancelar.is_set():
+            break
+        try:
+            ser = perfil.abrir(porta)
+        except (serial.SerialException, OSError) as e:
+            on_log(f"Perfil {perfil.nome}: não foi possível abrir a porta ({e}).")
+            continue
+        try:
+            taxa = medir_taxa(ser, duracao, continuo, cancelar, driver)
+        except (serial.SerialException, OSError) as e:
+            on_log(f"Perfil {perfil.nome}: falha na comunicação ({e}).")
+            continue
+        finally:
+            ser.close()
+
+        taxas[perfil.nome] = taxa
+        on_log(f"Perfil {perfil.nome}: {taxa:.1f} leituras/s")
+        if taxa > 0 and (melhor is None or taxa > taxas[melhor.nome]):
+            melhor = perfil
+    return melhor, taxas
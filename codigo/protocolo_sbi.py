@@ -0,0 +1,108 @@
+"""
+Interpretação das respostas da balança no protocolo Sartorius SBI.
+
+Formato de saída (manual, "Data Output Format"):
+- 16 caracteres: posição 1 sinal (+, - ou espaço), 2-10 valor, 11 espaço,
+  12-14 unidade, 15-16 CR LF.
+- 22 caracteres: 6 caracteres de identificação (ex.: "N     ", "Stat  ") seguidos
+  do quadro de 16 caracteres.
+- Mensagens de erro: "   Err ###" (ou "Stat     Err ###" no formato de 22).
+
+Os quadros são tratados diretamente como `bytes`, sem decodificar a linha para texto.
+"""
+import re
+
+# Comandos SBI (formato ESC, terminados em CR LF)
+CMD_IMPRIMIR = b'\x1bP\r\n'   # Solicita a leitura atual
+CMD_TARA = b'\x1bf4_\r\n'     # Tara (sem zerar)
+CMD_ZERO = b'\x1bf3_\r\n'     # Zero
+CMD_MODELO = b'\x1bx1_\r\n'   # Modelo da balança
+CMD_NUMERO_SERIE = b'\x1bx2_\r\n'  # Número de série da célula de pesagem
+
+# Padrões pré-compilados, aplicados sobre bytes
+_RE_ERRO = re.compile(rb'(?i)err(?:or)?\s*[:\-\s]*\s*(\d+)')
+_RE_PESO = re.compile(rb'([-+]?) *(\d+\.\d+) *([A-Za-z%/]*)')
+
+_INSTAVEL = ord('?')
+
+# Cache das unidades já vistas, para não decodificar a mesma sequência de bytes a cada leitura
+_UNIDADES = {b'': '', b'g': 'g', b'mg': 'mg', b'kg': 'kg', b'ct': 'ct', b'ozt': 'ozt', b'pcs': 'pcs', b'%': '%'}
+
+
+class LeituraSbi:
+    """Resultado da interpretação de um quadro SBI."""
+    __slots__ = ('peso', 'unidade', 'estavel', 'erro')
+
+    def __init__(self, peso=None, unidade='', estavel=False, erro=None):
+        self.peso = peso        # float com sinal, ou None se o quadro não traz peso
+        self.unidade = unidade  # ex.: 'g'
+        self.estavel = estavel  # False se a balança sinalizou instabilidade ('?')
+        self.erro = erro        # código numérico de erro (ex.: 30), ou None
+
+    def __repr__(self):
+        return f"LeituraSbi(peso={self.peso!r}, unidade={self.unidade!r}, estavel={self.estavel!r}, erro={self.erro!r})"
+
+
+def interpretar_quadro(quadro):
+    """
+    Interpreta um quadro SBI recebido da porta serial.
+    :param quadro: bytes de uma linha (com ou sem CR LF).
+    :return: LeituraSbi com peso ou erro, ou None se o quadro não contém nenhum dos dois.
+    """
+    # Filtro barato antes da regex de erro: quase todos os quadros são de peso.
+    if b'rr' in quadro or b'RR' in quadro:
+        match = _RE_ERRO.search(quadro)
+        if match:
+            return LeituraSbi(None, '', False, int(match.group(1)))
+
+    match = _RE_PESO.search(quadro)
+    if match:
+        sinal, numero, bruto_unidade = match.groups()
+        peso = float(numero)  # float() aceita bytes diretamente
+        if sinal == b'-':
+            peso = -peso
+        unidade = _UNIDADES.get(bruto_unidade)
+        if unidade is None:
+            unidade = _UNIDADES.setdefault(bruto_unidade, bruto_unidade.decode('ascii'))
+        return LeituraSbi(peso, unidade, _INSTAVEL not in quadro)
+
+    # Algumas balanças respondem apenas com o código numérico (ex.: "30")
+    codigo = quadro.strip()
+    if codigo.isdigit():
+        return LeituraSbi(None, '', False, int(codigo))
+    return None
+
+
+class SeparadorQuadros:
+    """
+    Buffer circular de recepção para o modo contínuo (auto-print).
+    Acumula os bytes à medida que chegam da porta e devolve os quadros completos
+    (terminados em LF). Se o buffer passar da capacidade sem encontrar um fim de
+    quadro, os bytes mais antigos são descartados.
+    """
+
+    def __init__(self, capacidade=4096):
+        self.capacidade = capacidade
+        self._buffer = bytearray()
+
+    def alimentar(self, dados):
+        """Adiciona os bytes recebidos e retorna a lista de quadros completos (sem CR LF)."""
+        buffer = self._buffer
+        buffer += dados
+        quadros = []
+        inicio = 0
+        fim = buffer.find(b'\n')
+        while fim != -1:
+            quadro = bytes(buffer[inicio:fim]).rstrip(b'\r')
+            if quadro:
+                quadros.append(quadro)
+            inicio = fim + 1
+            fim = buffer.find(b'\n', inicio)
+        if inicio:
+            del buffer[:inicio]
+        if len(buffer) > self.capacidade:
+            del buffer[:len(buffer) - self.capacidade]
+        return quadros
+
+    def limpar(self):
+        self._buffer.clear()
@@ -0,0 +1,141 @@
+"""
+Telegramas do protocolo Sartorius xBPI (binário).
+
+Formato usado pelo driver (computador -> balança e balança -> computador):
+    [comprimento] [endereço] [código] [estado] [parâmetros...] [verificação]
+- comprimento: número de bytes que vêm depois dele, incluindo a verificação.
+- endereço: endereço da balança no barramento (0 na ligação ponto a ponto).
+- código: comando pedido; a resposta repete o código do comando que ela atende.
+- estado: só nas respostas; 0 = executado, outro valor = código de erro (ver ERROS).
+- verificação: XOR de todos os bytes anteriores do telegrama (inclusive o comprimento).
+A resposta de peso traz o valor em float64 big-endian, um byte de flags e a unidade em ASCII.
+
+Os telegramas são tratados como `bytes`; o separador devolve o conteúdo sem comprimento nem verificação.
+"""
+import struct
+from functools import reduce
+from operator import xor
+from protocolo_sbi import LeituraSbi
+
+ENDERECO_PADRAO = 0x00
+
+# Códigos de comando
+COD_PESO = 0x1E          # Valor atual (líquido), estável ou não
+COD_TARA = 0x20
+COD_ZERO = 0x21
+COD_MODELO = 0x02
+COD_NUMERO_SERIE = 0x03
+
+# Estados das respostas
+ESTADO_OK = 0x00
+ERRO_COMANDO_DESCONHECIDO = 1
+ERRO_PARAMETRO = 2
+ERRO_NAO_EXECUTAVEL = 3
+ERRO_TRANSMISSAO = 4     # A balança recebeu o comando com a verificação errada
+ERRO_SOBRECARGA = 6
+ERRO_ABAIXO_LIMITE = 7
+ERRO_INTERFACE_BLOQUEADA = 30  # Como o Err 30 do SBI: só o operador, no painel, libera a interface
+ERROS = {
+    ERRO_COMANDO_DESCONHECIDO: "comando não reconhecido",
+    ERRO_PARAMETRO: "parâmetro inválido",
+    ERRO_NAO_EXECUTAVEL: "comando não executável no momento",
+    ERRO_TRANSMISSAO: "erro de transmissão",
+    ERRO_SOBRECARGA: "sobrecarga",
+    ERRO_ABAIXO_LIMITE: "abaixo do limite",
+    ERRO_INTERFACE_BLOQUEADA: "interface bloqueada (Err 30)",
+}
+
+FLAG_INSTAVEL = 0x01
+
+# Endereço, código e verificação: o menor telegrama possível (comando sem parâmetros)
+_COMPRIMENTO_MIN = 3
+# Maior telegrama trocado com a balança; um comprimento acima disso só pode ser um byte fora de sincronia
+_COMPRIMENTO_MAX = 64
+
+_PESO = struct.Struct(">dB")
+
+
+def telegrama(codigo, parametros=b"", endereco=ENDERECO_PADRAO, estado=None):
+    """Monta um telegrama completo. `estado` só é informado nas respostas (usado pela balança simulada)."""
+    conteudo = bytes((endereco, codigo)) + (bytes((estado,)) if estado is not None else b"") + parametros
+    cabecalho = bytes((len(conteudo) + 1,)) + conteudo
+    return cabecalho + bytes((reduce(xor, cabecalho, 0),))
+
+
+def telegrama_peso(peso, estavel, unidade='g', endereco=ENDERECO_PADRAO):
+    """Resposta a COD_PESO."""
+    flags = 0 if estavel else FLAG_INSTAVEL
+    return telegrama(COD_PESO, _PESO.pack(peso, flags) + unidade.encode('ascii'), endereco, ESTADO_OK)
+
+
+def interpretar_resposta(conteudo):
+    """
+    Interpreta o conteúdo de uma resposta (como devolvido pelo SeparadorTelegramas).
+    :return: LeituraSbi com peso, erro ou confirmação (peso None e estavel True), ou None se a resposta
+        não é nenhum dos três (ex.: texto de identificação).
+    """
+    if len(conteudo) < 3:
+        return None
+    codigo, estado = conteudo[1], conteudo[2]
+    if estado != ESTADO_OK:
+        return LeituraSbi(None, '', False, estado)
+    if codigo == COD_PESO:
+        if len(conteudo) < 3 + _PESO.size:
+            return None
+        peso, flags = _PESO.unpack_from(conteudo, 3)
+        unidade = conteudo[3 + _PESO.size:].decode('ascii', errors='replace')
+        return LeituraSbi(peso, unidade, not flags & FLAG_INSTAVEL)
+    if codigo in (COD_TARA, COD_ZERO):
+        return LeituraSbi(None, '', True)
+    return None
+
+
+def codigo_da_resposta(conteudo):
+    return conteudo[1] if len(conteudo) >= 2 else None
+
+
+def texto_da_resposta(conteudo):
+    """Texto de uma resposta de identificação executada, ou None."""
+    if len(conteudo) < 3 or conteudo[1] not in (COD_MODELO, COD_NUMERO_SERIE) or conteudo[2] != ESTADO_OK:
+        return None
+    return conteudo[3:].decode('ascii', errors='replace').strip() or None
+
+
+class SeparadorTelegramas:
+    """
+    Equivalente ao SeparadorQuadros para telegramas com prefixo de comprimento.
+    Um telegrama com verificação errada (bytes corrompidos ou leitura iniciada no meio de um telegrama)
+    é descartado byte a byte até o separador voltar a se sincronizar com o início de um telegrama.
+    """
+
+    def __init__(self, capacidade=4096):
+        self.capacidade = capacidade
+        self._buffer = bytearray()
+
+    def alimentar(self, dados):
+        """Adiciona os bytes recebidos e retorna a lista de telegramas completos (sem comprimento e verificação)."""
+        buffer = self._buffer
+        buffer += dados
+        telegramas = []
+        inicio = 0
+        while inicio < len(buffer):
+            comprimento = buffer[inicio]
+            if not _COMPRIMENTO_MIN <= comprimento <= _COMPRIMENTO_MAX:
+                inicio += 1
+                continue
+            fim = inicio + 1 + comprimento
+            if fim > len(buffer):
+                break  # Telegrama ainda chegando
+            if reduce(xor, buffer[inicio:fim], 0):
+                inicio += 1  # Verificação errada: procura o próximo início possível
+                continue
+            telegramas.append(bytes(buffer[inicio + 1:fim - 1]))
+            inicio = fim
+        if inicio:
+            del buffer[:inicio]
+        if len(buffer) > self.capacidade:
+            del buffer[:len(buffer) - self.capacidade]
+        return telegramas
+
+    def limpar(self):
+        self._buffer.clear()
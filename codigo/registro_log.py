@@ -0,0 +1,94 @@
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from collections import deque
+
+CAPACIDADE_PADRAO = 5000
+ARQUIVO_PADRAO = os.path.join("logs", "leitor_balanca.log")
+
+
+class RegistroLog:
+    """
+    Log da aplicação. As últimas `capacidade` linhas ficam em um buffer circular em memória, de onde
+    a interface lê apenas o trecho visível. O log completo vai para um arquivo rotativo, gravado por
+    uma thread de fundo (QueueHandler/QueueListener) para não bloquear quem registra a mensagem.
+    """
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO, arquivo=ARQUIVO_PADRAO, tamanho_max_bytes=5 * 1024 * 1024,
+                 backups=5):
+        """
+        :param capacidade: Número máximo de linhas mantidas em memória.
+        :param arquivo: Caminho do arquivo de log (None = sem arquivo).
+        :param tamanho_max_bytes: Tamanho a partir do qual o arquivo é rotacionado.
+        :param backups: Quantos arquivos antigos são mantidos (ex.: leitor_balanca.log.1 ... .5).
+        """
+        self._linhas = deque(maxlen=capacidade)
+        self._lock = threading.Lock()
+        self._adicionadas = 0  # Total de linhas já registradas (posição absoluta da próxima linha)
+        self._logger = None
+        self._ouvinte = None
+        self._manipulador_fila = None
+
+        if arquivo:
+            try:
+                pasta = os.path.dirname(arquivo)
+                if pasta and not os.path.exists(pasta):
+                    os.makedirs(pasta)
+                manipulador = logging.handlers.RotatingFileHandler(
+                    arquivo, maxBytes=tamanho_max_bytes, backupCount=backups, encoding='utf-8')
+            except OSError:
+                manipulador = None  # Sem permissão de escrita: segue só com o log em memória
+            if manipulador is not None:
+                manipulador.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                fila = queue.SimpleQueue()
+                self._ouvinte = logging.handlers.QueueListener(fila, manipulador)
+                self._ouvinte.start()
+                self._manipulador_fila = logging.handlers.QueueHandler(fila)
+                self._logger = logging.getLogger(f"{__name__}.{id(self)}")
+                self._logger.propagate = False
+                self._logger.setLevel(logging.INFO)
+                self._logger.addHandler(self._manipulador_fila)
+
+    def adicionar(self, mensagem):
+        """Registra uma mensagem (pode ter várias linhas). Pode ser chamado de qualquer thread."""
+        linhas = mensagem.splitlines() or [""]
+        with self._lock:
+            self._linhas.extend(linhas)
+            self._adicionadas += len(linhas)
+        if self._logger is not None:
+            self._logger.info(mensagem.strip("\n"))
+
+    def __len__(self):
+        return len(self._linhas)
+
+    @property
+    def primeira(self):
+        """Posição absoluta da linha mais antiga ainda em memória."""
+        with self._lock:
+            return self._adicionadas - len(self._linhas)
+
+    @property
+    def total(self):
+        """Posição absoluta depois da última linha (total de linhas já registradas)."""
+        return self._adicionadas
+
+    def janela(self, inicio, quantidade):
+        """Retorna até `quantidade` linhas a partir da posição absoluta `inicio` (ajustada ao que está em memória)."""
+        with self._lock:
+            primeira = self._adicionadas - len(self._linhas)
+            relativo = max(0, inicio - primeira)
+            fim = min(len(self._linhas), relativo + quantidade)
+            return [self._linhas[i] for i in range(relativo, fim)]
+
+    def encerrar(self):
+        """Grava o que ainda está na fila e fecha o arquivo."""
+        if self._ouvinte is not None:
+            self._ouvinte.stop()
+            for manipulador in self._ouvinte.handlers:
+                manipulador.close()
+            self._ouvinte = None
+        if self._logger is not None:
+            self._logger.removeHandler(self._manipulador_fila)
+            self._logger = None
@@ -1,25 +1,54 @@
 import serial
-import serial.tools.list_ports
 import time
-import re
 import threading
+from concurrent.futures import CancelledError
+from perfis_serial import PERFIS, PERFIL_PADRAO
+from drivers_balanca import DRIVERS, PROTOCOLO_PADRAO, MODO_CONSULTA, MODO_CONTINUO, MODO_AUTOMATICO
+from handshake_conexao import HandshakeConexao, ETAPA_CANCELADO
+from buffer_leituras import BufferLeituras
+from estabilidade import DetectorEstabilidade
+from escalonador_comandos import EscalonadorComandos
+
+# Idade máxima (s) de uma leitura estável anterior à tecla para que ela ainda sirva como captura
+IDADE_MAXIMA_CAPTURA = 0.5
 
 class ServicoBalanca:
-    def __init__(self, on_peso_update, on_status_update, on_log, on_connection_loss):
+    def __init__(self, on_peso_update, on_status_update, on_log, on_connection_loss, detector_estabilidade=None,
+                 protocolo=PROTOCOLO_PADRAO):
         """
         Inicializa o serviço da balança.
         :param on_peso_update: Callback para ser chamado quando um novo peso é lido. Ex: fn(peso_float)
         :param on_status_update: Callback para log de status. Ex: fn(mensagem, cor)
         :param on_log: Callback para log geral de eventos. Ex: fn(mensagem)
         :param on_connection_loss: Callback para quando a conexão é perdida. Ex: fn()
+        :param detector_estabilidade: DetectorEstabilidade que decide se cada leitura está estável.
+            None usa apenas o indicador da balança (quadro sem '?').
+        :param protocolo: Nome do driver de protocolo da balança (ver drivers_balanca.DRIVERS).
         """
         self.ser = None
         self.monitorando = False
         self.monitoramento_pausado = False
         self.ultimo_peso_valido = None
         self.leitura_estavel = False
+        self.modo_aquisicao = MODO_CONSULTA
+        self.driver = DRIVERS[protocolo]
+        self.perfil = PERFIS[self.driver.perfil_padrao or PERFIL_PADRAO]
+        # Identificação informada pela balança no handshake (None se ela não responde às consultas)
+        self.identificar_balanca = True
+        self.modelo = None
+        self.numero_serie = None
+        self._leituras_contadas = 0
+        self._inicio_contagem = None
         self._stop_event = threading.Event()
-        self._monitor_thread = None
+        # Dono da porta durante a conexão: todos os comandos e leituras passam por ele
+        self.escalonador = None
+        self.leitor_externo = False
+        # Leituras recentes com o instante de chegada; as capturas são atendidas a partir daqui
+        self.buffer_leituras = BufferLeituras()
+        self.idade_maxima_captura = IDADE_MAXIMA_CAPTURA
+        self.detector_estabilidade = detector_estabilidade or DetectorEstabilidade()
+        # Serializa as escritas na porta quando ela pertence a um leitor externo
+        self._lock_escrita = threading.Lock()
         
         # Callbacks para comunicação com a camada de aplicação
         self.on_peso_update = on_peso_update
@@ -29,64 +58,117 @@ class ServicoBalanca:
 
     @staticmethod
     def listar_portas_disponiveis():
-        """Retorna uma lista de portas seriais disponíveis."""
+        """Retorna uma lista de portas seriais disponíveis (pode demorar: chamar fora da thread da UI)."""
+        import serial.tools.list_ports  # Só aqui: a enumeração carrega módulos que a inicialização não precisa
         portas = serial.tools.list_ports.comports()
         return [p.device for p in portas] if portas else ["Nenhuma"]
 
-    def conectar(self, porta):
-        """Tenta conectar na porta serial especificada e inicia o monitoramento."""
-        if porta in ["Nenhuma", "..."]:
-            return False, "Nenhuma porta selecionada."
+    def conectar(self, porta, modo=MODO_CONSULTA, perfil=None, sondar=False, leitor_externo=False):
+        """
+        Tenta conectar na porta serial especificada e inicia o monitoramento.
+        Bloqueia durante o handshake (até alguns segundos se a balança não responder):
+        na thread da interface, usar conectar_em_segundo_plano().
+        :param modo: MODO_CONSULTA (um pedido a cada leitura), MODO_CONTINUO (a balança envia sozinha) ou
+            MODO_AUTOMATICO (o modo mais rápido do protocolo, com volta ao modo consulta).
+        :param perfil: Nome do perfil de link (ver perfis_serial.PERFIS) usado na conexão (None = padrão do protocolo).
+        :param sondar: Se True, testa todos os perfis e usa o mais rápido que responder.
+        :param leitor_externo: Se True, não cria o escalonador de comandos; os quadros lidos
+            por outro componente (ex.: GerenciadorBalancas) são entregues via processar_quadro().
+        :return: (sucesso, mensagem)
+        """
+        handshake = self._criar_handshake(porta, modo, perfil, sondar)
+        return self._concluir_conexao(handshake.executar(), porta, modo, leitor_externo)
+
+    def conectar_em_segundo_plano(self, porta, on_concluido, modo=MODO_CONSULTA, perfil=None, sondar=False,
+                                  leitor_externo=False, on_progresso=None):
+        """
+        Como conectar(), sem bloquear: o handshake roda em uma thread própria e pode ser cancelado.
+        :param on_concluido: Chamado na thread do handshake ao terminar. Ex: fn(handshake, sucesso, mensagem)
+        :param on_progresso: Chamado a cada etapa do handshake, além do on_status_update. Ex: fn(etapa, mensagem)
+        :return: O HandshakeConexao em andamento (handshake.cancelar() desiste da conexão).
+        """
+        handshake = self._criar_handshake(porta, modo, perfil, sondar, on_progresso)
+        return handshake.iniciar(lambda resultado: on_concluido(
+            handshake, *self._concluir_conexao(resultado, porta, modo, leitor_externo)))
+
+    def _criar_handshake(self, porta, modo, perfil, sondar, on_progresso=None):
+        def progresso(etapa, mensagem):
+            self.on_status_update(mensagem, "orange")
+            if on_progresso:
+                on_progresso(etapa, mensagem)
+        driver = self.driver
+        continuo = modo == MODO_CONTINUO or (modo == MODO_AUTOMATICO and driver.modo_mais_rapido == MODO_CONTINUO)
+        return HandshakeConexao(porta, PERFIS[perfil or driver.perfil_padrao or PERFIL_PADRAO], continuo=continuo,
+                                perfis_sondagem=[PERFIS[nome] for nome in driver.perfis] if sondar else None,
+                                identificar=self.identificar_balanca, on_progresso=progresso, on_log=self.on_log,
+                                driver=driver, automatico=modo == MODO_AUTOMATICO)
+
+    def _concluir_conexao(self, resultado, porta, modo, leitor_externo):
+        """Aplica o resultado do handshake: com sucesso, entrega a porta aberta ao escalonador de comandos."""
+        if not resultado.sucesso:
+            return self._informar_falha_conexao(resultado, porta)
 
+        modo = MODO_CONTINUO if resultado.continuo else MODO_CONSULTA  # No automático, o que o handshake obteve
         self._stop_event.clear()
         self.monitoramento_pausado = False
+        self.modo_aquisicao = modo
+        self.leitor_externo = leitor_externo
+        self.buffer_leituras.limpar()
+        self.detector_estabilidade.reiniciar()
+        self.ser = resultado.ser
+        self.perfil = resultado.perfil
+        self.modelo = resultado.modelo
+        self.numero_serie = resultado.numero_serie
 
-        try:
-            self.ser = serial.Serial(porta, 1200, bytesize=7, parity='O', stopbits=1, timeout=0.5)
-
-            # Testa por erro 30 antes de prosseguir
-            erro30, resp = self._verificar_erro_30()
-            if erro30:
-                msg = (f"ATENÇÃO: Possível 'Erro 30' detectado na balança.\n\n"
-                       "Este erro impede a comunicação e a leitura de pesos.\n\n"
-                       "Para resolver:\n"
-                       "1. Pressione o botão 📄 PRINT (ou ESC) no painel da balança.\n"
-                       "2. Se o erro persistir, consulte o manual do aplicativo para mais instruções.\n\n"
-                       f"Detalhes: {resp}")
-                self.on_log(f"Conexão cancelada: erro 30 detectado na {porta}.")
-                if self.ser: self.ser.close()
-                self.ser = None
-                return False, msg
-
-            # Inicia o monitoramento em uma thread
-            self.monitorando = True
-            self._monitor_thread = threading.Thread(target=self._thread_monitoramento, daemon=True)
-            self._monitor_thread.start()
-            
-            self.on_status_update(f"Conectado em {porta}", "#00FF00")
-            self.on_log("Conectado! Pode iniciar as leituras.")
-            return True, "Conectado com sucesso."
-
-        except Exception as e:
-            msg = (f"Não foi possível conectar à porta {porta}.\n\n"
-                   "Possíveis causas:\n"
-                   "1. A balança não está conectada ao computador.\n"
-                   "2. Outro software está usando a mesma porta.\n"
-                   "3. Ocorreu um 'Erro 30' interno na balança.\n\n"
-                   "Solução para 'Erro 30':\n"
-                   "1. Aperte o botão 📄 PRINT (ou ESC) na balança.\n"
-                   "2. Consulte o manual do aplicativo para mais detalhes.\n\n"
-                   f"Erro técnico: {e}")
-            self.on_log(f"Falha na conexão com {porta}: {e}")
-            return False, msg
+        # O escalonador passa a ser o único a ler e escrever na porta (consulta periódica, capturas, tara)
+        self._leituras_contadas = 0
+        self._inicio_contagem = time.perf_counter()
+        self.monitorando = True
+        if not leitor_externo:
+            self.escalonador = EscalonadorComandos(self.ser, self.processar_quadro, self._on_falha_porta, self.on_log,
+                                                   continuo=modo == MODO_CONTINUO, driver=self.driver)
+            self.escalonador.iniciar()
+        return self._informar_conexao(resultado, porta)
+
+    def _informar_falha_conexao(self, resultado, porta):
+        """Informa o handshake que não terminou em conexão. Retorna (False, mensagem)."""
+        if resultado.etapa == ETAPA_CANCELADO:
+            self.on_status_update("Conexão cancelada", "gray")
+            self.on_log(f"Conexão com {porta} cancelada.")
+        else:
+            self.on_status_update(resultado.mensagem.splitlines()[0], "red")
+        return False, resultado.mensagem
+
+    def _informar_conexao(self, resultado, porta):
+        """Informa a conexão estabelecida (identificação, modo e tempos do handshake). Retorna (True, mensagem)."""
+        if self.modelo:
+            self.on_log(f"Balança: {self.modelo}" + (f", nº de série {self.numero_serie}." if self.numero_serie else "."))
+        descricao_modo = "contínuo" if resultado.continuo else "consulta"
+        self.on_status_update(f"Conectado em {porta} ({self.driver.descricao}, modo {descricao_modo})", "#00FF00")
+        etapas = ", ".join(f"{etapa} {segundos * 1000:.0f} ms" for etapa, segundos in resultado.tempos.items())
+        self.on_log(f"Handshake em {resultado.duracao * 1000:.0f} ms ({etapas}).")
+        self.on_log("Conectado! Pode iniciar as leituras.")
+        return True, "Conectado com sucesso."
 
     def desconectar(self):
         """Encerra a conexão serial e o monitoramento."""
+        taxa = self.get_taxa_leituras()
+        if taxa is not None:
+            self.on_log(f"Perfil {self.perfil.nome}: média de {taxa:.1f} leituras/s nesta conexão.")
+            self._registrar_metricas_estabilidade()
+        self._inicio_contagem = None
         self.monitorando = False
         self._stop_event.set()
-        if self._monitor_thread and self._monitor_thread.is_alive():
-            self._monitor_thread.join(timeout=1.0)
-        self._monitor_thread = None
+        if self.escalonador is not None:
+            self.escalonador.parar()
+            self._registrar_metricas_comandos(self.escalonador.get_metricas())
+        self.escalonador = None
+
+        if self.ser and self.ser.is_open and self.modo_aquisicao == MODO_CONTINUO and self.driver.cmd_desligar_fluxo:
+            try:
+                self.ser.write(self.driver.cmd_desligar_fluxo)  # Devolve a balança ao modo consulta
+            except (serial.SerialException, OSError):
+                pass
 
         if self.ser and self.ser.is_open:
             self.ser.close()
@@ -95,136 +177,182 @@ class ServicoBalanca:
         self.on_status_update("Desconectado", "gray")
         self.on_log("Desconectado.")
 
-    def _thread_monitoramento(self):
-        """Loop que roda em background para ler o peso da balança."""
-        while not self._stop_event.is_set() and self.monitorando and self.ser and self.ser.is_open:
-            if self.monitoramento_pausado:
-                time.sleep(0.5)
-                continue
-            try:
-                self.ser.reset_input_buffer()
-                self.ser.write(b'\x1bP\r\n') 
-                linha = self.ser.readline().decode('ascii', errors='ignore')
-
-                if not self.monitorando or self._stop_event.is_set():
-                    break
-
-                # A balança Sartorius geralmente indica estabilidade com um espaço antes do sinal.
-                # Uma leitura instável pode ter '?' ou outro caractere.
-                # Regex para capturar um valor que parece estável (começa com espaços/sinal).
-                match = re.search(r"([-+ ]\s*(\d+\.\d+))", linha)
-                if match:
-                    peso_str = match.group(2) # Captura apenas o número
-                    self.ultimo_peso_valido = float(peso_str)
-                    self.leitura_estavel = '?' not in linha # Simples verificação de estabilidade
-                    # Notifica a aplicação principal sobre o novo peso
-                    if self.on_peso_update:
-                        self.on_peso_update(self.ultimo_peso_valido, self.leitura_estavel)
-                else:
-                    self.leitura_estavel = False
-                    # Notifica a UI sobre a instabilidade, mesmo sem um novo peso válido.
-                    if self.on_peso_update:
-                        self.on_peso_update(self.ultimo_peso_valido, self.leitura_estavel)
-
-                time.sleep(0.2)
-            except (serial.SerialException, OSError) as e:
-                self.on_log(f"ERRO: A porta serial foi desconectada ou falhou: {e}")
-                if self.on_connection_loss:
-                    self.on_connection_loss()
-                break # Encerra o loop
-            except Exception as e:
-                self.on_log(f"ERRO inesperado no monitoramento: {e}")
-                time.sleep(1)
+    def _on_falha_porta(self, erro):
+        """Chamado pelo escalonador (na thread dele) quando a porta cai."""
+        self.on_log(f"ERRO: A porta serial foi desconectada ou falhou: {erro}")
+        if self.on_connection_loss:
+            self.on_connection_loss()
+
+    def processar_quadro(self, quadro):
+        """Publica um quadro recebido pelo escalonador ou por um leitor externo (ver parâmetro leitor_externo)."""
+        if self.monitorando and not self.monitoramento_pausado:
+            self._publicar_leitura(self.driver.interpretar_quadro(quadro))
+
+    def _publicar_leitura(self, leitura):
+        """Atualiza o estado com a leitura interpretada e notifica a aplicação."""
+        instante = time.monotonic()
+        peso = leitura.peso if leitura is not None else None
+        # A balança sinaliza instabilidade com '?' no quadro; o detector pode combinar isso com a janela de leituras.
+        self.leitura_estavel = self._avaliar_estabilidade(leitura, instante)
+        if peso is not None:
+            self.ultimo_peso_valido = peso
+            self._leituras_contadas += 1
+        # Sem um novo peso válido, a UI é notificada da instabilidade mesmo assim.
+
+        self.buffer_leituras.registrar(peso, self.leitura_estavel, instante)
+
+        if self.on_peso_update:
+            self.on_peso_update(self.ultimo_peso_valido, self.leitura_estavel)
+
+    def _avaliar_estabilidade(self, leitura, instante):
+        if leitura is None or leitura.peso is None:
+            return self.detector_estabilidade.adicionar(None, False, instante)
+        return self.detector_estabilidade.adicionar(leitura.peso, leitura.estavel, instante)
+
+    def _registrar_metricas_estabilidade(self):
+        for fonte, metrica in self.detector_estabilidade.get_metricas().items():
+            if metrica["quantidade"]:
+                self.on_log(f"Tempo até estabilizar ({fonte}): média de {metrica['media']:.2f} s "
+                            f"(mín. {metrica['minimo']:.2f} s, máx. {metrica['maximo']:.2f} s) "
+                            f"em {metrica['quantidade']} estabilizações.")
 
-    def get_leitura_instantanea(self):
+    def _registrar_metricas_comandos(self, metricas):
+        for nome, metrica in metricas['rtt_ms'].items():
+            if metrica["quantidade"]:
+                self.on_log(f"Tempo de resposta ({nome}): média de {metrica['media']:.1f} ms "
+                            f"(mín. {metrica['minimo']:.1f} ms, máx. {metrica['maximo']:.1f} ms) "
+                            f"em {metrica['quantidade']} comandos.")
+        if metricas['sem_resposta']:
+            self.on_log(f"{metricas['sem_resposta']} comando(s) sem resposta da balança no prazo.")
+
+    def get_leitura_instantanea(self, instante=None, timeout=3.0):
         """
-        Tenta obter uma leitura estável da balança por até 3 segundos, com intervalos de 0.3s.
+        Obtém uma leitura estável a partir das leituras já publicadas pelo monitoramento.
+        Retorna a primeira leitura estável recebida a partir de `instante` ou, se não houver, a última leitura
+        anterior a ele, desde que estável e com no máximo `idade_maxima_captura` segundos.
+        No modo consulta, se ainda não há leitura que sirva, pede uma ao escalonador com prioridade de captura
+        (à frente da consulta periódica).
+        :param instante: Momento da solicitação em time.monotonic() (ex.: quando a tecla foi pressionada).
+            None usa o momento da chamada.
+        :param timeout: Tempo máximo de espera por uma leitura estável.
         Retorna (peso, True) se conseguir, ou (None, False) caso contrário.
         """
         if self._stop_event.is_set() or not self.ser or not self.ser.is_open:
             return None, False
+        if instante is None:
+            instante = time.monotonic()
+
+        escalonador = self.escalonador
+        if escalonador is not None and self.modo_aquisicao == MODO_CONSULTA:
+            if self.monitoramento_pausado:
+                # Com o monitor parado não chegam leituras novas: consulta a balança diretamente.
+                return self._consultar_estavel(escalonador, timeout)
+            if self.buffer_leituras.buscar_estavel(instante, self.idade_maxima_captura) is None:
+                escalonador.imprimir()
 
-        end_time = time.time() + 3.0
-        while time.time() < end_time:
+        encontrada = self.buffer_leituras.aguardar_estavel(instante, self.idade_maxima_captura, timeout)
+        if encontrada is None:
+            return None, False # Falha: Tempo esgotado sem leitura estável
+        return encontrada[1], True
+
+    def _consultar_estavel(self, escalonador, timeout):
+        """Pede leituras (ESC P) até obter uma estável (usado apenas com o monitoramento pausado)."""
+        fim = time.monotonic() + timeout
+        while True:
+            restante = fim - time.monotonic()
+            if restante <= 0:
+                return None, False
             try:
-                self.ser.reset_input_buffer()
-                self.ser.write(b'\x1bP\r\n')
-                linha = self.ser.readline().decode('ascii', errors='ignore')
-
-                match = re.search(r"([-+ ]\s*(\d+\.\d+))", linha)
-                if match:
-                    peso_str = match.group(2)
-                    peso = float(peso_str)
-                    estavel = '?' not in linha
-                    if estavel:
-                        return peso, True # Sucesso! Retorna a leitura estável.
-            except (serial.SerialException, OSError, Exception) as e:
+                resultado = escalonador.imprimir(publicar=False, timeout=restante).result()
+            except CancelledError:
+                return None, False
+            except (serial.SerialException, OSError) as e:
                 self.on_log(f"ERRO ao obter leitura instantânea: {e}")
-                return None, False # Falha crítica na comunicação
-            time.sleep(0.3) # Aguarda antes da próxima tentativa
-        
-        return None, False # Falha: Tempo esgotado sem leitura estável
+                return None, False
+            if self._avaliar_estabilidade(resultado.leitura, time.monotonic()):
+                return resultado.leitura.peso, True
+            time.sleep(escalonador.intervalo_consulta)
 
-    def _verificar_erro_30(self, timeout=3.0):
-        """Verifica se a balança responde com erro 30. Lógica interna."""
-        if self._stop_event.is_set() or not self.ser or not self.ser.is_open:
-            return (False, '')
+    def escrever(self, dados):
+        """Escreve na porta serial de um leitor externo sem intercalar com as escritas das outras threads."""
+        with self._lock_escrita:
+            self.ser.write(dados)
 
-        try:
-            self.ser.reset_input_buffer()
-            self.ser.write(b'\x1bP\r\n')
-        except Exception:
-            return (False, '')
-
-        fim = time.time() + timeout
-        linhas = []
-        peso_lido = False
-        
-        while time.time() < fim:
-            try:
-                if self.ser.in_waiting > 0:
-                    raw = self.ser.readline()
-                    texto = raw.decode('ascii', errors='ignore').strip()
-                    if texto:
-                        linhas.append(texto)
-                        # Regex corrigida para evitar "FutureWarning: Possible nested set".
-                        # A regex agora procura 'err' ou 'error', seguido por caracteres separadores (espaço, :, -), e então '30'.
-                        if re.search(r'(?i)(err(or)?\s*[:\-\s]*\s*30)', texto) or (texto.isdigit() and int(texto) == 30):
-                            return (True, f"Código 30 detectado: {texto}")
-                        if re.search(r"[-+]?\s*\d+\.\d+", texto):
-                            peso_lido = True
-                            return (False, '')
-            except:
-                break
-        
-        if not peso_lido:
-            resposta = "\\n".join(linhas) if linhas else "(sem resposta da balança)"
-            return (True, f"Balança não forneceu leitura válida. Possível erro 30. Respostas: {resposta}")
-        
-        return (False, '')
+    def tarar(self, timeout=5.0):
+        """
+        Envia a tara pelo escalonador, à frente das leituras pendentes.
+        :return: concurrent.futures.Future com o ResultadoComando (confirmado e rtt), ou None se desconectado
+            ou se a porta pertence a um leitor externo.
+        """
+        if self.escalonador is None or not self.is_connected():
+            return None
+        return self.escalonador.tarar(timeout)
 
-    def enviar_comando_tara(self):
-        """Envia o comando para tarar/zerar a balança."""
-        if self.ser and self.ser.is_open:
+    def enviar_comando_tara(self, timeout=5.0):
+        """
+        Envia o comando para tarar/zerar a balança e aguarda a confirmação (bloqueia até `timeout` s).
+        Com leitor externo, apenas escreve o comando. Retorna True se a tara foi confirmada (ou escrita).
+        """
+        if not self.ser or not self.ser.is_open:
+            return False
+        if self.leitor_externo:
             try:
-                self.ser.write(b'\x1bf4_\r\n') 
+                self.escrever(self.driver.cmd_tara)
                 self.on_log("\nComando de TARA enviado.\n")
                 return True
             except Exception as e:
                 self.on_log(f"Erro ao enviar comando de tara: {e}")
                 return False
+        futuro = self.tarar(timeout)
+        try:
+            resultado = futuro.result() if futuro is not None else None
+        except (CancelledError, serial.SerialException, OSError) as e:
+            self.on_log(f"Erro ao enviar comando de tara: {e or 'conexão encerrada'}")
+            return False
+        return self.registrar_tara(resultado)
+
+    def zerar(self, timeout=5.0):
+        """Como tarar(), para o comando de zero do protocolo."""
+        if self.escalonador is None or not self.is_connected():
+            return None
+        return self.escalonador.zerar(timeout)
+
+    def registrar_tara(self, resultado):
+        """Registra no log o ResultadoComando de uma tara. Retorna True se ela foi confirmada."""
+        if resultado is None:
+            return False
+        if resultado.confirmado:
+            self.on_log(f"\nTARA confirmada pela balança em {resultado.rtt * 1000:.0f} ms.\n")
+            return True
+        if resultado.quadro is None:
+            self.on_log("Tara sem confirmação: a balança não respondeu no prazo.")
+        elif resultado.leitura is not None and resultado.leitura.erro is not None:
+            self.on_log(f"Tara não executada: {self.driver.descrever_erro(resultado.leitura.erro)}.")
+        else:
+            self.on_log(f"Tara sem confirmação: resposta {self.driver.exibir_quadro(resultado.quadro)!r}.")
         return False
-        
+
     def pausar_monitoramento(self):
         """Pausa a leitura contínua da balança."""
         self.monitoramento_pausado = True
+        if self.escalonador is not None:
+            self.escalonador.definir_consulta(False)
 
     def retomar_monitoramento(self):
         """Retoma a leitura contínua da balança."""
         self.monitoramento_pausado = False
+        if self.escalonador is not None:
+            self.escalonador.definir_consulta(True)
 
     def is_connected(self):
         return self.ser is not None and self.ser.is_open and not self._stop_event.is_set()
 
+    def get_taxa_leituras(self):
+        """Leituras válidas por segundo desde o início da conexão (None se desconectado)."""
+        if self._inicio_contagem is None:
+            return None
+        decorrido = time.perf_counter() - self._inicio_contagem
+        return self._leituras_contadas / decorrido if decorrido > 0 else 0.0
+
     def get_ultimo_peso(self):
         return self.ultimo_peso_valido
\ No newline at end of file
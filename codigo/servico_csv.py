@@ -1,30 +1,150 @@
 import csv
 import os
+import threading
+import time
 from datetime import datetime
+from functools import lru_cache
+from sessao_colunar import SessaoColunar, TIPOS_AMOSTRA
+from sessao_binaria import ArquivoSessao, EXTENSAO_SESSAO
+from indice_csv import IndiceCsv
+from estatisticas import EstatisticaCorrente
+
+# Modos de armazenamento suportados pelo serviço.
+# - MODO_DIARIO: cada captura é apenas anexada (com fsync) a um arquivo de sessão binário ao lado do CSV
+#   (sessao_binaria). O CSV com o rodapé de estatísticas só é reescrito ao fechar ou exportar o ensaio.
+# - MODO_ATOMICO: comportamento antigo, relê e reescreve o CSV inteiro a cada captura.
+MODO_DIARIO = "diario"
+MODO_ATOMICO = "atomico"
+
+# Diário em texto (tipo;peso;data;hora;fim_lote) das versões anteriores, migrado para o arquivo de sessão
+EXTENSAO_DIARIO = ".diario"
+
+# Linhas de dados formatadas por vez na exportação (múltiplo de 4, o tamanho do grupo no CSV).
+_BLOCO_EXPORTACAO = 4096
+
+# Coluna do peso de cada tipo de amostra no CSV (a hora fica na coluna seguinte)
+_POSICOES_CSV = (('Padrao (A)', 3), ('Cliente (B)', 6), ('Generico', 9))
+
+
+def _formatar_peso(peso):
+    """Peso como gravado no CSV (decimal com vírgula)."""
+    return str(peso).replace('.', ',')
+
+
+def _ler_peso(peso_str):
+    return float(peso_str.replace(',', '.'))
+
+
+@lru_cache(maxsize=4096)
+def _instante_de(data_str, hora_str):
+    """Converte data (dd/mm/aaaa) e hora (HH:MM:SS) do diário/CSV em epoch (hora local)."""
+    try:
+        dia, mes, ano = (int(x) for x in data_str.split('/'))
+        horas, minutos, segundos = (int(x) for x in hora_str.split(':'))
+        return time.mktime((ano, mes, dia, horas, minutos, segundos, 0, 0, -1))
+    except (ValueError, OverflowError):
+        return time.time()
+
+
+@lru_cache(maxsize=4096)
+def _data_hora_de(segundo):
+    """Retorna (data_str, hora_str) de um instante epoch em segundos inteiros (hora local)."""
+    local = time.localtime(segundo)
+    return time.strftime("%d/%m/%Y", local), time.strftime("%H:%M:%S", local)
+
+
+@lru_cache(maxsize=256)
+def _segundo_do_dia_local(hora_utc):
+    """Segundo do dia (hora local) no início de uma hora UTC (epoch // 3600)."""
+    local = time.localtime(hora_utc * 3600)
+    return local.tm_hour * 3600 + local.tm_min * 60 + local.tm_sec
+
+
+_TEXTO_MINUTO = [f"{minuto // 60:02d}:{minuto % 60:02d}:" for minuto in range(24 * 60)]
+_TEXTO_SEGUNDO = [f"{segundo:02d}" for segundo in range(60)]
+
+
+def _hora_de(instante):
+    """Hora local (HH:MM:SS) de um instante epoch, sem chamar localtime/strftime a cada medida."""
+    segundo = int(instante)
+    segundo_do_dia = (_segundo_do_dia_local(segundo // 3600) + segundo % 3600) % 86400
+    return _TEXTO_MINUTO[segundo_do_dia // 60] + _TEXTO_SEGUNDO[segundo_do_dia % 60]
+
+
+def _formatar_pesos(pesos):
+    """Formata um bloco de pesos de uma vez (equivale a _formatar_peso em cada um)."""
+    if not pesos:
+        return []
+    return ';'.join(map(repr, pesos)).replace('.', ',').split(';')
+
+
+class _EstadoEnsaio:
+    """Estado em memória de um ensaio aberto no modo diário. As medidas ficam em uma SessaoColunar."""
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.caminho_diario = arquivo + EXTENSAO_DIARIO
+        self.arquivo_sessao = ArquivoSessao(arquivo + EXTENSAO_SESSAO)
+        self.sessao = SessaoColunar()
+        self.cabecalho1 = []
+        self.cabecalho2 = []
+        self.data_inicio = None
+        self.ultima_hora = None
+        self.ultimo_lote = False
+
+    def aplicar(self, tipo, peso, instante, fim_lote):
+        """Aplica uma medida ao estado (usado na gravação e na recuperação do diário em texto)."""
+        self.sessao.adicionar(tipo, peso, instante)
+        self.marcar_periodo(instante, instante, fim_lote)
+
+    def marcar_periodo(self, primeiro_instante, ultimo_instante, fim_lote):
+        """Atualiza a data/hora exibidas na primeira linha do CSV (início do ensaio e última medida)."""
+        if self.data_inicio is None:
+            self.data_inicio = _data_hora_de(int(primeiro_instante))[0]
+        self.ultima_hora = _hora_de(ultimo_instante)
+        self.ultimo_lote = fim_lote
+
+    @property
+    def estatisticas(self):
+        return self.sessao.estatisticas()
+
+    def contagens(self):
+        return self.sessao.contagem('Padrao (A)'), self.sessao.contagem('Cliente (B)')
+
 
 class ServicoCsv:
-    def __init__(self, on_log):
+    def __init__(self, on_log, modo=MODO_DIARIO):
         """
         Inicializa o serviço de CSV.
         :param on_log: Callback para log de eventos. Ex: fn(mensagem)
+        :param modo: MODO_DIARIO (padrão, append-only) ou MODO_ATOMICO (reescrita a cada captura).
         """
         self.on_log = on_log
+        self.modo = modo
+        self._ensaios = {}  # caminho do CSV -> _EstadoEnsaio
+        # Serializa o acesso aos ensaios (capturas de várias balanças podem salvar ao mesmo tempo)
+        self._lock = threading.RLock()
 
     def _get_caminho_arquivo(self, nome_ensaio):
         """Constrói o caminho completo do arquivo CSV."""
         pasta = "dados coletados"
         if not os.path.exists(pasta):
             os.makedirs(pasta)
-        
+
         nome_base = nome_ensaio.strip() or f"ensaio_{datetime.now().strftime('%Y-%m-%d')}"
         if not nome_base.lower().endswith(".csv"):
             nome_base += ".csv"
-            
+
         return os.path.join(pasta, nome_base)
 
     def abrir_no_explorer(self, nome_ensaio):
         """Abre o arquivo CSV no programa padrão (como Excel)."""
         arquivo = self._get_caminho_arquivo(nome_ensaio)
+        # No modo diário o CSV só é atualizado na exportação; garante que esteja em dia.
+        if arquivo in self._ensaios:
+            erro = self.exportar(nome_ensaio)
+            if erro:
+                return False, erro
         if os.path.exists(arquivo):
             try:
                 os.startfile(arquivo)
@@ -34,134 +154,427 @@ class ServicoCsv:
         else:
             return False, "Arquivo ainda não existe. Salve uma medição primeiro."
 
-    def salvar_lote_medidas(self, nome_ensaio, pesos_A, pesos_B):
-        """Salva um lote de medidas, adicionando uma linha em branco no final."""
+    def salvar_lote_medidas(self, nome_ensaio, pesos_A, pesos_B, instantes_A=None, instantes_B=None):
+        """
+        Salva um lote de medidas, adicionando uma linha em branco no final.
+        :param instantes_A: Instantes (epoch) das capturas de A, na mesma ordem dos pesos. None usa o momento atual.
+        :param instantes_B: Idem para B.
+        """
         pesos_por_tipo = {
             'Padrao (A)': pesos_A,
             'Cliente (B)': pesos_B
         }
-        return self._salvar_medidas(nome_ensaio, pesos_por_tipo, adicionar_linha_branca=True)
+        instantes_por_tipo = {
+            'Padrao (A)': instantes_A,
+            'Cliente (B)': instantes_B
+        }
+        return self._salvar_medidas(nome_ensaio, pesos_por_tipo, adicionar_linha_branca=True,
+                                    instantes_por_tipo=instantes_por_tipo)
+
+    def salvar_lote(self, nome_ensaio, lote):
+        """Salva as colunas A e B de um lote em andamento (SessaoColunar), com os instantes das capturas."""
+        coluna_A, coluna_B = lote.coluna('Padrao (A)'), lote.coluna('Cliente (B)')
+        return self.salvar_lote_medidas(nome_ensaio, coluna_A.pesos, coluna_B.pesos,
+                                        coluna_A.instantes, coluna_B.instantes)
 
     def salvar_medida(self, nome_ensaio, tipo_amostra, peso_valido):
         """
-        Salva uma nova medida no arquivo CSV.
-        Esta função lê o arquivo existente, adiciona a nova medida,
-        recalcula as estatísticas e reescreve o arquivo de forma atômica.
+        Salva uma nova medida do ensaio.
+        No modo diário a medida é apenas anexada ao diário; no modo atômico
+        o arquivo é relido, as estatísticas recalculadas e o CSV reescrito.
         """
         if peso_valido is None:
             return None, None, "Peso inválido fornecido."
         return self._salvar_medidas(nome_ensaio, {tipo_amostra: [peso_valido]})
 
-    def _salvar_medidas(self, nome_ensaio, pesos_por_tipo, adicionar_linha_branca=False):
+    def _salvar_medidas(self, nome_ensaio, pesos_por_tipo, adicionar_linha_branca=False, instantes_por_tipo=None):
         """
-        Lógica central para salvar uma ou mais medidas no arquivo CSV.
+        Lógica central para salvar uma ou mais medidas.
         :param pesos_por_tipo: Um dicionário {'Tipo Amostra': [lista de pesos]}.
         :param adicionar_linha_branca: Se True, adiciona uma linha vazia após as medições.
+        :param instantes_por_tipo: Opcional, {'Tipo Amostra': [instantes epoch]}; na falta, usa o momento atual.
         """
-        if not any(pesos_por_tipo.values()):
+        if not any(len(pesos) for pesos in pesos_por_tipo.values()):
             return None, None, "Nenhum peso válido fornecido para salvar."
 
+        agora = time.time()
+        medidas = []  # (tipo, peso, instante)
+        for tipo_amostra, lista_pesos in pesos_por_tipo.items():
+            instantes = (instantes_por_tipo or {}).get(tipo_amostra)
+            for i, peso in enumerate(lista_pesos):
+                medidas.append((tipo_amostra, float(peso), instantes[i] if instantes is not None else agora))
+
+        try:
+            contagem_A, contagem_B = self.gravar_medidas(nome_ensaio, medidas, adicionar_linha_branca)
+            return contagem_A, contagem_B, None
+        except Exception as e:
+            return None, None, self.descrever_erro(nome_ensaio, e)
+
+    def gravar_medidas(self, nome_ensaio, medidas, fim_lote=False):
+        """
+        Grava medidas no ensaio e retorna (contagem_A, contagem_B).
+        Diferente de salvar_medida/salvar_lote_medidas, as falhas são lançadas (PermissionError, OSError...),
+        para quem decide se tenta de novo (ex.: GravadorCsv). Use descrever_erro() para a mensagem ao usuário.
+        :param medidas: Lista de (tipo, peso, instante epoch), na ordem das capturas.
+        :param fim_lote: Se True, adiciona uma linha vazia após as medições.
+        """
+        if not medidas:
+            raise ValueError("Nenhum peso válido fornecido para salvar.")
+        with self._lock:
+            if self.modo == MODO_ATOMICO:
+                return self._salvar_medidas_atomico(nome_ensaio, medidas, fim_lote)
+            return self._salvar_medidas_diario(nome_ensaio, medidas, fim_lote)
+
+    def descrever_erro(self, nome_ensaio, erro):
+        """Mensagem para o usuário sobre uma falha de gravação do ensaio."""
+        nome_arquivo = os.path.basename(self._get_caminho_arquivo(nome_ensaio))
+        if isinstance(erro, PermissionError):
+            if self.modo == MODO_ATOMICO:
+                return f"Não foi possível salvar o arquivo '{nome_arquivo}'.\n\nVerifique se ele não está aberto em outro programa (como o Excel) e tente novamente."
+            return f"Não foi possível gravar a sessão do ensaio '{nome_arquivo}'.\n\nVerifique as permissões da pasta e tente novamente."
+        if isinstance(erro, ValueError):
+            return str(erro)
+        self.on_log(f"ERRO ao salvar medida: {erro}")
+        return f"Ocorreu um erro inesperado ao salvar o arquivo:\n\n{erro}"
+
+    # --- MODO DIÁRIO (append-only) ---
+    def _salvar_medidas_diario(self, nome_ensaio, medidas, adicionar_linha_branca):
+        """Anexa as novas medidas à sessão do ensaio e atualiza o estado em memória."""
+        arquivo = self._get_caminho_arquivo(nome_ensaio)
+        estado = self._abrir_ensaio(arquivo)
+
+        # Grava apenas os registros novos e força a ida ao disco antes de atualizar a memória.
+        estado.arquivo_sessao.anexar(medidas, fim_lote=adicionar_linha_branca)
+        ultima = len(medidas) - 1
+        for i, (tipo, peso, instante) in enumerate(medidas):
+            estado.aplicar(tipo, peso, instante, adicionar_linha_branca and i == ultima)
+
+        self.on_log(f"Lote de {len(medidas)} medida(s) registrado na sessão de {os.path.basename(arquivo)}")
+        return estado.contagens()
+
+    def _abrir_ensaio(self, arquivo):
+        """Retorna o estado do ensaio, recuperando-o da sessão binária (ou do CSV legado) se necessário."""
+        estado = self._ensaios.get(arquivo)
+        if estado is not None:
+            return estado
+
+        estado = _EstadoEnsaio(arquivo)
+        arquivo_sessao = estado.arquivo_sessao
+        if len(arquivo_sessao):
+            # Ensaio não fechado (ex.: queda do programa): a sessão binária tem todas as medidas.
+            # Uma sessão sem registros (queda logo após criá-la) não tem nada a recuperar e é ignorada.
+            arquivo_sessao.abrir()
+            if arquivo_sessao.bytes_descartados:
+                self.on_log("Aviso: último registro incompleto da sessão descartado.")
+            estado.sessao, primeiro, ultimo, fim_lote = arquivo_sessao.carregar()
+            if primeiro is not None:
+                estado.marcar_periodo(primeiro, ultimo, fim_lote)
+            self.on_log(f"Ensaio {os.path.basename(arquivo)} recuperado da sessão ({estado.sessao.total()} medida(s)).")
+        elif os.path.exists(estado.caminho_diario):
+            # Diário em texto de uma versão anterior: recupera e migra para a sessão binária.
+            recuperadas = self._recuperar_diario(estado)
+            self._semear_sessao(estado)
+            os.remove(estado.caminho_diario)
+            self.on_log(f"Ensaio {os.path.basename(arquivo)} recuperado do diário ({recuperadas} medida(s)).")
+        elif os.path.exists(arquivo):
+            # CSV criado no modo antigo (ou já fechado): semeia a sessão com uma única leitura.
+            estado.cabecalho1, estado.cabecalho2, estado.sessao, estado.data_inicio = self._ler_csv_existente(arquivo)
+            if estado.sessao.total():
+                ultimo = max(coluna.instantes[-1] for coluna in estado.sessao.colunas.values() if len(coluna))
+                estado.marcar_periodo(ultimo, ultimo, False)
+            self._semear_sessao(estado)
+
+        self._ensaios[arquivo] = estado
+        return estado
+
+    @staticmethod
+    def _semear_sessao(estado):
+        """Grava na sessão binária todas as medidas já carregadas no estado (coluna por coluna)."""
+        medidas = estado.sessao.medidas()
+        if medidas:
+            estado.arquivo_sessao.anexar(medidas, fim_lote=estado.ultimo_lote)
+
+    def _recuperar_diario(self, estado):
+        """Reconstrói o estado a partir de um diário em texto, descartando uma última linha incompleta."""
+        with open(estado.caminho_diario, 'rb') as f:
+            conteudo = f.read()
+
+        fim_valido = conteudo.rfind(b'\n') + 1
+        if fim_valido < len(conteudo):
+            # Queda durante a escrita: a última linha ficou pela metade.
+            with open(estado.caminho_diario, 'r+b') as f:
+                f.truncate(fim_valido)
+            self.on_log("Aviso: última entrada incompleta do diário descartada.")
+
+        recuperadas = 0
+        hoje = datetime.now().strftime("%d/%m/%Y")
+        linhas = conteudo[:fim_valido].decode('utf-8').splitlines()
+        for linha in csv.reader(linhas, delimiter=';'):
+            if len(linha) != 5 or linha[0] not in estado.sessao.colunas:
+                continue
+            tipo, peso_str, data_str, hora_str, fim_lote = linha
+            # Diários antigos não têm a data das medidas vindas de um CSV legado: usa a do ensaio (ou hoje).
+            instante = _instante_de(data_str or estado.data_inicio or hoje, hora_str)
+            estado.aplicar(tipo, _ler_peso(peso_str), instante, fim_lote == '1')
+            recuperadas += 1
+        return recuperadas
+
+    def get_estatisticas(self, nome_ensaio):
+        """
+        Retorna {tipo: EstatisticaCorrente} do ensaio, abrindo-o (e recuperando o diário) se necessário.
+        Disponível apenas no modo diário; no modo atômico retorna None.
+        """
+        with self._lock:
+            if self.modo == MODO_ATOMICO:
+                return None
+            return self._abrir_ensaio(self._get_caminho_arquivo(nome_ensaio)).estatisticas
+
+    def get_resumo(self, nome_ensaio):
+        """
+        Retorna (contagem_A, contagem_B, estatisticas) de um ensaio já existente, sem reler o CSV:
+        um ensaio aberto (ou com sessão pendente) vem da memória/sessão; um CSV fechado vem do
+        índice ao lado dele, reconstruído em uma única passada se estiver desatualizado.
+        Ensaio inexistente (ou ilegível): (0, 0, None).
+        """
+        with self._lock:
+            arquivo = self._get_caminho_arquivo(nome_ensaio)
+            try:
+                if self.modo == MODO_DIARIO and (arquivo in self._ensaios
+                                                 or os.path.exists(arquivo + EXTENSAO_SESSAO)
+                                                 or os.path.exists(arquivo + EXTENSAO_DIARIO)):
+                    estado = self._abrir_ensaio(arquivo)
+                    contagem_A, contagem_B = estado.contagens()
+                    return contagem_A, contagem_B, estado.estatisticas
+                if not os.path.exists(arquivo):
+                    return 0, 0, None
+                indice = IndiceCsv.carregar(arquivo)
+                if indice is None:
+                    indice = self._reconstruir_indice(arquivo)
+                    self.on_log(f"Índice de {os.path.basename(arquivo)} reconstruído.")
+                return indice.contagem('Padrao (A)'), indice.contagem('Cliente (B)'), indice.estatisticas
+            except Exception as e:
+                self.on_log(f"ERRO ao ler o resumo do ensaio: {e}")
+                return 0, 0, None
+
+    @staticmethod
+    def _reconstruir_indice(arquivo):
+        """Lê o CSV uma única vez, linha a linha, e grava um novo índice. Retorna o IndiceCsv."""
+        estatisticas = {tipo: EstatisticaCorrente() for tipo in TIPOS_AMOSTRA}
+        data_inicio = None
+
+        with open(arquivo, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f, delimiter=';')
+            cabecalho1, cabecalho2 = next(reader, []), next(reader, [])
+            for linha in reader if cabecalho2 else ():
+                if not linha or not any(linha):
+                    continue
+                if "Estatisticas" in linha[0]:
+                    break
+                if data_inicio is None and linha[0]:
+                    data_inicio = linha[0]
+                for tipo, coluna in _POSICOES_CSV:
+                    if len(linha) > coluna and linha[coluna]:
+                        estatisticas[tipo].adicionar(_ler_peso(linha[coluna]))
+
+        indice = IndiceCsv(estatisticas, data_inicio)
+        try:
+            indice.salvar(arquivo)
+        except OSError:
+            pass  # Sem permissão de escrita: o índice é refeito na próxima vez
+        return indice
+
+    def exportar(self, nome_ensaio):
+        """
+        Reescreve o CSV do ensaio (dados e rodapé de estatísticas) a partir do estado em memória.
+        Retorna None em caso de sucesso ou uma mensagem de erro.
+        """
+        with self._lock:
+            arquivo = self._get_caminho_arquivo(nome_ensaio)
+            estado = self._ensaios.get(arquivo)
+            if estado is None:
+                return None
+            try:
+                self._escrever_csv(arquivo, estado.sessao, estado.cabecalho1, estado.cabecalho2,
+                                   estado.data_inicio or datetime.now().strftime("%d/%m/%Y"),
+                                   estado.ultima_hora or '', estado.ultimo_lote)
+                return None
+            except PermissionError:
+                return f"Não foi possível salvar o arquivo '{os.path.basename(arquivo)}'.\n\nVerifique se ele não está aberto em outro programa (como o Excel) e tente novamente."
+            except Exception as e:
+                self.on_log(f"ERRO ao exportar ensaio: {e}")
+                return f"Ocorreu um erro inesperado ao salvar o arquivo:\n\n{e}"
+
+    def fechar_ensaio(self, nome_ensaio):
+        """Exporta o CSV final e encerra o diário do ensaio. Retorna None ou uma mensagem de erro."""
+        with self._lock:
+            arquivo = self._get_caminho_arquivo(nome_ensaio)
+            estado = self._ensaios.get(arquivo)
+            if estado is None:
+                return None
+
+            erro = self.exportar(nome_ensaio)
+            if erro:
+                # Mantém a sessão: o CSV será refeito a partir dela na próxima abertura.
+                return erro
+
+            estado.arquivo_sessao.fechar()
+            if os.path.exists(estado.arquivo_sessao.caminho):
+                os.remove(estado.arquivo_sessao.caminho)
+            del self._ensaios[arquivo]
+            self.on_log(f"Ensaio {os.path.basename(arquivo)} fechado e exportado.")
+            return None
+
+    def fechar_todos(self):
+        """Fecha todos os ensaios abertos. Retorna a lista de mensagens de erro (vazia se tudo ok)."""
+        with self._lock:
+            erros = []
+            for arquivo in list(self._ensaios):
+                erro = self.fechar_ensaio(os.path.basename(arquivo))
+                if erro:
+                    erros.append(erro)
+            return erros
+
+    # --- MODO ATÔMICO (reescrita completa) ---
+    def _salvar_medidas_atomico(self, nome_ensaio, medidas, adicionar_linha_branca):
+        """Relê o CSV, adiciona as novas medidas e reescreve o arquivo de forma atômica."""
         arquivo = self._get_caminho_arquivo(nome_ensaio)
         agora = datetime.now()
 
-        dados_por_tipo = {'Padrao (A)': [], 'Cliente (B)': [], 'Generico': []}
-        cabecalho1, cabecalho2 = [], []
-        
+        # 1. Leitura do arquivo existente (se houver); as estatísticas são refeitas na leitura.
+        cabecalho1, cabecalho2, sessao, _ = self._ler_csv_existente(arquivo)
+
+        for tipo_amostra, peso, instante in medidas:
+            sessao.adicionar(tipo_amostra, peso, instante)
+
+        # 2. Reescrita atômica (o temporário é removido pelo _escrever_csv em caso de falha)
+        data_str = agora.strftime("%d/%m/%Y") if not cabecalho1 else ''
+        self._escrever_csv(arquivo, sessao, cabecalho1, cabecalho2,
+                           data_str, agora.strftime("%H:%M:%S"), adicionar_linha_branca)
+
+        self.on_log(f"Lote de {len(medidas)} medida(s) salvo no arquivo {os.path.basename(arquivo)}")
+        # Contadores atualizados
+        return sessao.contagem('Padrao (A)'), sessao.contagem('Cliente (B)')
+
+    # --- LEITURA E ESCRITA DO CSV ---
+    @staticmethod
+    def _ler_csv_existente(arquivo):
+        """
+        Lê um CSV de ensaio e retorna (cabecalho1, cabecalho2, sessao, data_inicio).
+        O CSV só guarda a hora de cada medida; a data é a da primeira linha de dados (ou a de hoje).
+        """
+        sessao = SessaoColunar()
+        cabecalho1, cabecalho2, data_inicio = [], [], None
+        if not os.path.exists(arquivo):
+            return cabecalho1, cabecalho2, sessao, data_inicio
+
+        with open(arquivo, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f, delimiter=';')
+            cabecalho1 = next(reader, [])
+            cabecalho2 = next(reader, [])
+            if not cabecalho2:
+                return [], [], sessao, data_inicio
+            data_ensaio = datetime.now().strftime("%d/%m/%Y")
+            lidos = {tipo: ([], []) for tipo, _ in _POSICOES_CSV}  # tipo -> (pesos, instantes)
+            for linha in reader:
+                # Ignora separadores ou linhas em branco
+                if not linha or not any(linha):
+                    continue
+                if "Estatisticas" in linha[0]:
+                    break  # Para de ler dados ao encontrar a seção de estatísticas
+                if data_inicio is None and linha[0]:
+                    data_inicio = data_ensaio = linha[0]
+                # Recria as colunas a partir das posições do CSV
+                for tipo, coluna in _POSICOES_CSV:
+                    if len(linha) > coluna + 1 and linha[coluna]:
+                        pesos, instantes = lidos[tipo]
+                        pesos.append(_ler_peso(linha[coluna]))
+                        instantes.append(_instante_de(data_ensaio, linha[coluna + 1]))
+            for tipo, (pesos, instantes) in lidos.items():
+                sessao.estender(tipo, pesos, instantes)
+        return cabecalho1, cabecalho2, sessao, data_inicio
+
+    @staticmethod
+    def _linha_estatisticas(tipo, estatistica):
+        """Formata a linha do rodapé de estatísticas (decimal com vírgula, como no restante do CSV)."""
+        def fmt(valor, casas):
+            return f"{valor:.{casas}f}".replace('.', ',') if valor is not None else ''
+        return [
+            tipo,
+            estatistica.quantidade,
+            fmt(estatistica.media, 6),
+            fmt(estatistica.minimo, 6),
+            fmt(estatistica.maximo, 6),
+            fmt(estatistica.desvio_padrao, 6),
+            fmt(estatistica.rsd, 4),
+        ]
+
+    @staticmethod
+    def _blocos_dados(sessao, data_str, hora_str):
+        """
+        Gera as linhas de dados do CSV em blocos de _BLOCO_EXPORTACAO medidas (listas de linhas),
+        formatando cada coluna (A, B, Genérico) de uma vez, sem montar o ensaio inteiro em texto na memória.
+        """
+        max_medidas = sessao.max_linhas()
+        colunas = [sessao.coluna(tipo) for tipo in TIPOS_AMOSTRA]
+        for inicio in range(0, max_medidas, _BLOCO_EXPORTACAO):
+            fim = min(inicio + _BLOCO_EXPORTACAO, max_medidas)
+            celulas = []
+            for coluna in colunas:
+                pesos, instantes = coluna.fatia(inicio, fim)
+                bloco = list(zip(_formatar_pesos(pesos), map(_hora_de, instantes)))
+                bloco.extend([('', '')] * (fim - inicio - len(bloco)))  # Completa as colunas mais curtas
+                celulas.append(bloco)
+
+            linhas = []
+            for i, (padrao, cliente, generico) in enumerate(zip(*celulas), inicio):
+                # Adiciona data e hora apenas na primeira linha para clareza
+                linhas.append((data_str if i == 0 else '', hora_str if i == 0 else '', '', *padrao, '', *cliente, '', *generico))
+
+                # Insere uma linha em branco após cada lote completo de 4 medidas,
+                # para facilitar a visualização ao abrir no Excel/Calc.
+                if (i + 1) % 4 == 0 and i < max_medidas - 1:
+                    linhas.append(())
+            yield linhas
+
+    @staticmethod
+    def _escrever_csv(arquivo, sessao, cabecalho1, cabecalho2, data_str, hora_str, adicionar_linha_branca):
+        """
+        Escreve o CSV completo (dados + estatísticas) em um temporário e o substitui atomicamente.
+        As linhas são formatadas a partir das colunas da SessaoColunar (peso e hora de cada medida).
+        Em seguida grava o índice do CSV (IndiceCsv) com as estatísticas.
+        """
+        arquivo_tmp = arquivo + ".tmp"
         try:
-            # 1. Leitura do arquivo existente (se houver)
-            if os.path.exists(arquivo):
-                with open(arquivo, 'r', newline='', encoding='utf-8') as f:
-                    reader = csv.reader(f, delimiter=';')
-                    linhas = list(reader)
-                    if len(linhas) >= 2:
-                        cabecalho1 = linhas[0]
-                        cabecalho2 = linhas[1]
-                        lendo_dados = True
-                        for linha in linhas[2:]:
-                            # Ignora linhas de estatísticas, separadores ou linhas em branco
-                            if not linha or not any(linha):
-                                continue
-                            if "Estatisticas" in linha[0]:
-                                lendo_dados = False # Para de ler dados ao encontrar a seção de estatísticas
-                            if lendo_dados:
-                                # Recria a estrutura de dados a partir das colunas
-                                if len(linha) > 4 and linha[3]: dados_por_tipo['Padrao (A)'].append([linha[3], linha[4]])
-                                if len(linha) > 7 and linha[6]: dados_por_tipo['Cliente (B)'].append([linha[6], linha[7]])
-                                if len(linha) > 10 and linha[9]: dados_por_tipo['Generico'].append([linha[9], linha[10]])
-
-            data_str = agora.strftime("%d/%m/%Y")
-            for tipo_amostra, lista_pesos in pesos_por_tipo.items():
-                for peso in lista_pesos:
-                    nova_medida = [str(peso).replace('.', ','), agora.strftime("%H:%M:%S")]
-                    dados_por_tipo[tipo_amostra].append(nova_medida)
-
-            # Contadores atualizados
-            contagem_A = len(dados_por_tipo.get('Padrao (A)', []))
-            contagem_B = len(dados_por_tipo.get('Cliente (B)', []))
-
-            # 3. Escrita Atômica (em um arquivo temporário)
-            arquivo_tmp = arquivo + ".tmp"
             with open(arquivo_tmp, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f, delimiter=';')
                 writer.writerow(cabecalho1 or ['Data', 'Hora', '', 'Padrao (A)', '', '', 'Cliente (B)', '', '', 'Generico', ''])
                 writer.writerow(cabecalho2 or ['', '', '', 'Peso (g)', 'Hora', '', 'Peso (g)', 'Hora', '', 'Peso (g)', 'Hora'])
 
-                max_medidas = max(len(v) for v in dados_por_tipo.values()) if any(dados_por_tipo.values()) else 0
-                
-                for i in range(max_medidas):
-                    # Adiciona data e hora apenas na primeira linha para clareza
-                    data_col = data_str if i == 0 and not cabecalho1 else ''
-                    hora_col = agora.strftime("%H:%M:%S") if i == 0 else ''
-                    linha_csv = [data_col, hora_col, '']
-                    
-                    # Preenche as colunas com os dados ou com strings vazias
-                    linha_csv.extend(dados_por_tipo['Padrao (A)'][i] if i < len(dados_por_tipo['Padrao (A)']) else ['', ''])
-                    linha_csv.append('')
-                    linha_csv.extend(dados_por_tipo['Cliente (B)'][i] if i < len(dados_por_tipo['Cliente (B)']) else ['', ''])
-                    linha_csv.append('')
-                    linha_csv.extend(dados_por_tipo['Generico'][i] if i < len(dados_por_tipo['Generico']) else ['', ''])
-                    writer.writerow(linha_csv)
-
-                    # Insere uma linha em branco após cada lote completo de 4 medidas,
-                    # para facilitar a visualização ao abrir no Excel/Calc.
-                    if (i + 1) % 4 == 0 and i < max_medidas - 1:
-                        writer.writerow([])
+                for linhas in ServicoCsv._blocos_dados(sessao, data_str, hora_str):
+                    writer.writerows(linhas)
 
                 if adicionar_linha_branca:
                     writer.writerow([]) # Adiciona linha em branco para separar lotes
 
-                # 4. Cálculo e escrita das estatísticas
+                # Cálculo e escrita das estatísticas
                 # Adiciona uma linha em branco para separar os dados das estatísticas (ou para separar lotes)
                 writer.writerow([])
 
                 writer.writerow(['Estatisticas:'])
-                writer.writerow(['Tipo', 'Quantidade', 'Media (g)', 'Minimo (g)', 'Maximo (g)'])
-                
-                for tipo in ['Padrao (A)', 'Cliente (B)', 'Generico']:
-                    if dados_por_tipo[tipo]:
-                        pesos_float = [float(m[0].replace(',', '.')) for m in dados_por_tipo[tipo] if m[0]]
-                        stats = [
-                            tipo, 
-                            len(pesos_float), 
-                            f"{sum(pesos_float) / len(pesos_float):.6f}".replace('.', ','), 
-                            f"{min(pesos_float):.6f}".replace('.', ','), 
-                            f"{max(pesos_float):.6f}".replace('.', ',')
-                        ]
-                        writer.writerow(stats)
-            
-            # 5. Substituição do arquivo original pelo temporário
-            os.replace(arquivo_tmp, arquivo)
+                writer.writerow(['Tipo', 'Quantidade', 'Media (g)', 'Minimo (g)', 'Maximo (g)', 'Desvio Padrao (g)', 'DPR (%)'])
 
-            total_medidas_salvas = sum(len(v) for v in pesos_por_tipo.values())
-            self.on_log(f"Lote de {total_medidas_salvas} medida(s) salvo no arquivo {os.path.basename(arquivo)}")
-            return contagem_A, contagem_B, None # Sucesso
+                for tipo, estatistica in sessao.estatisticas().items():
+                    if estatistica.quantidade:
+                        writer.writerow(ServicoCsv._linha_estatisticas(tipo, estatistica))
 
-        except PermissionError:
-            msg = f"Não foi possível salvar o arquivo '{os.path.basename(arquivo)}'.\n\nVerifique se ele não está aberto em outro programa (como o Excel) e tente novamente."
-            if os.path.exists(arquivo_tmp): os.remove(arquivo_tmp)
-            return None, None, msg
-        except Exception as e:
-            msg = f"Ocorreu um erro inesperado ao salvar o arquivo:\n\n{e}"
-            self.on_log(f"ERRO ao salvar medida: {e}")
+            # Substituição do arquivo original pelo temporário
+            os.replace(arquivo_tmp, arquivo)
+        except Exception:
             if os.path.exists(arquivo_tmp): os.remove(arquivo_tmp)
-            return None, None, msg
\ No newline at end of file
+            raise
+
+        indice = IndiceCsv(sessao.estatisticas(), data_str or None)
+        try:
+            indice.salvar(arquivo)
+        except OSError:
+            pass  # O CSV já está salvo; sem o índice, ele é reconstruído quando for preciso
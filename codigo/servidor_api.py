@@ -0,0 +1,371 @@
+"""
+API HTTP local (opcional) para integrações (LIMS, painéis): leituras ao vivo por Server-Sent Events
+e endpoints REST para captura, tara e estatísticas do ensaio. Só biblioteca padrão.
+
+    GET  /api/leitura            última leitura: {"peso", "estavel", "instante"}
+    GET  /api/eventos            fluxo SSE (eventos "leitura", "captura", "gravado", "status", ...);
+                                 ?intervalo=0.5 limita as leituras a uma a cada 0,5 s para esse cliente
+    POST /api/captura            {"coluna": "A" | "B" | "G"} -> {"peso"} ou 409 {"erro"}
+    POST /api/tara               -> {"ok": true} ou 409 {"erro"}
+    GET  /api/ensaio             contagens e estatísticas do ensaio atual
+    GET  /api/status             clientes conectados e eventos descartados
+
+Exemplo: curl -N http://127.0.0.1:8765/api/eventos
+"""
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+PORTA_PADRAO = 8765
+COLUNAS = ('A', 'B', 'G')
+
+# Sem eventos, um comentário SSE é enviado a cada N segundos (mantém proxies abertos e detecta clientes que saíram)
+_INTERVALO_KEEPALIVE = 15.0
+
+
+class _Assinante:
+    """
+    Caixa de entrega de um cliente SSE. A leitura é coalescida (só a mais recente é guardada);
+    os demais eventos ficam em uma fila limitada que descarta os mais antigos se o cliente não acompanhar.
+    """
+    __slots__ = ('leitura', 'eventos', 'descartados', '_aviso', '_lock')
+
+    def __init__(self, capacidade):
+        self.leitura = None
+        self.eventos = deque(maxlen=capacidade)
+        self.descartados = 0
+        self._aviso = threading.Event()
+        self._lock = threading.Lock()
+
+    def entregar(self, leitura, eventos):
+        with self._lock:
+            if leitura is not None:
+                self.leitura = leitura
+            for evento in eventos:
+                if len(self.eventos) == self.eventos.maxlen:
+                    self.descartados += 1
+                self.eventos.append(evento)
+        self._aviso.set()
+
+    def aguardar(self, timeout):
+        return self._aviso.wait(timeout)
+
+    def retirar(self, com_leitura=True):
+        """Retorna (leitura ou None, lista de eventos) e esvazia a caixa."""
+        with self._lock:
+            leitura = self.leitura if com_leitura else None
+            if com_leitura:
+                self.leitura = None
+            eventos = list(self.eventos)
+            self.eventos.clear()
+            if self.leitura is None:
+                self._aviso.clear()
+        return leitura, eventos
+
+    def acordar(self):
+        self._aviso.set()
+
+
+class DifusorEventos:
+    """
+    Distribui leituras e eventos para os assinantes em uma thread própria. Quem publica (ex.: a thread
+    que lê a porta serial) só guarda o valor e sinaliza, em O(1), independentemente do número de clientes.
+    """
+
+    def __init__(self, capacidade_por_cliente=100):
+        """
+        :param capacidade_por_cliente: Eventos (além da leitura) guardados por cliente lento antes de descartar.
+        """
+        self.capacidade_por_cliente = capacidade_por_cliente
+        self.ultima_leitura = None  # {"peso", "estavel", "instante"}
+        self._pendentes = deque()
+        self._assinantes = []
+        self._lock = threading.Lock()
+        self._aviso = threading.Event()
+        self._parar = threading.Event()
+        self._leitura_nova = False
+        self._thread = None
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._distribuir, daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        self._aviso.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        with self._lock:
+            assinantes = list(self._assinantes)
+        for assinante in assinantes:
+            assinante.acordar()
+
+    @property
+    def parado(self):
+        return self._parar.is_set()
+
+    # --- PUBLICAÇÃO (qualquer thread, não bloqueia) ---
+    def publicar_leitura(self, peso, estavel):
+        self.ultima_leitura = {'peso': peso, 'estavel': estavel, 'instante': time.time()}
+        self._leitura_nova = True
+        self._aviso.set()
+
+    def publicar_evento(self, evento, /, **dados):
+        dados['instante'] = time.time()
+        self._pendentes.append((evento, dados))  # deque.append é atômico
+        self._aviso.set()
+
+    # --- ASSINANTES ---
+    def assinar(self):
+        assinante = _Assinante(self.capacidade_por_cliente)
+        with self._lock:
+            self._assinantes.append(assinante)
+        return assinante
+
+    def cancelar(self, assinante):
+        with self._lock:
+            if assinante in self._assinantes:
+                self._assinantes.remove(assinante)
+
+    def contagem(self):
+        with self._lock:
+            return len(self._assinantes)
+
+    def descartados(self):
+        with self._lock:
+            return sum(assinante.descartados for assinante in self._assinantes)
+
+    def _distribuir(self):
+        while not self._parar.is_set():
+            self._aviso.wait()
+            self._aviso.clear()
+            # Várias leituras publicadas desde a última volta viram uma só: vale a mais recente
+            leitura = None
+            if self._leitura_nova:
+                self._leitura_nova = False
+                leitura = self.ultima_leitura
+            eventos = []
+            while self._pendentes:
+                eventos.append(self._pendentes.popleft())
+            if leitura is None and not eventos:
+                continue
+            with self._lock:
+                assinantes = list(self._assinantes)
+            for assinante in assinantes:
+                assinante.entregar(leitura, eventos)
+
+
+class ServidorApi:
+    """
+    Servidor HTTP em uma thread de fundo (ThreadingHTTPServer: uma thread por cliente).
+    Por padrão escuta apenas em 127.0.0.1. A aplicação fornece as ações por callbacks.
+    """
+
+    def __init__(self, on_capturar, on_tarar, on_resumo, on_log, host="127.0.0.1", porta=PORTA_PADRAO,
+                 capacidade_por_cliente=100):
+        """
+        :param on_capturar: Captura uma medida na coluna ("A", "B" ou "G"). Ex: fn(coluna) -> (peso, erro)
+        :param on_tarar: Envia a tara. Ex: fn() -> bool
+        :param on_resumo: Contagens e estatísticas do ensaio atual. Ex: fn() -> dict (ver resumo_ensaio)
+        :param on_log: Callback para log de eventos. Ex: fn(mensagem)
+        :param host: Endereço de escuta ("0.0.0.0" expõe a API na rede: não há autenticação).
+        :param porta: Porta TCP (0 escolhe uma porta livre; ver `endereco`).
+        :param capacidade_por_cliente: Eventos guardados por cliente lento antes de descartar os mais antigos.
+        """
+        self.on_capturar = on_capturar
+        self.on_tarar = on_tarar
+        self.on_resumo = on_resumo
+        self.on_log = on_log
+        self.host = host
+        self.porta = porta
+        self.difusor = DifusorEventos(capacidade_por_cliente)
+        self._servidor = None
+        self._thread = None
+
+    def iniciar(self):
+        """Abre a porta e começa a atender. Retorna (sucesso, mensagem)."""
+        try:
+            self._servidor = _ServidorHttp((self.host, self.porta), _ManipuladorApi, self)
+        except OSError as e:
+            self.on_log(f"API HTTP não iniciada em {self.host}:{self.porta}: {e}")
+            return False, str(e)
+        self.difusor.iniciar()
+        self._thread = threading.Thread(target=self._servidor.serve_forever, kwargs={'poll_interval': 0.5},
+                                        daemon=True)
+        self._thread.start()
+        host, porta = self.endereco
+        self.on_log(f"API HTTP disponível em http://{host}:{porta}/api/")
+        return True, f"http://{host}:{porta}/api/"
+
+    def parar(self):
+        if self._servidor is None:
+            return
+        self.difusor.parar()  # Encerra os fluxos SSE abertos
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        self._thread.join(timeout=1.0)
+        self._servidor = None
+        self._thread = None
+
+    @property
+    def endereco(self):
+        """(host, porta) efetivos (a porta real quando iniciado com porta 0)."""
+        return self._servidor.server_address[:2] if self._servidor is not None else (self.host, self.porta)
+
+    # --- PUBLICAÇÃO (chamado pela aplicação, qualquer thread) ---
+    def publicar_leitura(self, peso, estavel):
+        self.difusor.publicar_leitura(peso, estavel)
+
+    def publicar_evento(self, evento, /, **dados):
+        self.difusor.publicar_evento(evento, **dados)
+
+
+def resumo_ensaio(nome_ensaio, resumo):
+    """Converte o retorno de ServicoCsv.get_resumo em um dict serializável em JSON."""
+    contagem_A, contagem_B, estatisticas = resumo
+    colunas = {}
+    for tipo, estatistica in (estatisticas or {}).items():
+        colunas[tipo] = {
+            'quantidade': estatistica.quantidade,
+            'media': estatistica.media if estatistica.quantidade else None,
+            'minimo': estatistica.minimo,
+            'maximo': estatistica.maximo,
+            'desvio_padrao': estatistica.desvio_padrao,
+            'dpr': estatistica.rsd,
+        }
+    return {'ensaio': nome_ensaio, 'contagem_A': contagem_A, 'contagem_B': contagem_B, 'estatisticas': colunas}
+
+
+class _ServidorHttp(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, manipulador, api):
+        self.api = api
+        super().__init__(endereco, manipulador)
+
+
+class _ManipuladorApi(BaseHTTPRequestHandler):
+    server_version = "LeitorBalanca/1.0"
+
+    def log_message(self, formato, *args):
+        pass  # Sem uma linha no log para cada requisição
+
+    @property
+    def api(self):
+        return self.server.api
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/api/leitura":
+            self._responder(200, self.api.difusor.ultima_leitura or {'peso': None, 'estavel': False, 'instante': None})
+        elif url.path == "/api/eventos":
+            self._transmitir_eventos(parse_qs(url.query))
+        elif url.path == "/api/ensaio":
+            try:
+                self._responder(200, self.api.on_resumo())
+            except Exception as e:
+                self._responder(500, {'erro': str(e)})
+        elif url.path == "/api/status":
+            difusor = self.api.difusor
+            self._responder(200, {'clientes': difusor.contagem(), 'eventos_descartados': difusor.descartados()})
+        elif url.path in ("/", "/api", "/api/"):
+            self._responder(200, {'endpoints': ["GET /api/leitura", "GET /api/eventos", "POST /api/captura",
+                                                "POST /api/tara", "GET /api/ensaio", "GET /api/status"]})
+        else:
+            self._responder(404, {'erro': "Endpoint não encontrado."})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        # Exigir JSON impede que uma página qualquer aberta no navegador dispare capturas com um simples formulário
+        if self.headers.get_content_type() != "application/json":
+            self._responder(415, {'erro': "Use Content-Type: application/json."})
+            return
+        try:
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            corpo = json.loads(self.rfile.read(tamanho) or b"{}") if tamanho else {}
+        except ValueError:
+            self._responder(400, {'erro': "Corpo JSON inválido."})
+            return
+        if not isinstance(corpo, dict):
+            self._responder(400, {'erro': "O corpo deve ser um objeto JSON."})
+            return
+
+        if url.path == "/api/captura":
+            coluna = str(corpo.get('coluna', '')).upper()
+            if coluna not in COLUNAS:
+                self._responder(400, {'erro': f"Coluna inválida: use {', '.join(COLUNAS)}."})
+                return
+            try:
+                peso, erro = self.api.on_capturar(coluna)
+            except Exception as e:
+                self._responder(500, {'erro': f"Erro inesperado: {e}"})
+                return
+            if erro:
+                self._responder(409, {'erro': erro})
+            else:
+                self._responder(200, {'coluna': coluna, 'peso': peso})
+        elif url.path == "/api/tara":
+            if self.api.on_tarar():
+                self._responder(200, {'ok': True})
+            else:
+                self._responder(409, {'erro': "Balança desconectada ou falha ao enviar a tara."})
+        else:
+            self._responder(404, {'erro': "Endpoint não encontrado."})
+
+    def _responder(self, codigo, dados):
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        if self.command == "GET":
+            self.send_header("Access-Control-Allow-Origin", "*")  # Painéis no navegador podem ler (só leitura)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _transmitir_eventos(self, parametros):
+        try:
+            intervalo = max(0.0, float(parametros.get('intervalo', ['0'])[0]))
+        except ValueError:
+            self._responder(400, {'erro': "intervalo inválido."})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+
+        difusor = self.api.difusor
+        assinante = difusor.assinar()
+        ultimo_envio = 0.0
+        try:
+            if difusor.ultima_leitura is not None:
+                self._enviar_evento("leitura", difusor.ultima_leitura)
+            while not difusor.parado:
+                if not assinante.aguardar(_INTERVALO_KEEPALIVE):
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                # Cliente com limite de taxa: a leitura espera o intervalo e segue coalescendo na caixa
+                espera = ultimo_envio + intervalo - time.monotonic()
+                leitura, eventos = assinante.retirar(com_leitura=espera <= 0)
+                for tipo, dados in eventos:
+                    self._enviar_evento(tipo, dados)
+                if leitura is not None:
+                    self._enviar_evento("leitura", leitura)
+                    ultimo_envio = time.monotonic()
+                elif espera > 0 and not eventos:
+                    time.sleep(min(espera, _INTERVALO_KEEPALIVE))
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError, TimeoutError):
+            pass  # Cliente desconectou
+        finally:
+            difusor.cancelar(assinante)
+
+    def _enviar_evento(self, tipo, dados):
+        self.wfile.write(f"event: {tipo}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n".encode('utf-8'))
+        self.wfile.flush()
@@ -0,0 +1,192 @@
+import mmap
+import os
+import struct
+import time
+from array import array
+from itertools import compress
+from sessao_colunar import SessaoColunar, TIPOS_AMOSTRA
+
+# Arquivo de sessão binário (append-only):
+#   cabeçalho de 64 bytes: assinatura, versão, tamanho do registro, instante de criação (epoch)
+#   registros de 24 bytes: coluna (índice em TIPOS_AMOSTRA), flags, peso (float64, g), instante (float64, epoch)
+# Os dois float64 de cada registro ficam alinhados em 8 bytes, então o arquivo pode ser lido via mmap
+# como um vetor de doubles (3 por registro) sem desempacotar registro a registro.
+ASSINATURA = b"SARTSES\x00"
+VERSAO = 1
+EXTENSAO_SESSAO = ".sessao"
+
+_CABECALHO = struct.Struct("<8sHHd44x")
+_REGISTRO = struct.Struct("<BB6xdd")
+
+FLAG_ESTAVEL = 0x01
+FLAG_FIM_LOTE = 0x02  # Última medida de um lote (o CSV ganha uma linha em branco depois dela)
+
+
+class ErroSessao(Exception):
+    """Arquivo de sessão inválido (assinatura, versão ou tamanho de registro inesperados)."""
+
+
+class ArquivoSessao:
+    """
+    Medidas de um ensaio em um arquivo binário de registros de tamanho fixo.
+    A gravação só anexa registros (com fsync); a leitura mapeia o arquivo (mmap) e monta a SessaoColunar
+    coluna a coluna, de modo que reabrir uma sessão com milhões de medidas é quase imediato.
+    """
+
+    def __init__(self, caminho):
+        """
+        :param caminho: Caminho do arquivo (ex.: "dados coletados/ensaio.csv.sessao").
+        """
+        self.caminho = caminho
+        self.criado_em = None
+        self.bytes_descartados = 0  # Bytes de um registro (ou cabeçalho) incompleto removidos na abertura
+        self._handle = None
+
+    def abrir(self):
+        """
+        Abre (ou cria) o arquivo para anexar. Um registro gravado pela metade (queda durante a escrita)
+        é descartado, assim como um cabeçalho incompleto (queda logo após criar o arquivo, antes de
+        qualquer registro): nesse caso o cabeçalho é regravado. Lança ErroSessao se o arquivo não for
+        uma sessão válida.
+        """
+        if self._handle is not None:
+            return
+        tamanho = os.path.getsize(self.caminho) if os.path.exists(self.caminho) else 0
+        existe = tamanho >= _CABECALHO.size
+        handle = open(self.caminho, 'r+b' if existe else 'w+b')
+        self.bytes_descartados = 0 if existe else tamanho
+        try:
+            if existe:
+                self.criado_em = self._ler_cabecalho(handle)
+                tamanho = os.fstat(handle.fileno()).st_size
+                excesso = (tamanho - _CABECALHO.size) % _REGISTRO.size
+                if excesso:
+                    handle.truncate(tamanho - excesso)
+                    self.bytes_descartados = excesso
+            else:
+                self.criado_em = time.time()
+                handle.write(_CABECALHO.pack(ASSINATURA, VERSAO, _REGISTRO.size, self.criado_em))
+                handle.flush()
+                os.fsync(handle.fileno())
+            handle.seek(0, os.SEEK_END)
+        except Exception:
+            handle.close()
+            raise
+        self._handle = handle
+
+    def fechar(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    @staticmethod
+    def _ler_cabecalho(handle):
+        handle.seek(0)
+        dados = handle.read(_CABECALHO.size)
+        if len(dados) < _CABECALHO.size:
+            raise ErroSessao("cabeçalho incompleto")
+        assinatura, versao, tamanho_registro, criado_em = _CABECALHO.unpack(dados)
+        if assinatura != ASSINATURA:
+            raise ErroSessao("não é um arquivo de sessão")
+        if versao != VERSAO or tamanho_registro != _REGISTRO.size:
+            raise ErroSessao(f"versão {versao} (registro de {tamanho_registro} bytes) não suportada")
+        return criado_em
+
+    def __len__(self):
+        """Número de registros gravados."""
+        if not os.path.exists(self.caminho):
+            return 0
+        return max(0, os.path.getsize(self.caminho) - _CABECALHO.size) // _REGISTRO.size
+
+    def anexar(self, medidas, fim_lote=False):
+        """
+        Anexa medidas ao arquivo e sincroniza com o disco antes de retornar.
+        :param medidas: Lista de (tipo, peso, instante) ou (tipo, peso, instante, estavel).
+        :param fim_lote: Marca a última medida como fim de lote.
+        """
+        self.abrir()
+        blocos = []
+        ultima = len(medidas) - 1
+        for i, medida in enumerate(medidas):
+            tipo, peso, instante = medida[:3]
+            estavel = medida[3] if len(medida) > 3 else True
+            flags = (FLAG_ESTAVEL if estavel else 0) | (FLAG_FIM_LOTE if fim_lote and i == ultima else 0)
+            blocos.append(_REGISTRO.pack(TIPOS_AMOSTRA.index(tipo), flags, peso, instante))
+        self._handle.write(b"".join(blocos))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def registros(self):
+        """Itera sobre (tipo, peso, instante, estavel, fim_lote) na ordem de gravação."""
+        with self._mapear() as (mapa, quantidade):
+            if not quantidade:
+                return
+            fim = _CABECALHO.size + quantidade * _REGISTRO.size
+            for coluna, flags, peso, instante in _REGISTRO.iter_unpack(mapa[_CABECALHO.size:fim]):
+                yield TIPOS_AMOSTRA[coluna], peso, instante, bool(flags & FLAG_ESTAVEL), bool(flags & FLAG_FIM_LOTE)
+
+    def carregar(self):
+        """
+        Lê o arquivo inteiro e retorna (sessao, primeiro_instante, ultimo_instante, ultimo_fim_lote).
+        Pesos e instantes são copiados do mapa em bloco; só a separação por coluna percorre os registros.
+        """
+        sessao = SessaoColunar()
+        with self._mapear() as (mapa, quantidade):
+            if not quantidade:
+                return sessao, None, None, False
+            fim = _CABECALHO.size + quantidade * _REGISTRO.size
+            vista = memoryview(mapa)[_CABECALHO.size:fim]
+            try:
+                doubles = vista.cast('d')
+                pesos = array('d', doubles[1::3].tobytes())
+                instantes = array('d', doubles[2::3].tobytes())
+                doubles.release()
+            finally:
+                vista.release()
+            colunas = mapa[_CABECALHO.size:fim:_REGISTRO.size]
+            ultimo_fim_lote = bool(mapa[fim - _REGISTRO.size + 1] & FLAG_FIM_LOTE)
+
+        for indice, tipo in enumerate(TIPOS_AMOSTRA):
+            quantidade_tipo = colunas.count(indice)
+            if quantidade_tipo == len(colunas):
+                sessao.estender(tipo, pesos, instantes)
+            elif quantidade_tipo:
+                mascara = colunas.translate(_TABELAS_MASCARA[indice])
+                sessao.estender(tipo, array('d', compress(pesos, mascara)), array('d', compress(instantes, mascara)))
+        return sessao, instantes[0], instantes[-1], ultimo_fim_lote
+
+    def _mapear(self):
+        return _MapaSessao(self.caminho)
+
+
+# Tabelas de bytes.translate: índice da coluna -> 1, demais -> 0 (máscara para itertools.compress)
+_TABELAS_MASCARA = [bytes(1 if i == indice else 0 for i in range(256)) for indice in range(len(TIPOS_AMOSTRA))]
+
+
+class _MapaSessao:
+    """Contexto que mapeia o arquivo somente para leitura e fornece (mapa, quantidade de registros)."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = None
+        self._mapa = None
+
+    def __enter__(self):
+        self._arquivo = open(self.caminho, 'rb')
+        try:
+            ArquivoSessao._ler_cabecalho(self._arquivo)
+            tamanho = os.fstat(self._arquivo.fileno()).st_size
+            quantidade = (tamanho - _CABECALHO.size) // _REGISTRO.size
+            if quantidade <= 0:
+                return b"", 0
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._arquivo.close()
+            raise
+        return self._mapa, quantidade
+
+    def __exit__(self, *_):
+        if self._mapa is not None:
+            self._mapa.close()
+        self._arquivo.close()
+        return False
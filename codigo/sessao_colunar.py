@@ -0,0 +1,84 @@
+import time
+from array import array
+from estatisticas import EstatisticaCorrente
+
+TIPOS_AMOSTRA = ['Padrao (A)', 'Cliente (B)', 'Generico']
+
+
+class ColunaMedidas:
+    """
+    Uma coluna de medidas guardada em vetores tipados: pesos (g) e instantes (epoch, s) em array('d'),
+    com a estatística incremental atualizada a cada medida.
+    """
+    __slots__ = ('pesos', 'instantes', 'estatistica')
+
+    def __init__(self):
+        self.pesos = array('d')
+        self.instantes = array('d')
+        self.estatistica = EstatisticaCorrente()
+
+    def adicionar(self, peso, instante):
+        self.pesos.append(peso)
+        self.instantes.append(instante)
+        self.estatistica.adicionar(peso)
+
+    def estender(self, pesos, instantes):
+        """Adiciona várias medidas de uma vez (ex.: ao ler um CSV existente)."""
+        self.pesos.extend(pesos)
+        self.instantes.extend(instantes)
+        self.estatistica.estender(pesos)
+
+    def fatia(self, inicio=0, fim=None):
+        """Retorna (pesos, instantes) do intervalo, como array('d')."""
+        return self.pesos[inicio:fim], self.instantes[inicio:fim]
+
+    def __len__(self):
+        return len(self.pesos)
+
+
+class SessaoColunar:
+    """
+    Medidas de um ensaio (ou de um lote em andamento), uma ColunaMedidas por tipo de amostra.
+    É a fonte única para o CSV, os contadores da interface e a confirmação de lote.
+    """
+
+    def __init__(self, tipos=TIPOS_AMOSTRA):
+        self.colunas = {tipo: ColunaMedidas() for tipo in tipos}
+
+    def adicionar(self, tipo, peso, instante=None):
+        """Adiciona uma medida à coluna. `instante` em epoch (s); None usa o momento atual."""
+        self.colunas[tipo].adicionar(peso, time.time() if instante is None else instante)
+
+    def estender(self, tipo, pesos, instantes):
+        """Adiciona várias medidas à coluna; `pesos` e `instantes` com o mesmo tamanho."""
+        self.colunas[tipo].estender(pesos, instantes)
+
+    def coluna(self, tipo):
+        return self.colunas[tipo]
+
+    def contagem(self, tipo):
+        return len(self.colunas[tipo])
+
+    def contagens(self):
+        """{tipo: quantidade de medidas}"""
+        return {tipo: len(coluna) for tipo, coluna in self.colunas.items()}
+
+    def estatisticas(self):
+        """{tipo: EstatisticaCorrente}"""
+        return {tipo: coluna.estatistica for tipo, coluna in self.colunas.items()}
+
+    def medidas(self):
+        """Lista de (tipo, peso, instante) de todas as colunas, coluna por coluna."""
+        return [(tipo, peso, instante) for tipo, coluna in self.colunas.items()
+                for peso, instante in zip(coluna.pesos, coluna.instantes)]
+
+    def total(self):
+        return sum(len(coluna) for coluna in self.colunas.values())
+
+    def max_linhas(self):
+        """Número de linhas do CSV ocupadas pelas medidas (a coluna mais longa)."""
+        return max((len(coluna) for coluna in self.colunas.values()), default=0)
+
+    def limpar(self):
+        for tipo in self.colunas:
+            self.colunas[tipo] = ColunaMedidas()
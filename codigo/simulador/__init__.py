@@ -0,0 +1,13 @@
+"""
+Balança Sartorius simulada, para testar o programa sem hardware.
+
+- `balanca_simulada.BalancaSimulada`: modelo da balança (protocolo SBI, ruído, deriva, estabilização).
+- `protocol_sim`: esquema de URL do pyserial, ex.: serial.serial_for_url("sim://?peso=10&auto=1").
+- `python -m simulador`: servidor em um par pty (Linux/macOS), que aparece como uma porta serial comum.
+
+Importar este pacote registra o esquema sim:// no pyserial.
+"""
+import serial
+
+if __name__ not in serial.protocol_handler_packages:
+    serial.protocol_handler_packages.append(__name__)
@@ -0,0 +1,69 @@
+"""
+Balança simulada em um par pty. Uso (a partir da pasta codigo):
+
+    python -m simulador --baud 1200 --peso 12.345 --ruido 0.00001 --estabilizacao 1.5 [--auto] [--erro30]
+    python -m simulador --protocolo mt-sics --baud 9600 --enquadramento 8N1
+    python -m simulador --protocolo xbpi --baud 9600 --enquadramento 8O1
+
+Mostra o caminho da porta (ex.: /dev/pts/5), que pode ser escolhido no programa como uma porta COM.
+Comandos no terminal: "p <peso>" coloca uma carga, "t" tara, "e" liga/desliga o Err 30, "q" sai.
+"""
+import argparse
+import sys
+from simulador.balanca_simulada import BalancaSimulada, PROTOCOLO_SBI, PROTOCOLOS
+from simulador.servidor_pty import ServidorPty
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m simulador", description="Balança simulada (SBI, MT-SICS ou xBPI) em um pty.")
+    parser.add_argument("--protocolo", choices=PROTOCOLOS, default=PROTOCOLO_SBI,
+                        help="Protocolo da balança (padrão: sbi)")
+    parser.add_argument("--baud", type=int, default=1200, help="Velocidade configurada na balança (padrão: 1200)")
+    parser.add_argument("--enquadramento", type=str.upper, default="7O1",
+                        help="Bits de dados, paridade e parada (padrão: 7O1)")
+    parser.add_argument("--peso", type=float, default=0.0, help="Carga inicial (g)")
+    parser.add_argument("--ruido", type=float, default=0.000002, help="Desvio padrão do ruído (g)")
+    parser.add_argument("--deriva", type=float, default=0.0, help="Deriva do valor indicado (g/s)")
+    parser.add_argument("--estabilizacao", type=float, default=1.0, help="Tempo até estabilizar após mudar a carga (s)")
+    parser.add_argument("--auto", action="store_true", help="Auto-print: envia quadros continuamente")
+    parser.add_argument("--intervalo", type=float, default=None, help="Intervalo entre quadros do auto-print (s)")
+    parser.add_argument("--casas", type=int, default=6, help="Casas decimais (padrão: 6)")
+    parser.add_argument("--id", action="store_true", help="Formato de 22 caracteres (com código de identificação)")
+    parser.add_argument("--erro30", action="store_true", help="Começa com a interface bloqueada (Err 30)")
+    args = parser.parse_args(argv)
+
+    balanca = BalancaSimulada(
+        peso=args.peso, ruido=args.ruido, deriva=args.deriva, tempo_estabilizacao=args.estabilizacao,
+        auto_print=args.auto, intervalo_auto_print=args.intervalo, baudrate=args.baud, casas=args.casas,
+        com_id=args.id, erro30=args.erro30, enquadramento=args.enquadramento, protocolo=args.protocolo,
+    )
+    servidor = ServidorPty(balanca)
+    porta = servidor.iniciar()
+    print(f"Balança simulada em {porta} ({args.baud} baud, {'auto-print' if args.auto else 'consulta'}).")
+    print('Comandos: "p <peso>", "t" (tara), "e" (Err 30), "q" (sair).')
+
+    try:
+        for linha in sys.stdin:
+            partes = linha.split()
+            if not partes:
+                continue
+            comando = partes[0].lower()
+            if comando == "q":
+                break
+            elif comando == "p" and len(partes) == 2:
+                servidor.executar(balanca.colocar, float(partes[1].replace(",", ".")))
+            elif comando == "t":
+                servidor.executar(balanca.tarar)
+            elif comando == "e":
+                balanca.erro30 = not balanca.erro30
+                print(f"Err 30 {'ativo' if balanca.erro30 else 'desativado'}.")
+            else:
+                print("Comando não reconhecido.")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.parar()
+
+
+if __name__ == "__main__":
+    main()
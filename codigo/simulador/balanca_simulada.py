@@ -0,0 +1,226 @@
+import math
+import random
+import time
+from protocolo_sbi import SeparadorQuadros
+import protocolo_xbpi as xbpi
+
+# Bits por caractere no enquadramento 7O1/8N1 (início + dados + paridade + parada)
+_BITS_POR_CARACTERE = 10
+
+PROTOCOLO_SBI = "sbi"
+PROTOCOLO_MT_SICS = "mt-sics"
+PROTOCOLO_XBPI = "xbpi"
+PROTOCOLOS = (PROTOCOLO_SBI, PROTOCOLO_MT_SICS, PROTOCOLO_XBPI)
+
+
+class BalancaSimulada:
+    """
+    Modelo de uma balança Sartorius no protocolo SBI.
+    Responde a ESC P (leitura), ESC T / ESC f4_ (tara), ESC f3_ (zero), ESC x1_ (modelo) e ESC x2_ (número de série);
+    em auto-print envia um quadro por período de transmissão. Com protocolo=PROTOCOLO_MT_SICS fala o
+    subconjunto do MT-SICS usado pelo driver: SI/S (leitura), T, Z, I2, I4, SIR (envio contínuo) e @ (reset);
+    com PROTOCOLO_XBPI responde aos telegramas xBPI de peso, tara, zero, modelo e número de série.
+    Depois de cada mudança de carga
+    o valor se aproxima do novo peso exponencialmente e os quadros saem marcados com '?'
+    até passar o tempo de estabilização.
+    """
+
+    def __init__(self, peso=0.0, ruido=0.000002, deriva=0.0, tempo_estabilizacao=1.0, auto_print=False,
+                 intervalo_auto_print=None, baudrate=1200, enquadramento="7O1", casas=6, unidade='g',
+                 com_id=False, erro30=False, semente=None, numero_serie="0012345678", protocolo=PROTOCOLO_SBI):
+        """
+        :param peso: Carga inicial sobre o prato (g).
+        :param ruido: Desvio padrão do ruído de cada leitura (g).
+        :param deriva: Deriva lenta do valor indicado (g/s).
+        :param tempo_estabilizacao: Tempo (s) até a balança considerar a leitura estável após mudar a carga.
+        :param auto_print: Se True, envia quadros continuamente (Setup: Printout: Automatic output).
+        :param intervalo_auto_print: Intervalo (s) entre quadros do auto-print. None = um quadro atrás do outro.
+        :param baudrate: Velocidade configurada na balança; define o ritmo dos quadros.
+        :param enquadramento: Bits de dados, paridade e parada configurados na balança (ex.: "7O1").
+        :param casas: Casas decimais do valor indicado.
+        :param com_id: Se True, usa o formato de 22 caracteres (com código de identificação).
+        :param erro30: Se True, a interface está bloqueada e a balança responde "Err 30".
+        :param numero_serie: Resposta ao ESC x2_ (I4 no MT-SICS).
+        :param protocolo: Um dos PROTOCOLOS.
+        """
+        if protocolo not in PROTOCOLOS:
+            raise ValueError(f"protocolo desconhecido: {protocolo!r}")
+        self.ruido = ruido
+        self.deriva = deriva
+        self.tempo_estabilizacao = tempo_estabilizacao
+        self.auto_print = auto_print
+        self.intervalo_auto_print = intervalo_auto_print
+        self.baudrate = baudrate
+        self.enquadramento = enquadramento
+        self.casas = casas
+        self.unidade = unidade
+        self.com_id = com_id
+        self.erro30 = erro30
+        self.numero_serie = numero_serie
+        self.protocolo = protocolo
+        self._aleatorio = random.Random(semente)
+        self._separador = xbpi.SeparadorTelegramas() if protocolo == PROTOCOLO_XBPI else SeparadorQuadros()
+
+        agora = time.monotonic()
+        self._inicio = agora
+        self._carga = peso
+        self._carga_anterior = peso
+        self._mudanca_carga = agora - tempo_estabilizacao  # Começa estável
+        self._tara = 0.0
+
+    # --- BANCADA ---
+    def colocar(self, peso, instante=None):
+        """Muda a carga sobre o prato (ex.: coloca ou retira uma amostra)."""
+        instante = time.monotonic() if instante is None else instante
+        self._carga_anterior = self._valor_carga(instante)
+        self._carga = peso
+        self._mudanca_carga = instante
+
+    def tarar(self, instante=None):
+        """Tara. Como na balança real, vale o valor de quando a leitura se estabiliza."""
+        instante = time.monotonic() if instante is None else instante
+        instante = max(instante, self._mudanca_carga + self.tempo_estabilizacao)
+        self._tara = self._valor_bruto(instante, com_ruido=False)
+
+    def pressionar_print(self):
+        """Tecla PRINT/ESC no painel: libera a interface após um Err 30."""
+        self.erro30 = False
+
+    # --- PROTOCOLO ---
+    @property
+    def periodo_quadro(self):
+        """Tempo (s) para transmitir um quadro na velocidade configurada."""
+        if self.protocolo == PROTOCOLO_MT_SICS:
+            return self.tempo_transmissao(16 + self.casas)  # "S S" + valor com sinal + unidade + CR LF
+        if self.protocolo == PROTOCOLO_XBPI:
+            return self.tempo_transmissao(14 + len(self.unidade))  # Telegrama de peso (float64, flags e unidade)
+        return self.tempo_transmissao(22 if self.com_id else 16)
+
+    @property
+    def periodo_auto_print(self):
+        return max(self.periodo_quadro, self.intervalo_auto_print or 0.0)
+
+    def tempo_transmissao(self, quantidade_bytes):
+        return quantidade_bytes * _BITS_POR_CARACTERE / self.baudrate
+
+    def estavel(self, instante):
+        return instante - self._mudanca_carga >= self.tempo_estabilizacao
+
+    def receber(self, dados, instante=None):
+        """Processa bytes recebidos da porta. Retorna a lista de quadros de resposta (bytes com CR LF)."""
+        instante = time.monotonic() if instante is None else instante
+        if self.protocolo == PROTOCOLO_MT_SICS:
+            return [resposta for comando in self._separador.alimentar(dados)
+                    for resposta in self._responder_mt_sics(comando.strip(), instante)]
+        if self.protocolo == PROTOCOLO_XBPI:
+            return [self._responder_xbpi(comando, instante) for comando in self._separador.alimentar(dados)]
+        respostas = []
+        for comando in self._separador.alimentar(dados):
+            comando = comando.lstrip(b'\x1b')
+            if self.erro30:
+                respostas.append(self._quadro_erro(30))
+            elif comando == b'P':
+                respostas.append(self.quadro(instante))
+            elif comando in (b'T', b'f4_'):
+                self.tarar(instante)
+            elif comando == b'f3_':
+                self.tarar(instante)  # Zero: na simulação, equivalente à tara
+            elif comando == b'x1_':
+                respostas.append(self._quadro_texto("SIM-SBI"))
+            elif comando == b'x2_':
+                respostas.append(self._quadro_texto(self.numero_serie))
+        return respostas
+
+    def quadro(self, instante=None):
+        """Quadro com o valor indicado no instante dado (no formato do protocolo configurado)."""
+        instante = time.monotonic() if instante is None else instante
+        if self.protocolo == PROTOCOLO_MT_SICS:
+            return self._quadro_mt_sics("S", instante)
+        if self.protocolo == PROTOCOLO_XBPI:
+            return self._telegrama_peso(instante)
+        if self.erro30:
+            return self._quadro_erro(30)
+        valor = self._valor_bruto(instante, com_ruido=True) - self._tara
+        sinal = '-' if valor < 0 else '+'
+        texto_valor = f"{abs(valor):>9.{self.casas}f}"
+        # Leitura instável: '?' no último caractere do campo de unidade
+        unidade = f"{self.unidade:<3}" if self.estavel(instante) else f"{self.unidade:<2}?"
+        return self._montar(f"{sinal}{texto_valor} {unidade}")
+
+    # --- MT-SICS ---
+    def _responder_mt_sics(self, comando, instante):
+        if comando in (b'SI', b'S'):
+            return [self._quadro_mt_sics("S", instante)]
+        if comando == b'SIR':
+            self.auto_print = True
+            return []  # As leituras seguem no ritmo do envio contínuo
+        if comando == b'@':
+            self.auto_print = False
+            return [self._quadro_texto_mt_sics("I4", self.numero_serie)]
+        if comando == b'T':
+            self.tarar(instante)
+            return [self._quadro_mt_sics("T", instante, valor=self._tara)]
+        if comando == b'Z':
+            self.tarar(instante)  # Zero: na simulação, equivalente à tara
+            return [b"Z A\r\n"]
+        if comando == b'I2':
+            return [self._quadro_texto_mt_sics("I2", "SIM-MT-SICS")]
+        if comando == b'I4':
+            return [self._quadro_texto_mt_sics("I4", self.numero_serie)]
+        return [b"ES\r\n"] if comando else []
+
+    def _quadro_mt_sics(self, nome, instante, valor=None):
+        if valor is None:
+            valor = self._valor_bruto(instante, com_ruido=True) - self._tara
+        estado = "S" if self.estavel(instante) else "D"
+        return f"{nome} {estado} {valor:>{self.casas + 5}.{self.casas}f} {self.unidade}\r\n".encode('ascii')
+
+    @staticmethod
+    def _quadro_texto_mt_sics(nome, texto):
+        return f'{nome} A "{texto}"\r\n'.encode('ascii')
+
+    # --- xBPI ---
+    def _responder_xbpi(self, comando, instante):
+        endereco, codigo = comando[0], comando[1]
+        if self.erro30:
+            return xbpi.telegrama(codigo, endereco=endereco, estado=xbpi.ERRO_INTERFACE_BLOQUEADA)
+        if codigo == xbpi.COD_PESO:
+            return self._telegrama_peso(instante)
+        if codigo in (xbpi.COD_TARA, xbpi.COD_ZERO):
+            self.tarar(instante)  # Zero: na simulação, equivalente à tara
+            return xbpi.telegrama(codigo, endereco=endereco, estado=xbpi.ESTADO_OK)
+        if codigo in (xbpi.COD_MODELO, xbpi.COD_NUMERO_SERIE):
+            texto = "SIM-XBPI" if codigo == xbpi.COD_MODELO else self.numero_serie
+            return xbpi.telegrama(codigo, texto.encode('ascii'), endereco, xbpi.ESTADO_OK)
+        return xbpi.telegrama(codigo, endereco=endereco, estado=xbpi.ERRO_COMANDO_DESCONHECIDO)
+
+    def _telegrama_peso(self, instante):
+        if self.erro30:
+            return xbpi.telegrama(xbpi.COD_PESO, estado=xbpi.ERRO_INTERFACE_BLOQUEADA)
+        valor = round(self._valor_bruto(instante, com_ruido=True) - self._tara, self.casas)
+        return xbpi.telegrama_peso(valor, self.estavel(instante), self.unidade)
+
+    # --- INTERNOS ---
+    def _valor_carga(self, instante):
+        """Carga percebida pelo sistema de pesagem, ainda se acomodando após a última mudança."""
+        decorrido = instante - self._mudanca_carga
+        # Constante de tempo tal que ao fim do tempo de estabilização resta menos de 0,001% da diferença
+        tau = max(self.tempo_estabilizacao, 1e-6) / 12.0
+        return self._carga + (self._carga_anterior - self._carga) * math.exp(-max(decorrido, 0.0) / tau)
+
+    def _valor_bruto(self, instante, com_ruido):
+        valor = self._valor_carga(instante) + self.deriva * (instante - self._inicio)
+        if com_ruido and self.ruido:
+            valor += self._aleatorio.gauss(0.0, self.ruido)
+        return valor
+
+    def _quadro_erro(self, codigo):
+        return self._montar(f"   Err {codigo:>3}", "Stat  ")
+
+    def _quadro_texto(self, texto):
+        return self._montar(f"{texto:>14}")
+
+    def _montar(self, conteudo, identificacao="N     "):
+        if not self.com_id:
+            identificacao = ""
+        return f"{identificacao}{conteudo:<14}\r\n".encode('ascii')
@@ -0,0 +1,247 @@
+"""
+Esquema sim:// do pyserial: uma porta serial ligada a uma BalancaSimulada, sem hardware nem pty.
+
+    serial.serial_for_url("sim://bancada1?peso=10&auto=1&baud=1200", baudrate=1200, bytesize=7, parity='O')
+
+O nome depois de sim:// identifica a balança: abrir a mesma URL de novo reaproveita o mesmo modelo
+(a carga e a tara continuam), e obter_balanca(nome) devolve o modelo para mudar a carga durante um teste.
+Opções: peso, ruido, deriva, estabilizacao, auto (0/1), intervalo, baud, enquadramento (ex.: 7O1),
+casas, unidade, id (0/1, formato de 22 caracteres), erro30 (0/1), semente, protocolo (sbi, mt-sics ou xbpi).
+Se a porta for aberta com velocidade ou enquadramento diferentes dos da balança, os bytes chegam corrompidos.
+"""
+import threading
+import time
+import urllib.parse
+from collections import deque
+from serial.serialutil import SerialBase, SerialException, PortNotOpenError, to_bytes
+from simulador.balanca_simulada import BalancaSimulada
+
+# Tamanho do buffer de recepção; como numa UART, os bytes mais antigos se perdem se ninguém ler
+_CAPACIDADE_ENTRADA = 4096
+
+_OPCOES = {
+    'peso': ('peso', float),
+    'ruido': ('ruido', float),
+    'deriva': ('deriva', float),
+    'estabilizacao': ('tempo_estabilizacao', float),
+    'auto': ('auto_print', lambda valor: valor not in ('0', 'false', '')),
+    'intervalo': ('intervalo_auto_print', float),
+    'baud': ('baudrate', int),
+    'enquadramento': ('enquadramento', str.upper),
+    'casas': ('casas', int),
+    'unidade': ('unidade', str),
+    'id': ('com_id', lambda valor: valor not in ('0', 'false', '')),
+    'erro30': ('erro30', lambda valor: valor not in ('0', 'false', '')),
+    'semente': ('semente', int),
+    'protocolo': ('protocolo', str.lower),
+}
+
+_balancas = {}
+_lock_balancas = threading.Lock()
+
+
+def obter_balanca(nome=""):
+    """Retorna a BalancaSimulada de uma URL sim://<nome> já aberta (ou None)."""
+    with _lock_balancas:
+        return _balancas.get(nome)
+
+
+def remover_balanca(nome=""):
+    """Esquece o modelo da balança; a próxima abertura da URL cria um novo com as opções da URL."""
+    with _lock_balancas:
+        _balancas.pop(nome, None)
+
+
+class Serial(SerialBase):
+    """Porta serial simulada, com o ritmo de transmissão da velocidade configurada."""
+
+    BAUDRATES = (150, 300, 600, 1200, 2400, 4800, 9600, 19200)
+
+    def __init__(self, *args, **kwargs):
+        self.balanca = None
+        self._entrada = bytearray()
+        self._em_transito = deque()  # (instante de chegada, bytes) das respostas ainda sendo transmitidas
+        self._linha_livre = 0.0      # Instante em que a balança termina de transmitir o que já enviou
+        self._proximo_auto = 0.0
+        self._compativel = True
+        self._leitura_cancelada = False
+        self._condicao = threading.Condition()
+        super().__init__(*args, **kwargs)
+
+    def open(self):
+        if self.is_open:
+            raise SerialException("Port is already open.")
+        if self._port is None:
+            raise SerialException("Port must be configured before it can be used.")
+        self.balanca = self._balanca_da_url(self.port)
+        self._reconfigure_port()
+        self._entrada.clear()
+        self._em_transito.clear()
+        agora = time.monotonic()
+        self._linha_livre = agora
+        self._proximo_auto = agora + self.balanca.periodo_auto_print
+        self.is_open = True
+
+    def close(self):
+        with self._condicao:
+            self.is_open = False
+            self._condicao.notify_all()
+        super().close()
+
+    def _reconfigure_port(self):
+        if self.balanca is None:
+            return
+        enquadramento = f"{self._bytesize}{self._parity}{int(self._stopbits)}"
+        self._compativel = (self._baudrate == self.balanca.baudrate
+                            and enquadramento == self.balanca.enquadramento)
+
+    @staticmethod
+    def _balanca_da_url(url):
+        partes = urllib.parse.urlsplit(url)
+        if partes.scheme != "sim":
+            raise SerialException(f'esperado "sim://[nome][?opcoes]", recebido {url!r}')
+        parametros = {}
+        try:
+            for opcao, valores in urllib.parse.parse_qs(partes.query, keep_blank_values=True).items():
+                if opcao not in _OPCOES:
+                    raise ValueError(f"opção desconhecida: {opcao!r}")
+                nome_parametro, conversao = _OPCOES[opcao]
+                parametros[nome_parametro] = conversao(valores[0])
+        except ValueError as e:
+            raise SerialException(f"URL sim:// inválida ({url!r}): {e}")
+
+        nome = partes.netloc + partes.path
+        with _lock_balancas:
+            if nome not in _balancas:
+                try:
+                    _balancas[nome] = BalancaSimulada(**parametros)
+                except ValueError as e:
+                    raise SerialException(f"URL sim:// inválida ({url!r}): {e}")
+            return _balancas[nome]
+
+    # --- TRANSMISSÃO SIMULADA ---
+    def _atualizar(self, agora):
+        """Move para o buffer de recepção os quadros que já teriam chegado até `agora`. Chamar com o lock."""
+        balanca = self.balanca
+        if balanca.auto_print:
+            periodo = balanca.periodo_auto_print
+            if agora - self._proximo_auto > 1.0:
+                # Ninguém leu por muito tempo: o que foi transmitido nesse meio tempo já se perdeu.
+                self._proximo_auto = agora - 1.0
+            while self._proximo_auto <= agora:
+                self._receber(balanca.quadro(self._proximo_auto))
+                self._linha_livre = max(self._linha_livre, self._proximo_auto)
+                self._proximo_auto += periodo
+        while self._em_transito and self._em_transito[0][0] <= agora:
+            self._receber(self._em_transito.popleft()[1])
+
+    def _receber(self, dados):
+        if not self._compativel:
+            # Velocidade ou enquadramento diferentes: a UART lê lixo no lugar dos caracteres.
+            dados = bytes((b ^ 0x5A) & 0x7F for b in dados)
+        self._entrada += dados
+        if len(self._entrada) > _CAPACIDADE_ENTRADA:
+            del self._entrada[:len(self._entrada) - _CAPACIDADE_ENTRADA]
+
+    def _proximo_evento(self):
+        proximos = []
+        if self._em_transito:
+            proximos.append(self._em_transito[0][0])
+        if self.balanca.auto_print:
+            proximos.append(self._proximo_auto)
+        return min(proximos) if proximos else None
+
+    # --- API DO PYSERIAL ---
+    @property
+    def in_waiting(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+        with self._condicao:
+            self._atualizar(time.monotonic())
+            return len(self._entrada)
+
+    def read(self, size=1):
+        if not self.is_open:
+            raise PortNotOpenError()
+        prazo = None if self._timeout is None else time.monotonic() + self._timeout
+        with self._condicao:
+            while True:
+                agora = time.monotonic()
+                self._atualizar(agora)
+                if len(self._entrada) >= size or not self.is_open or (prazo is not None and agora >= prazo):
+                    break
+                if self._leitura_cancelada:
+                    break
+                espera = [t - agora for t in (self._proximo_evento(), prazo) if t is not None]
+                self._condicao.wait(max(min(espera), 0.0) if espera else None)
+            self._leitura_cancelada = False
+            dados = bytes(self._entrada[:size])
+            del self._entrada[:size]
+        return dados
+
+    def write(self, data):
+        if not self.is_open:
+            raise PortNotOpenError()
+        data = to_bytes(data)
+        with self._condicao:
+            agora = time.monotonic()
+            # A balança só interpreta o comando depois de recebê-lo por inteiro.
+            recebido = agora + self.balanca.tempo_transmissao(len(data))
+            comando = data if self._compativel else bytes((b ^ 0x5A) & 0x7F for b in data)
+            auto_print = self.balanca.auto_print
+            respostas = self.balanca.receber(comando, recebido)
+            if self.balanca.auto_print and not auto_print:
+                # Envio contínuo ligado por comando (SIR do MT-SICS): o primeiro quadro sai depois do comando
+                self._proximo_auto = max(recebido, self._linha_livre) + self.balanca.periodo_auto_print
+            for resposta in respostas:
+                inicio = max(recebido, self._linha_livre)
+                self._linha_livre = inicio + self.balanca.tempo_transmissao(len(resposta))
+                self._em_transito.append((self._linha_livre, resposta))
+            self._condicao.notify_all()
+        return len(data)
+
+    def reset_input_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+        with self._condicao:
+            self._atualizar(time.monotonic())
+            self._entrada.clear()
+
+    def reset_output_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+    @property
+    def out_waiting(self):
+        return 0
+
+    def cancel_read(self):
+        """Como no pyserial: a leitura em andamento (ou a próxima) retorna com o que já chegou."""
+        with self._condicao:
+            self._leitura_cancelada = True
+            self._condicao.notify_all()
+
+    def _update_break_state(self):
+        pass
+
+    def _update_rts_state(self):
+        pass
+
+    def _update_dtr_state(self):
+        pass
+
+    @property
+    def cts(self):
+        return True
+
+    @property
+    def dsr(self):
+        return True
+
+    @property
+    def ri(self):
+        return False
+
+    @property
+    def cd(self):
+        return True
@@ -0,0 +1,75 @@
+import os
+import select
+import threading
+import time
+import tty
+
+
+class ServidorPty:
+    """
+    Expõe uma BalancaSimulada em um par pty (Linux/macOS). O lado escravo se comporta como uma
+    porta serial comum (ex.: /dev/pts/5) e pode ser aberto pelo programa ou pelo pyserial.
+    O ritmo dos quadros segue a velocidade configurada na balança.
+    """
+
+    def __init__(self, balanca):
+        self.balanca = balanca
+        self.porta = None
+        self._mestre = None
+        self._escravo = None
+        self._parar = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        """Cria o par pty e começa a atender. Retorna o caminho da porta."""
+        self._mestre, self._escravo = os.openpty()
+        tty.setraw(self._mestre)
+        tty.setraw(self._escravo)
+        self.porta = os.ttyname(self._escravo)
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._laco, daemon=True)
+        self._thread.start()
+        return self.porta
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for descritor in (self._mestre, self._escravo):
+            if descritor is not None:
+                os.close(descritor)
+        self._mestre = self._escravo = None
+
+    def executar(self, funcao, *args):
+        """Executa uma ação na balança (ex.: colocar) sem concorrer com a thread do servidor."""
+        with self._lock:
+            return funcao(*args)
+
+    def _laco(self):
+        proximo_auto = time.monotonic()
+        while not self._parar.is_set():
+            agora = time.monotonic()
+            espera = max(proximo_auto - agora, 0.0) if self.balanca.auto_print else 0.1
+            try:
+                prontos, _, _ = select.select([self._mestre], [], [], espera)
+                if prontos:
+                    dados = os.read(self._mestre, 256)
+                    with self._lock:
+                        respostas = self.balanca.receber(dados)
+                    for resposta in respostas:
+                        self._transmitir(resposta)
+
+                if self.balanca.auto_print and time.monotonic() >= proximo_auto:
+                    with self._lock:
+                        quadro = self.balanca.quadro()
+                    self._transmitir(quadro)
+                    proximo_auto = max(proximo_auto + self.balanca.periodo_auto_print, time.monotonic())
+            except OSError:
+                break
+
+    def _transmitir(self, dados):
+        # O pty não tem velocidade: espera o tempo que os bytes levariam na linha.
+        time.sleep(self.balanca.tempo_transmissao(len(dados)))
+        os.write(self._mestre, dados)
@@ -0,0 +1,176 @@
+import threading
+import time
+from inventario_portas import InventarioPortas
+
+
+class SupervisorConexao:
+    """
+    Reconecta a balança automaticamente quando a porta cai (ex.: adaptador USB desconectado):
+    - Procura o mesmo adaptador na lista de portas a cada `intervalo_varredura` s (hot-plug),
+      inclusive se ele voltar com outro nome.
+    - Ao encontrá-lo, reabre a porta com o mesmo modo e perfil pelo ServicoBalanca.conectar(), que repete o
+      teste de Err 30; se falhar, tenta de novo com espera crescente (espera_inicial, dobrando até espera_maxima).
+    - Mede o tempo fora do ar de cada queda (get_metricas).
+    O estado do ensaio não é tocado: contadores, lote em andamento e sessão continuam na aplicação.
+    """
+
+    def __init__(self, servico_balanca, on_reconectado, on_desistencia, on_status_update, on_log, inventario=None,
+                 espera_inicial=1.0, espera_maxima=30.0, intervalo_varredura=1.0, tempo_maximo=None):
+        """
+        :param servico_balanca: ServicoBalanca (ou adaptador com a mesma interface) a reconectar.
+        :param on_reconectado: Chamado na thread do supervisor após reconectar. Ex: fn(porta, segundos_fora)
+        :param on_desistencia: Chamado se `tempo_maximo` se esgotar sem reconectar. Ex: fn(mensagem)
+        :param on_status_update: Callback de status. Ex: fn(mensagem, cor)
+        :param on_log: Callback para log de eventos. Ex: fn(mensagem)
+        :param inventario: InventarioPortas usado para identificar e procurar o adaptador (None cria um só em memória).
+        :param espera_inicial: Espera (s) após a primeira tentativa de reabertura que falhar.
+        :param espera_maxima: Limite (s) da espera entre tentativas.
+        :param intervalo_varredura: Intervalo (s) entre as consultas à lista de portas enquanto o adaptador não volta.
+        :param tempo_maximo: Desiste após este tempo (s) fora do ar. None tenta até ser cancelado.
+        """
+        self.servico_balanca = servico_balanca
+        self.on_reconectado = on_reconectado
+        self.on_desistencia = on_desistencia
+        self.on_status_update = on_status_update
+        self.on_log = on_log
+        self.inventario = inventario or InventarioPortas(on_log=on_log, arquivo_memoria=None)
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.intervalo_varredura = intervalo_varredura
+        self.tempo_maximo = tempo_maximo
+
+        self.porta = None
+        self.modo = None
+        self.perfil = None
+        self.identidade = None
+        self._cancelar = threading.Event()
+        self._thread = None
+        self._inicio_queda = None
+        # Métricas de disponibilidade
+        self.quedas = 0
+        self.reconexoes = 0
+        self.tempo_fora_total = 0.0
+        self.maior_tempo_fora = 0.0
+        self.ultimo_tempo_fora = None
+
+    def vigiar(self, porta, modo, perfil):
+        """
+        Passa a supervisionar a conexão recém-aberta. A identidade USB da porta vem do inventário
+        (reenumerado em segundo plano se o cache estiver vencido), enquanto o adaptador ainda está presente.
+        :param perfil: Nome do perfil efetivamente usado (após a sondagem, se houve).
+        """
+        self.porta, self.modo, self.perfil = porta, modo, perfil
+        self.identidade = self.inventario.identificar(porta)
+        self._cancelar.clear()
+        if self.identidade.vid is None and "://" not in porta:
+            threading.Thread(target=self._identificar, args=(porta,), daemon=True).start()
+
+    def _identificar(self, porta):
+        self.inventario.obter()
+        if self.porta == porta:
+            self.identidade = self.inventario.identificar(porta)
+
+    def parar(self):
+        """Deixa de supervisionar (desconexão pelo usuário ou encerramento) e cancela uma reconexão em andamento."""
+        self._cancelar.set()
+        self.porta = None
+
+    @property
+    def reconectando(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def conexao_perdida(self):
+        """
+        Chamado pelo on_connection_loss. Inicia a reconexão em uma thread própria.
+        :return: False se não há conexão supervisionada (a aplicação trata a queda como antes).
+        """
+        if self.porta is None or self._cancelar.is_set():
+            return False
+        if self.reconectando:
+            return True
+        self._thread = threading.Thread(target=self._reconectar, daemon=True)
+        self._thread.start()
+        return True
+
+    def get_metricas(self):
+        """Quedas, reconexões e tempos fora do ar (s); `fora_agora` é a duração da queda em andamento."""
+        return {
+            'quedas': self.quedas,
+            'reconexoes': self.reconexoes,
+            'tempo_fora_total': self.tempo_fora_total,
+            'maior_tempo_fora': self.maior_tempo_fora,
+            'ultimo_tempo_fora': self.ultimo_tempo_fora,
+            'fora_agora': time.monotonic() - self._inicio_queda if self._inicio_queda is not None else None,
+        }
+
+    def _reconectar(self):
+        inicio = self._inicio_queda = time.monotonic()
+        self.quedas += 1
+        identidade = self.identidade
+        # Libera a porta e a thread de monitoramento que caiu
+        self.servico_balanca.desconectar()
+        self.on_status_update(f"Conexão perdida. Procurando {identidade}...", "orange")
+        self.on_log(f"‼️ Conexão com a balança perdida. Reconectando automaticamente a {identidade}...")
+
+        espera = self.espera_inicial
+        proxima_tentativa = inicio
+        tentativas = 0
+        ausente = False
+        try:
+            while not self._cancelar.is_set():
+                agora = time.monotonic()
+                if self.tempo_maximo is not None and agora - inicio > self.tempo_maximo:
+                    self._registrar_queda(agora - inicio)
+                    self.on_desistencia(f"A balança não voltou em {self.tempo_maximo:.0f} s "
+                                        f"({tentativas} tentativa(s) de reconexão).")
+                    return
+                porta = self.inventario.localizar(identidade, max_idade=self.intervalo_varredura / 2)
+                if porta is None:
+                    if not ausente:
+                        ausente = True
+                        self.on_status_update(f"Aguardando o adaptador {identidade} voltar...", "orange")
+                    self._cancelar.wait(self.intervalo_varredura)
+                    continue
+                if ausente:
+                    ausente = False
+                    self.on_log(f"Adaptador encontrado em {porta}.")
+                    proxima_tentativa = agora  # Voltou: tenta na hora, sem esperar o backoff
+                if agora < proxima_tentativa:
+                    self._cancelar.wait(min(self.intervalo_varredura, proxima_tentativa - agora))
+                    continue
+
+                tentativas += 1
+                self.on_status_update(f"Reconectando em {porta} (tentativa {tentativas})...", "orange")
+                sucesso, mensagem = self.servico_balanca.conectar(porta, self.modo, self.perfil)
+                if sucesso:
+                    if self._cancelar.is_set():  # Cancelado durante a tentativa
+                        self.servico_balanca.desconectar()
+                        return
+                    fora = time.monotonic() - inicio
+                    self._registrar_queda(fora)
+                    self.reconexoes += 1
+                    if porta != self.porta:
+                        self.on_log(f"A balança voltou com outro nome: {self.porta} -> {porta}.")
+                        self.porta = porta
+                    self.on_log(f"Reconectado em {porta} após {fora:.1f} s fora do ar ({tentativas} tentativa(s)).")
+                    self.on_reconectado(porta, fora)
+                    return
+                self.on_log(f"Tentativa {tentativas} de reconexão falhou: {mensagem.splitlines()[0]} "
+                            f"Nova tentativa em {espera:.0f} s.")
+                proxima_tentativa = time.monotonic() + espera
+                espera = min(espera * 2, self.espera_maxima)
+            self._registrar_queda(time.monotonic() - inicio)
+        finally:
+            self._inicio_queda = None
+
+    def _registrar_queda(self, fora):
+        self.tempo_fora_total += fora
+        self.maior_tempo_fora = max(self.maior_tempo_fora, fora)
+        self.ultimo_tempo_fora = fora
+
+    def resumo(self):
+        """Texto para o log com as métricas de disponibilidade (None se não houve quedas)."""
+        if not self.quedas:
+            return None
+        return (f"Conexão: {self.quedas} queda(s), {self.reconexoes} reconexão(ões) automática(s); "
+                f"tempo fora do ar: total {self.tempo_fora_total:.1f} s, maior {self.maior_tempo_fora:.1f} s.")
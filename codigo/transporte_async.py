@@ -0,0 +1,588 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError
+import serial
+from protocolo_sbi import SeparadorQuadros
+from perfis_serial import PERFIS, PERFIL_PADRAO, descritor_selecionavel
+from servico_balanca import ServicoBalanca, MODO_CONSULTA, MODO_CONTINUO, IDADE_MAXIMA_CAPTURA
+from drivers_balanca import DRIVERS, PROTOCOLO_PADRAO
+from handshake_conexao import ResultadoHandshake, ETAPA_CANCELADO
+from buffer_leituras import BufferLeituras
+from estabilidade import DetectorEstabilidade
+from estatisticas import EstatisticaCorrente
+from escalonador_comandos import ResultadoComando, resumir_metricas, tempo_silencio, TIMEOUT_PADRAO
+
+# Quadros recebidos e ainda não consumidos (como o buffer de recepção de uma UART, os mais antigos se perdem)
+_CAPACIDADE_QUADROS = 256
+
+
+class TransporteSerialAsync:
+    """
+    Transporte serial não bloqueante para asyncio.
+    No Linux/macOS o descritor da porta é registrado no event loop (loop.add_reader), sem threads.
+    Onde a porta não expõe um descritor (COM no Windows), as leituras bloqueantes vão para o executor.
+    """
+
+    def __init__(self, loop, ao_receber_quadro, ao_perder_conexao, separador=None):
+        """
+        :param ao_receber_quadro: Chamado no event loop para cada quadro completo. Ex: fn(quadro_bytes)
+        :param ao_perder_conexao: Chamado no event loop quando a porta falha. Ex: fn(excecao)
+        :param separador: Separador de quadros do protocolo (None = linhas terminadas em LF).
+        """
+        self.loop = loop
+        self.ser = None
+        self.ao_receber_quadro = ao_receber_quadro
+        self.ao_perder_conexao = ao_perder_conexao
+        self._separador = separador or SeparadorQuadros()
+        self._fd = None
+        self._tarefa_leitura = None
+
+    def assumir(self, ser):
+        """Passa a ler e escrever na porta já aberta (ex.: pelo HandshakeConexao)."""
+        self.ser = ser
+        self._fd = descritor_selecionavel(self.ser)
+        if self._fd is not None:
+            # O loop só chama _ler_disponivel quando há bytes, então a leitura não bloqueia.
+            self.loop.add_reader(self._fd, self._ler_disponivel)
+        else:
+            self._tarefa_leitura = self.loop.create_task(self._ler_em_executor())
+
+    def fechar(self):
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            self._fd = None
+        if self._tarefa_leitura is not None:
+            self._tarefa_leitura.cancel()
+            self._tarefa_leitura = None
+        if self.ser is not None and self.ser.is_open:
+            self.ser.close()
+        self.ser = None
+        self._separador.limpar()
+
+    def escrever(self, dados):
+        self.ser.write(dados)
+
+    def descartar_entrada(self):
+        """Descarta bytes ainda não processados (equivalente ao reset_input_buffer)."""
+        self._separador.limpar()
+        self.ser.reset_input_buffer()
+
+    def _ler_disponivel(self):
+        try:
+            dados = self.ser.read(self.ser.in_waiting or 1)
+        except (serial.SerialException, OSError) as e:
+            self._falhar(e)
+            return
+        self._entregar(dados)
+
+    async def _ler_em_executor(self):
+        # Cada leitura bloqueia no máximo pelo timeout do perfil, em uma thread do executor.
+        while self.ser is not None:
+            try:
+                ser = self.ser
+                dados = await self.loop.run_in_executor(None, lambda: ser.read(ser.in_waiting or 1))
+            except (serial.SerialException, OSError) as e:
+                self._falhar(e)
+                return
+            self._entregar(dados)
+
+    def _entregar(self, dados):
+        for quadro in self._separador.alimentar(dados):
+            self.ao_receber_quadro(quadro)
+
+    def _falhar(self, erro):
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            self._fd = None
+        self.ao_perder_conexao(erro)
+
+
+class _ComandoAsync:
+    __slots__ = ('pedido', 'futuro', 'recebidos')
+
+    def __init__(self, pedido, futuro):
+        self.pedido = pedido  # PedidoComando (drivers_balanca)
+        self.futuro = futuro  # asyncio.Future com o quadro que respondeu ao comando
+        self.recebidos = 0
+
+
+class ServicoBalancaAsync:
+    """
+    Versão asyncio do ServicoBalanca: monitoramento, tara e captura são corrotinas que compartilham um
+    único event loop; a conexão usa o mesmo HandshakeConexao, no executor. Usa os mesmos callbacks do ServicoBalanca.
+    Como no EscalonadorComandos, um comando por vez: cada resposta é associada ao comando que a pediu,
+    e tara e zero retornam um ResultadoComando confirmado pela balança, com o tempo de ida e volta.
+    """
+    registrar_tara = ServicoBalanca.registrar_tara
+    _registrar_metricas_comandos = ServicoBalanca._registrar_metricas_comandos
+    _criar_handshake = ServicoBalanca._criar_handshake
+    _informar_falha_conexao = ServicoBalanca._informar_falha_conexao
+    _informar_conexao = ServicoBalanca._informar_conexao
+
+    def __init__(self, on_peso_update, on_status_update, on_log, on_connection_loss, detector_estabilidade=None,
+                 protocolo=PROTOCOLO_PADRAO):
+        self.on_peso_update = on_peso_update
+        self.on_status_update = on_status_update
+        self.on_log = on_log
+        self.on_connection_loss = on_connection_loss
+
+        self.transporte = None
+        self.modo_aquisicao = MODO_CONSULTA
+        self.driver = DRIVERS[protocolo]
+        self.perfil = PERFIS[self.driver.perfil_padrao or PERFIL_PADRAO]
+        # Identificação informada pela balança no handshake (None se ela não responde às consultas)
+        self.identificar_balanca = True
+        self.modelo = None
+        self.numero_serie = None
+        self.ultimo_peso_valido = None
+        self.leitura_estavel = False
+        self.monitoramento_pausado = False
+        self._retomado = None
+        self._tarefa_monitor = None
+        self._quadros = deque(maxlen=_CAPACIDADE_QUADROS)  # Quadros recebidos, na ordem de chegada
+        self._novo_quadro = None  # asyncio.Event sinalizado a cada quadro recebido
+        self._porta = None  # asyncio.Lock: um comando por vez na porta
+        self._comando = None  # _ComandoAsync escrito que ainda aguarda resposta
+        self._linha_suja = False  # Um comando ficou sem resposta no prazo: ela ainda pode chegar
+        self._ultimo_quadro = 0.0
+        # Tempo de ida e volta por tipo de comando e respostas que não chegaram no prazo
+        self.rtt = {}
+        self.sem_resposta = 0
+        self._aguardando_publicacao = []  # Futures à espera da próxima leitura publicada
+        self.buffer_leituras = BufferLeituras()
+        self.idade_maxima_captura = IDADE_MAXIMA_CAPTURA
+        self.detector_estabilidade = detector_estabilidade or DetectorEstabilidade()
+
+    # --- CORROTINAS ---
+    async def conectar(self, porta, modo=MODO_CONSULTA, perfil=None, sondar=False, on_progresso=None):
+        """
+        Executa o mesmo HandshakeConexao do ServicoBalanca (sondagem, abertura, Err 30 e identificação) no
+        executor e passa a porta aberta ao transporte. Retorna (sucesso, mensagem).
+        Se a tarefa for cancelada, o handshake também é, e a porta é fechada.
+        """
+        loop = asyncio.get_running_loop()
+        handshake = self._criar_handshake(porta, modo, perfil, sondar, on_progresso)
+        execucao = loop.run_in_executor(None, handshake.executar)
+        try:
+            # shield: cancelar a tarefa não abandona a thread do handshake com a porta aberta
+            resultado = await asyncio.shield(execucao)
+        except asyncio.CancelledError:
+            handshake.cancelar()
+            execucao.add_done_callback(_fechar_porta_do_handshake)
+            self._informar_falha_conexao(ResultadoHandshake(ETAPA_CANCELADO, mensagem="Conexão cancelada."), porta)
+            raise
+        if not resultado.sucesso:
+            return self._informar_falha_conexao(resultado, porta)
+
+        self.modo_aquisicao = MODO_CONTINUO if resultado.continuo else MODO_CONSULTA
+        self.perfil = resultado.perfil
+        self.modelo = resultado.modelo
+        self.numero_serie = resultado.numero_serie
+        self.monitoramento_pausado = False
+        self.buffer_leituras.limpar()
+        self.detector_estabilidade.reiniciar()
+        self._retomado = asyncio.Event()
+        self._retomado.set()
+        self._quadros.clear()
+        self._novo_quadro = asyncio.Event()
+        self._porta = asyncio.Lock()
+        self._comando = None
+        self._linha_suja = False
+        self.rtt = {}
+        self.sem_resposta = 0
+        self.transporte = TransporteSerialAsync(loop, self._ao_receber_quadro, self._ao_perder_conexao,
+                                                self.driver.criar_separador())
+        self.transporte.assumir(resultado.ser)
+        self._tarefa_monitor = loop.create_task(self.monitorar())
+        return self._informar_conexao(resultado, porta)
+
+    async def desconectar(self):
+        if self._tarefa_monitor is not None:
+            self._tarefa_monitor.cancel()
+            try:
+                await self._tarefa_monitor
+            except asyncio.CancelledError:
+                pass
+            self._tarefa_monitor = None
+        self._interromper_comando()
+        if self.transporte is not None:
+            if self.modo_aquisicao == MODO_CONTINUO and self.driver.cmd_desligar_fluxo:
+                try:
+                    self.transporte.escrever(self.driver.cmd_desligar_fluxo)
+                except (serial.SerialException, OSError):
+                    pass
+            self.transporte.fechar()
+            self.transporte = None
+        for fonte, metrica in self.detector_estabilidade.get_metricas().items():
+            if metrica["quantidade"]:
+                self.on_log(f"Tempo até estabilizar ({fonte}): média de {metrica['media']:.2f} s "
+                            f"em {metrica['quantidade']} estabilizações.")
+        self._registrar_metricas_comandos(self.get_metricas())
+        self.on_status_update("Desconectado", "gray")
+        self.on_log("Desconectado.")
+
+    async def monitorar(self):
+        """Publica cada leitura. No modo contínuo só consome o fluxo; no modo consulta envia ESC P."""
+        while self.transporte is not None:
+            await self._retomado.wait()
+            if self.modo_aquisicao == MODO_CONTINUO:
+                leitura = await self._proximo_quadro(None)
+            else:
+                leitura = await self._solicitar_leitura()
+                await asyncio.sleep(0.2)
+            if self.monitoramento_pausado:
+                continue
+            self._publicar(leitura)
+
+    def pausar_monitoramento(self):
+        """Pausa o monitoramento (chamar na thread do event loop)."""
+        self.monitoramento_pausado = True
+        if self._retomado is not None:
+            self._retomado.clear()
+
+    def retomar_monitoramento(self):
+        """Retoma o monitoramento (chamar na thread do event loop)."""
+        self.monitoramento_pausado = False
+        if self._retomado is not None:
+            self._retomado.set()
+
+    async def tarar(self, timeout=5.0):
+        """Tara, confirmada conforme o protocolo. Retorna o ResultadoComando, ou None se desconectado."""
+        return await self._comando_da_balanca(self.driver.pedido_tara(self.modo_aquisicao == MODO_CONTINUO),
+                                              "tara", timeout)
+
+    async def zerar(self, timeout=5.0):
+        """Como tarar(), para o comando de zero do protocolo."""
+        return await self._comando_da_balanca(self.driver.pedido_zero(self.modo_aquisicao == MODO_CONTINUO),
+                                              "zero", timeout)
+
+    def get_metricas(self):
+        """Mesmo formato de EscalonadorComandos.get_metricas()."""
+        return resumir_metricas(self.rtt, self.sem_resposta)
+
+    async def leitura_instantanea(self, instante=None, timeout=3.0):
+        """
+        Retorna (peso, True) com a leitura estável que atende uma captura feita em `instante`
+        (time.monotonic(); None = agora), ou (None, False) se nenhuma chegar em até `timeout` s.
+        Usa primeiro as leituras já publicadas pelo monitor (ver ServicoBalanca.get_leitura_instantanea).
+        """
+        if self.transporte is None:
+            return None, False
+        if instante is None:
+            instante = time.monotonic()
+        fim = time.monotonic() + timeout
+        while True:
+            encontrada = self.buffer_leituras.buscar_estavel(instante, self.idade_maxima_captura)
+            if encontrada is not None:
+                return encontrada[1], True
+            restante = fim - time.monotonic()
+            if restante <= 0:
+                return None, False
+            if self._tarefa_monitor is not None and not self.monitoramento_pausado:
+                # O monitor é o dono da porta: aguarda a próxima leitura que ele publicar.
+                await self._proxima_publicacao(restante)
+            else:
+                leitura = await self._solicitar_leitura(min(restante, self.perfil.timeout), "leitura")
+                if self._avaliar_estabilidade(leitura, time.monotonic()):
+                    return leitura.peso, True
+
+    # --- INTERNOS ---
+    async def _solicitar_leitura(self, timeout=None, nome="consulta"):
+        resultado = await self._executar(self.driver.pedido_leitura(), nome,
+                                         timeout if timeout is not None else self.perfil.timeout)
+        return resultado.leitura
+
+    async def _comando_da_balanca(self, pedido, nome, timeout):
+        if self.transporte is None:
+            return None
+        resultado = await self._executar(pedido, nome, timeout)
+        leitura = resultado.leitura
+        if pedido.publicar and leitura is not None and leitura.peso is not None and not self.monitoramento_pausado:
+            self._publicar(leitura)
+        return resultado
+
+    async def _executar(self, pedido, nome, timeout=TIMEOUT_PADRAO):
+        """
+        Escreve um comando e aguarda a resposta reconhecida pelo pedido (ver EscalonadorComandos._executar).
+        Retorna o ResultadoComando; sem resposta no prazo, ele vem sem quadro e sem confirmação.
+        """
+        async with self._porta:
+            if self.transporte is None:
+                return ResultadoComando(nome)
+            continuo = self.modo_aquisicao == MODO_CONTINUO
+            if not continuo:
+                if self._linha_suja:
+                    await self._aguardar_silencio()
+                self._quadros.clear()  # Respostas atrasadas de pedidos anteriores não respondem a este
+            comando = _ComandoAsync(pedido, asyncio.get_running_loop().create_future())
+            self._comando = comando
+            inicio = time.perf_counter()
+            try:
+                self.transporte.escrever(pedido.dados)
+                if pedido.respostas == 0:
+                    return ResultadoComando(nome, rtt=time.perf_counter() - inicio, confirmado=True)
+                try:
+                    quadro = await asyncio.wait_for(comando.futuro, timeout)
+                except asyncio.TimeoutError:
+                    self.sem_resposta += 1
+                    # Sem e_resposta, a resposta é reconhecida só pela ordem: se chegar atrasada, não pode
+                    # confirmar o próximo comando.
+                    self._linha_suja = pedido.e_resposta is None and not continuo
+                    return ResultadoComando(nome)
+            finally:
+                if self._comando is comando:
+                    self._comando = None
+            rtt = time.perf_counter() - inicio
+            self.rtt.setdefault(nome, EstatisticaCorrente()).adicionar(rtt)
+            leitura = self.driver.interpretar_quadro(quadro)
+            return ResultadoComando(nome, quadro, leitura, rtt, leitura is not None and leitura.erro is None)
+
+    async def _aguardar_silencio(self):
+        """Espera a linha ficar em silêncio (ver tempo_silencio); o que chegar até lá fica como resposta atrasada."""
+        self._linha_suja = False
+        silencio = tempo_silencio(self.perfil.baudrate)
+        limite = time.monotonic() + TIMEOUT_PADRAO
+        self._ultimo_quadro = max(self._ultimo_quadro, time.monotonic())
+        while True:
+            agora = time.monotonic()
+            restante = self._ultimo_quadro + silencio - agora
+            if restante <= 0 or agora >= limite:
+                return
+            await asyncio.sleep(restante)
+
+    def _interromper_comando(self, erro=None):
+        """O comando em andamento termina com CancelledError (desconexão) ou com o erro da porta."""
+        comando, self._comando = self._comando, None
+        if comando is not None and not comando.futuro.done():
+            if erro is None:
+                comando.futuro.cancel()
+            else:
+                comando.futuro.set_exception(erro)
+
+    async def _proximo_quadro(self, timeout):
+        """Consome o próximo quadro recebido (o mais antigo ainda não consumido), aguardando até `timeout` s."""
+        fim = None if timeout is None else time.monotonic() + timeout
+        while not self._quadros:
+            self._novo_quadro.clear()
+            restante = None if fim is None else fim - time.monotonic()
+            if restante is not None and restante <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._novo_quadro.wait(), restante)
+            except asyncio.TimeoutError:
+                break
+        quadro = self._quadros.popleft() if self._quadros else None
+        return self.driver.interpretar_quadro(quadro) if quadro else None
+
+    async def _proxima_publicacao(self, timeout):
+        futuro = asyncio.get_running_loop().create_future()
+        self._aguardando_publicacao.append(futuro)
+        try:
+            await asyncio.wait_for(futuro, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if futuro in self._aguardando_publicacao:
+                self._aguardando_publicacao.remove(futuro)
+
+    def _ao_receber_quadro(self, quadro):
+        self._ultimo_quadro = time.monotonic()
+        comando = self._comando
+        if comando is not None and not comando.futuro.done():
+            pedido = comando.pedido
+            if pedido.e_resposta is None or pedido.e_resposta(quadro):
+                comando.recebidos += 1
+                if comando.recebidos >= pedido.respostas:
+                    self._comando = None
+                    comando.futuro.set_result(quadro)
+                    # No fluxo contínuo sem e_resposta, a resposta também é uma leitura do fluxo
+                    if pedido.e_resposta is not None or self.modo_aquisicao != MODO_CONTINUO:
+                        return
+        # Fica na fila até ser consumido: vários quadros lidos de uma vez (fluxo contínuo) não se perdem
+        self._quadros.append(quadro)
+        self._novo_quadro.set()
+
+    def _ao_perder_conexao(self, erro):
+        self.on_log(f"ERRO: A porta serial foi desconectada ou falhou: {erro}")
+        self._interromper_comando(erro)
+        if self._tarefa_monitor is not None:
+            self._tarefa_monitor.cancel()
+            self._tarefa_monitor = None
+        if self.transporte is not None:
+            self.transporte.fechar()
+            self.transporte = None
+        if self.on_connection_loss:
+            self.on_connection_loss()
+
+    def _avaliar_estabilidade(self, leitura, instante):
+        if leitura is None or leitura.peso is None:
+            return self.detector_estabilidade.adicionar(None, False, instante)
+        return self.detector_estabilidade.adicionar(leitura.peso, leitura.estavel, instante)
+
+    def _publicar(self, leitura):
+        instante = time.monotonic()
+        peso = leitura.peso if leitura is not None else None
+        self.leitura_estavel = self._avaliar_estabilidade(leitura, instante)
+        if peso is not None:
+            self.ultimo_peso_valido = peso
+        self.buffer_leituras.registrar(peso, self.leitura_estavel, instante)
+        aguardando, self._aguardando_publicacao = self._aguardando_publicacao, []
+        for futuro in aguardando:
+            if not futuro.done():
+                futuro.set_result(None)
+        if self.on_peso_update:
+            self.on_peso_update(self.ultimo_peso_valido, self.leitura_estavel)
+
+
+def _fechar_porta_do_handshake(execucao):
+    """Fecha a porta de um handshake que terminou com sucesso depois que a conexão já foi cancelada."""
+    if execucao.cancelled() or execucao.exception() is not None:
+        return
+    resultado = execucao.result()
+    if resultado.sucesso and resultado.ser is not None:
+        resultado.ser.close()
+
+
+class LacoAsyncio:
+    """Event loop único, em uma thread de fundo, compartilhado por todas as balanças assíncronas."""
+    _instancia = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def compartilhado(cls):
+        with cls._lock:
+            if cls._instancia is None:
+                cls._instancia = cls()
+            return cls._instancia
+
+    def executar(self, corrotina, timeout=None):
+        """Executa a corrotina no loop e aguarda o resultado (para chamadas de código síncrono)."""
+        return asyncio.run_coroutine_threadsafe(corrotina, self.loop).result(timeout)
+
+    def agendar(self, corrotina, ao_concluir=None, resultado_em_falha=(None, False), on_log=None):
+        """
+        Agenda a corrotina sem bloquear. `ao_concluir(resultado)` é sempre chamado, na thread do loop:
+        se a corrotina falhar ou for cancelada, recebe `resultado_em_falha` e o erro vai para `on_log`.
+        """
+        futuro = asyncio.run_coroutine_threadsafe(corrotina, self.loop)
+        if ao_concluir is not None:
+            def concluir(f):
+                if f.cancelled():
+                    ao_concluir(resultado_em_falha)
+                elif f.exception() is not None:
+                    if on_log is not None:
+                        on_log(f"ERRO na tarefa assíncrona: {f.exception()!r}")
+                    ao_concluir(resultado_em_falha)
+                else:
+                    ao_concluir(f.result())
+            futuro.add_done_callback(concluir)
+        return futuro
+
+
+class ConexaoAgendada:
+    """Conexão em andamento no event loop, com o mesmo cancelar() do HandshakeConexao."""
+
+    def __init__(self, futuro):
+        self.futuro = futuro
+
+    def cancelar(self):
+        self.futuro.cancel()
+
+    @property
+    def cancelado(self):
+        return self.futuro.cancelled()
+
+    def resultado(self):
+        """(sucesso, mensagem) da conexão já concluída."""
+        if self.futuro.cancelled():
+            return False, "Conexão cancelada."
+        erro = self.futuro.exception()
+        if erro is not None:
+            return False, f"Falha na conexão: {erro}"
+        return self.futuro.result()
+
+
+class AdaptadorServicoBalancaAsync:
+    """
+    Adaptador fino com a mesma interface síncrona do ServicoBalanca, para que o AppPrincipal (Tk)
+    use o ServicoBalancaAsync sem mudanças. As corrotinas rodam no LacoAsyncio compartilhado.
+    """
+
+    def __init__(self, on_peso_update, on_status_update, on_log, on_connection_loss, detector_estabilidade=None,
+                 laco=None, protocolo=PROTOCOLO_PADRAO):
+        self.laco = laco or LacoAsyncio.compartilhado()
+        self.servico = ServicoBalancaAsync(on_peso_update, on_status_update, on_log, on_connection_loss,
+                                           detector_estabilidade, protocolo)
+
+    listar_portas_disponiveis = staticmethod(ServicoBalanca.listar_portas_disponiveis)
+
+    @property
+    def perfil(self):
+        return self.servico.perfil
+
+    def conectar(self, porta, modo=MODO_CONSULTA, perfil=None, sondar=False):
+        return self.laco.executar(self.servico.conectar(porta, modo, perfil, sondar))
+
+    def conectar_em_segundo_plano(self, porta, on_concluido, modo=MODO_CONSULTA, perfil=None, sondar=False,
+                                  on_progresso=None):
+        """
+        Como no ServicoBalanca: não bloqueia, `on_concluido(conexao, sucesso, mensagem)` é chamado ao terminar
+        e o objeto retornado tem cancelar().
+        """
+        conexao = ConexaoAgendada(self.laco.agendar(self.servico.conectar(porta, modo, perfil, sondar,
+                                                                          on_progresso)))
+        conexao.futuro.add_done_callback(lambda futuro: on_concluido(conexao, *conexao.resultado()))
+        return conexao
+
+    def desconectar(self):
+        self.laco.executar(self.servico.desconectar())
+
+    def get_leitura_instantanea(self, instante=None):
+        return self.laco.executar(self.servico.leitura_instantanea(instante))
+
+    def agendar_leitura_instantanea(self, ao_concluir, instante=None):
+        """Inicia a captura sem bloquear; `ao_concluir((peso, estavel))` é chamado na thread do loop."""
+        return self.laco.agendar(self.servico.leitura_instantanea(instante), ao_concluir, on_log=self.servico.on_log)
+
+    def tarar(self, timeout=5.0):
+        """Como ServicoBalanca.tarar(): concurrent.futures.Future com o ResultadoComando, ou None se desconectado."""
+        if not self.is_connected():
+            return None
+        return self.laco.agendar(self.servico.tarar(timeout))
+
+    def zerar(self, timeout=5.0):
+        if not self.is_connected():
+            return None
+        return self.laco.agendar(self.servico.zerar(timeout))
+
+    def enviar_comando_tara(self, timeout=5.0):
+        """Envia a tara e aguarda a confirmação (bloqueia até `timeout` s). Retorna True se confirmada."""
+        futuro = self.tarar(timeout)
+        try:
+            resultado = futuro.result() if futuro is not None else None
+        except (CancelledError, serial.SerialException, OSError) as e:
+            self.servico.on_log(f"Erro ao enviar comando de tara: {e or 'conexão encerrada'}")
+            return False
+        return self.servico.registrar_tara(resultado)
+
+    def registrar_tara(self, resultado):
+        return self.servico.registrar_tara(resultado)
+
+    def pausar_monitoramento(self):
+        self.laco.loop.call_soon_threadsafe(self.servico.pausar_monitoramento)
+
+    def retomar_monitoramento(self):
+        self.laco.loop.call_soon_threadsafe(self.servico.retomar_monitoramento)
+
+    def is_connected(self):
+        return self.servico.transporte is not None
+
+    def get_ultimo_peso(self):
+        return self.servico.ultimo_peso_valido